@@ -3,6 +3,7 @@ from assemblies import views
 from assemblies import viewsFile
 from assemblies import viewsBom
 from API.v1 import views_files
+from assembly_bom import viewsBomExport
 
 # API Requirements:
 # - GET by ID
@@ -54,6 +55,9 @@ urlpatterns = [
     path('api/v1/assemblies/bom/<int:assembly_id>/', viewsBom.upload_assembly_bom,
          kwargs={"model_type": "assembly"}),  # BOM file upload
 
+    path('api/v1/assemblies/bom/<int:item_id>/export/<str:export_format>/', viewsBomExport.export_bom,
+         kwargs={"app": "assemblies", "model_type": "assembly"}),  # Multi-level BOM export
+
     ################### IMAGE API ######################
     path('api/v1/assemblies/image/<int:assembly_id>/', views_files.upload_image_to_assembly,
          kwargs={"model_type": "assembly"}),  # Upload image to assembly
@@ -2,6 +2,7 @@ from django.urls import path
 from pcbas import views, viewsFiles, viewsBom
 from files import views as file_views
 from API.v1 import views_files
+from assembly_bom import viewsBomExport
 
 # API Requirements:
 # - GET by ID
@@ -51,6 +52,10 @@ urlpatterns = [
          viewsBom.upload_pcba_bom,
          kwargs={"model_type": "pcba"}),  # BOM file upload
 
+    path('api/v1/pcbas/bom/<int:item_id>/export/<str:export_format>/',
+         viewsBomExport.export_bom,
+         kwargs={"app": "pcbas", "model_type": "pcba"}),  # Multi-level BOM export
+
     path('api/v1/pcbas/thumbnail/<int:pk>/',
          file_views.upload_thumbnail,
          kwargs={"model_type": "pcba"}),  # Thumbnail upload
@@ -12,6 +12,8 @@ from files.serializers import ImageSerializer
 from files.views import check_file_sizes_vs_limit, get_organization_by_user_id, get_organization_by_id, update_org_current_storage_size, compress_image
 from files.fileUtilities import delete_image_with_cleanup
 from files.models import File, Image
+from files.bundle_cache import cached_zip_response
+from files.zip_stream import streaming_zip_response
 from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from rest_framework.decorators import api_view, renderer_classes, permission_classes
 from rest_framework.renderers import JSONRenderer, BaseRenderer
@@ -20,9 +22,6 @@ from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-import zipfile
-import io
-import os
 
 
 class BinaryFileRenderer(BaseRenderer):
@@ -269,65 +268,16 @@ def download_files_from_part(request, part_id, **kwargs):
         if category:
             files = files.filter(file_category=category)
 
-        if not files.exists():
+        # Stream the ZIP file while it is written
+        response = streaming_zip_response(
+            (("", file_obj) for file_obj in files),
+            f"part_{part_id}_files.zip",
+        )
+        if response is None:
             return Response(
                 {"error": "No files found for this part"},
                 status=status.HTTP_404_NOT_FOUND
             )
-
-        # Create ZIP file in memory
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for file_obj in files:
-                if file_obj.file:
-                    try:
-                        # Read file content
-                        file_obj.file.open('rb')
-                        file_content = file_obj.file.read()
-                        file_obj.file.close()
-
-                        # Get filename - prefer display_name but ensure it has extension
-                        if file_obj.display_name:
-                            # Check if display_name already has an extension
-                            if os.path.splitext(file_obj.display_name)[1]:
-                                filename = file_obj.display_name
-                            else:
-                                # No extension in display_name, get it from the actual file
-                                _, ext = os.path.splitext(os.path.basename(file_obj.file.name))
-                                filename = file_obj.display_name + (ext if ext else '')
-                        else:
-                            # No display_name, use the actual file name
-                            filename = os.path.basename(file_obj.file.name)
-
-                        # Ensure unique filenames in ZIP
-                        zip_path = filename
-                        counter = 1
-                        while zip_path in zip_file.namelist():
-                            name, ext = os.path.splitext(filename)
-                            zip_path = f"{name}_{counter}{ext}"
-                            counter += 1
-
-                        zip_file.writestr(zip_path, file_content)
-
-                        # Increment download count
-                        file_obj.download_count += 1
-                        file_obj.save()
-                    except Exception as e:
-                        # Skip files that can't be read
-                        continue
-
-        zip_buffer.seek(0)
-        zip_data = zip_buffer.getvalue()
-        zip_buffer.close()
-
-        # Return bytes directly - BinaryFileRenderer will handle it
-        response = Response(
-            zip_data,
-            content_type='application/zip',
-            status=status.HTTP_200_OK
-        )
-        response['Content-Disposition'] = f'attachment; filename="part_{part_id}_files.zip"'
-        response['Content-Length'] = str(len(zip_data))
         return response
 
     except Part.DoesNotExist:
@@ -562,65 +512,16 @@ def download_files_from_assembly(request, assembly_id, **kwargs):
         if category:
             files = files.filter(file_category=category)
 
-        if not files.exists():
+        # Stream the ZIP file while it is written
+        response = streaming_zip_response(
+            (("", file_obj) for file_obj in files),
+            f"assembly_{assembly_id}_files.zip",
+        )
+        if response is None:
             return Response(
                 {"error": "No files found for this assembly"},
                 status=status.HTTP_404_NOT_FOUND
             )
-
-        # Create ZIP file in memory
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for file_obj in files:
-                if file_obj.file:
-                    try:
-                        # Read file content
-                        file_obj.file.open('rb')
-                        file_content = file_obj.file.read()
-                        file_obj.file.close()
-
-                        # Get filename - prefer display_name but ensure it has extension
-                        if file_obj.display_name:
-                            # Check if display_name already has an extension
-                            if os.path.splitext(file_obj.display_name)[1]:
-                                filename = file_obj.display_name
-                            else:
-                                # No extension in display_name, get it from the actual file
-                                _, ext = os.path.splitext(os.path.basename(file_obj.file.name))
-                                filename = file_obj.display_name + (ext if ext else '')
-                        else:
-                            # No display_name, use the actual file name
-                            filename = os.path.basename(file_obj.file.name)
-
-                        # Ensure unique filenames in ZIP
-                        zip_path = filename
-                        counter = 1
-                        while zip_path in zip_file.namelist():
-                            name, ext = os.path.splitext(filename)
-                            zip_path = f"{name}_{counter}{ext}"
-                            counter += 1
-
-                        zip_file.writestr(zip_path, file_content)
-
-                        # Increment download count
-                        file_obj.download_count += 1
-                        file_obj.save()
-                    except Exception as e:
-                        # Skip files that can't be read
-                        continue
-
-        zip_buffer.seek(0)
-        zip_data = zip_buffer.getvalue()
-        zip_buffer.close()
-
-        # Return bytes directly - BinaryFileRenderer will handle it
-        response = Response(
-            zip_data,
-            content_type='application/zip',
-            status=status.HTTP_200_OK
-        )
-        response['Content-Disposition'] = f'attachment; filename="assembly_{assembly_id}_files.zip"'
-        response['Content-Length'] = str(len(zip_data))
         return response
 
     except Assembly.DoesNotExist:
@@ -665,11 +566,7 @@ def download_files_from_assembly(request, assembly_id, **kwargs):
 @permission_classes([IsAuthenticated | APIAndProjectAccess])
 def download_assembly_production_zip_recursive_api(request, assembly_id, **kwargs):
     """Download all production files for an assembly and its entire BOM tree as a ZIP."""
-    from files.views import (
-        _get_production_files,
-        _add_files_to_zip,
-        _add_assembly_production_files_recursive,
-    )
+    from files.views import _production_file_entries
 
     try:
         assembly = Assembly.objects.get(pk=assembly_id)
@@ -683,30 +580,15 @@ def download_assembly_production_zip_recursive_api(request, assembly_id, **kwarg
 
         asm_name = assembly.full_part_number or f"ASM{assembly.part_number}"
 
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-            _add_assembly_production_files_recursive(
-                zip_file, assembly, asm_name, set()
-            )
-
-        zip_buffer.seek(0)
-        zip_data = zip_buffer.getvalue()
-        zip_buffer.close()
-
-        if len(zip_data) <= 22:
+        response = cached_zip_response(
+            _production_file_entries(assembly, asm_name),
+            f'{asm_name.replace(" ", "_")}_production_files.zip',
+        )
+        if response is None:
             return Response(
                 {"error": "No production files found in assembly or its BOM"},
                 status=status.HTTP_404_NOT_FOUND,
             )
-
-        safe_name = asm_name.replace(" ", "_")
-        response = Response(
-            zip_data,
-            content_type="application/zip",
-            status=status.HTTP_200_OK,
-        )
-        response["Content-Disposition"] = f'attachment; filename="{safe_name}_production_files.zip"'
-        response["Content-Length"] = str(len(zip_data))
         return response
 
     except Assembly.DoesNotExist:
@@ -780,65 +662,16 @@ def download_files_from_pcba(request, pcba_id, **kwargs):
         if category:
             files = files.filter(file_category=category)
 
-        if not files.exists():
+        # Stream the ZIP file while it is written
+        response = streaming_zip_response(
+            (("", file_obj) for file_obj in files),
+            f"pcba_{pcba_id}_files.zip",
+        )
+        if response is None:
             return Response(
                 {"error": "No files found for this PCBA"},
                 status=status.HTTP_404_NOT_FOUND
             )
-
-        # Create ZIP file in memory
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for file_obj in files:
-                if file_obj.file:
-                    try:
-                        # Read file content
-                        file_obj.file.open('rb')
-                        file_content = file_obj.file.read()
-                        file_obj.file.close()
-
-                        # Get filename - prefer display_name but ensure it has extension
-                        if file_obj.display_name:
-                            # Check if display_name already has an extension
-                            if os.path.splitext(file_obj.display_name)[1]:
-                                filename = file_obj.display_name
-                            else:
-                                # No extension in display_name, get it from the actual file
-                                _, ext = os.path.splitext(os.path.basename(file_obj.file.name))
-                                filename = file_obj.display_name + (ext if ext else '')
-                        else:
-                            # No display_name, use the actual file name
-                            filename = os.path.basename(file_obj.file.name)
-
-                        # Ensure unique filenames in ZIP
-                        zip_path = filename
-                        counter = 1
-                        while zip_path in zip_file.namelist():
-                            name, ext = os.path.splitext(filename)
-                            zip_path = f"{name}_{counter}{ext}"
-                            counter += 1
-
-                        zip_file.writestr(zip_path, file_content)
-
-                        # Increment download count
-                        file_obj.download_count += 1
-                        file_obj.save()
-                    except Exception as e:
-                        # Skip files that can't be read
-                        continue
-
-        zip_buffer.seek(0)
-        zip_data = zip_buffer.getvalue()
-        zip_buffer.close()
-
-        # Return bytes directly - BinaryFileRenderer will handle it
-        response = Response(
-            zip_data,
-            content_type='application/zip',
-            status=status.HTTP_200_OK
-        )
-        response['Content-Disposition'] = f'attachment; filename="pcba_{pcba_id}_files.zip"'
-        response['Content-Length'] = str(len(zip_data))
         return response
 
     except Pcba.DoesNotExist:
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:32
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+TABLE = "assemblies_assembly"
+
+# Weighted search document, see parts.search
+CREATE_TRIGGER = """
+CREATE OR REPLACE FUNCTION assemblies_assembly_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', coalesce(NEW.full_part_number, '') || ' ' || coalesce(NEW.external_part_number, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(NEW.display_name, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'D');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER assemblies_assembly_search_vector_trigger
+BEFORE INSERT OR UPDATE OF full_part_number, external_part_number, display_name, description ON assemblies_assembly
+FOR EACH ROW EXECUTE FUNCTION assemblies_assembly_search_vector_update();
+
+UPDATE assemblies_assembly SET full_part_number = full_part_number;
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS assemblies_assembly_search_vector_trigger ON assemblies_assembly;
+DROP FUNCTION IF EXISTS assemblies_assembly_search_vector_update();
+"""
+
+# Columns matched by substring, indexed for ILIKE and similarity where pg_trgm is available
+TRIGRAM_COLUMNS = ['full_part_number', 'display_name']
+
+
+def create_trigram_indexes(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            print(f"pg_trgm is not available, skipping trigram indexes on {TABLE}")
+            return
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for column in TRIGRAM_COLUMNS:
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {TABLE}_{column}_trgm "
+                f"ON {TABLE} USING gin ({column} gin_trgm_ops)"
+            )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for column in TRIGRAM_COLUMNS:
+            cursor.execute(f"DROP INDEX IF EXISTS {TABLE}_{column}_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assemblies', '0058_starredassembly'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assembly',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='assembly',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='assemblies_assembly_search_gin'),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assemblies', '0059_search_vector'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='assembly',
+            name='last_updated',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:57
+
+from django.db import migrations, models
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assemblies', '0060_index_last_updated'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assembly',
+            index=models.Index(django.db.models.functions.comparison.Collate(django.db.models.functions.text.Upper('full_part_number'), 'C'), name='assemblies_assembly_fpn_prefix'),
+        ),
+        migrations.AddIndex(
+            model_name='assembly',
+            index=models.Index(django.db.models.functions.comparison.Collate(django.db.models.functions.text.Upper('external_part_number'), 'C'), name='assemblies_assembly_epn_prefix'),
+        ),
+    ]
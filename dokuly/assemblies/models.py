@@ -2,11 +2,14 @@ from django.db import models
 from django.contrib.postgres.fields import ArrayField
 
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models.functions import Coalesce, Collate, Upper
 from profiles.models import Profile
 from projects.models import Project, Tag
 from files.models import Image
 from files.models import File
-from parts.models import PartType
+from parts.models import PartType, SearchVectorDeferredManager
 
 
 class Assembly(models.Model):
@@ -52,7 +55,7 @@ class Assembly(models.Model):
     project = models.ForeignKey(Project, on_delete=models.SET_NULL, null=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
-    last_updated = models.DateTimeField(auto_now=True)
+    last_updated = models.DateTimeField(auto_now=True, db_index=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
 
     # The model URL is intended to be used for link to fusion teams, or other online viewers.
@@ -127,6 +130,25 @@ class Assembly(models.Model):
     # DEPRECATED.  # TODO delete. The assembly BOMs reference to the assembly. Use that reference instead.
     bom_id = models.IntegerField(null=True, blank=True)
 
+    # Full-text search document, maintained by a database trigger on every insert and update.
+    # See parts.search.
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+
+    objects = SearchVectorDeferredManager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="assemblies_assembly_search_gin"),
+            # Case-insensitive prefix search of parts.autocomplete
+            models.Index(Collate(Upper("full_part_number"), "C"), name="assemblies_assembly_fpn_prefix"),
+            models.Index(Collate(Upper("external_part_number"), "C"), name="assemblies_assembly_epn_prefix"),
+            # Keyset pages of parts.release_items, sorted on the number in the "C" collation
+            models.Index(
+                Collate(Coalesce("full_part_number", models.Value("")), "C"), "id",
+                name="assemblies_asm_release_key", condition=~models.Q(is_archived=True),
+            ),
+        ]
+
 
 class StarredAssembly(models.Model):
     """Model for tracking starred assemblies.
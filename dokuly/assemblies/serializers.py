@@ -3,9 +3,10 @@ from assemblies.models import Assembly
 from documents.serializers import MarkdownTextSerializer
 from projects.serializers import ProjectTitleSerializer, TagSerializer
 from parts.serializers import PartTypeIconSerializer
+from organizations.fieldsets import SparseFieldsetMixin
 
 
-class AssemblySerializer(serializers.ModelSerializer):
+class AssemblySerializer(SparseFieldsetMixin, serializers.ModelSerializer):
 
     markdown_notes = MarkdownTextSerializer()
     tags = TagSerializer(many=True)
@@ -32,10 +33,10 @@ class AssemblySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Assembly
-        fields = '__all__'
+        exclude = ["search_vector"]
 
 
-class AssemblyTableSerializer(serializers.ModelSerializer):
+class AssemblyTableSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     tags = TagSerializer(many=True)
     part_type = PartTypeIconSerializer()
     is_starred = serializers.SerializerMethodField()
@@ -60,6 +61,7 @@ class AssemblyTableSerializer(serializers.ModelSerializer):
             "external_part_number",
             "is_starred"
         )
+        method_field_sources = {"is_starred": []}
 
     def get_is_starred(self, obj):
         """Check if the assembly is starred for the current user."""
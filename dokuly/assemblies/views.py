@@ -2,6 +2,9 @@ from assemblies.models import Assembly, StarredAssembly
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, renderer_classes, permission_classes
 from organizations.permissions import APIAndProjectAccess
+from organizations.fieldsets import InvalidFieldset, defer_unselected, get_fieldset
+from organizations.latest_revisions import update_latest_revisions
+from organizations.pagination import paginated_response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.renderers import JSONRenderer
 from rest_framework import status
@@ -217,6 +220,10 @@ def get_single_asm(request, pk, **kwargs):
         return Response(
             "No id sent with the request", status=status.HTTP_400_BAD_REQUEST
         )
+    try:
+        fieldset = get_fieldset(request, AssemblySerializer)
+    except InvalidFieldset as e:
+        return Response(str(e), status=status.HTTP_400_BAD_REQUEST)
     try:
         asm_queryset = (
             Assembly.objects.select_related("project", "project__customer", "markdown_notes", "thumbnail", "part_type")
@@ -225,7 +232,7 @@ def get_single_asm(request, pk, **kwargs):
         if APIAndProjectAccess.has_validated_key(request):
             # Here we have already checked if the user has access to the project, dont need to check again
             asm = get_object_or_404(asm_queryset, id=pk)
-            serializer = AssemblySerializer(asm, many=False, context={'request': request})
+            serializer = AssemblySerializer(asm, many=False, context={'request': request, 'fieldset': fieldset})
             return Response(serializer.data, status=status.HTTP_200_OK)
         else:
             asm = get_object_or_404(
@@ -243,7 +250,7 @@ def get_single_asm(request, pk, **kwargs):
                 asm.markdown_notes = markdown_notes
                 asm.save()
 
-            serializer = AssemblySerializer(asm, many=False, context={'request': request})
+            serializer = AssemblySerializer(asm, many=False, context={'request': request, 'fieldset': fieldset})
             return Response(serializer.data, status=status.HTTP_200_OK)
     except Assembly.DoesNotExist:
         return Response("ASM not found", status=status.HTTP_404_NOT_FOUND)
@@ -255,6 +262,10 @@ def get_single_asm(request, pk, **kwargs):
 def get_latest_revisions(request, **kwargs):
     """Fetch the latest revisions of all assemblies"""
     user = request.user
+    try:
+        fieldset = get_fieldset(request, AssemblyTableSerializer)
+    except InvalidFieldset as e:
+        return Response(str(e), status=status.HTTP_400_BAD_REQUEST)
     try:
         assemblies_query = Assembly.objects.filter(
             is_archived=False).exclude(is_latest_revision=False)
@@ -270,6 +281,7 @@ def get_latest_revisions(request, **kwargs):
             )
 
         assemblies_query = assemblies_query.select_related("project", "part_type").prefetch_related("tags")
+        assemblies_query = defer_unselected(assemblies_query, AssemblyTableSerializer, fieldset)
 
         # Get starred assemblies for the current user
 
@@ -280,10 +292,20 @@ def get_latest_revisions(request, **kwargs):
                 .values_list("assembly_id", flat=True)
             )
 
-        serializer = AssemblyTableSerializer(assemblies_query, many=True, context={
+        context = {
             'request': request,
-            'starred_assembly_ids': starred_assembly_ids
-        })
+            'starred_assembly_ids': starred_assembly_ids,
+            'fieldset': fieldset,
+        }
+        page = paginated_response(
+            request,
+            assemblies_query,
+            lambda items: AssemblyTableSerializer(items, many=True, context=context).data,
+        )
+        if page is not None:
+            return page
+
+        serializer = AssemblyTableSerializer(assemblies_query, many=True, context=context)
         return Response(serializer.data, status=status.HTTP_200_OK)
     except Exception as e:
         return Response(f"Error: {str(e)}", status=status.HTTP_404_NOT_FOUND)
@@ -942,29 +964,6 @@ def get_revisions(request, part_number):
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-def is_latest_revision(part_number, revision_count_major, revision_count_minor):
-    """Check if the current item is the latest revision."""
-    items = Assembly.objects.filter(
-        part_number=part_number).exclude(is_archived=True)
-
-    if len(items) == 1:
-        return True
-
-    for item in items:
-        # If any item has a higher major revision, this is not the latest
-        if item.revision_count_major > revision_count_major:
-            return False
-        # If any item has the same major but higher minor, this is not the latest
-        if item.revision_count_major == revision_count_major and item.revision_count_minor > revision_count_minor:
-            return False
-    return True
-
-
 def batch_process_is_latest_revision_by_part_number(part_number):
-    """This view runs through Parts and corrects the is_latest_revision field"""
-    items = Assembly.objects.filter(
-        part_number=part_number).exclude(is_archived=True)
-    for item in items:
-        item.is_latest_revision = is_latest_revision(
-            item.part_number, item.revision_count_major, item.revision_count_minor)
-        item.save()
+    """Correct the is_latest_revision field of all Assemblies with a part number."""
+    update_latest_revisions("assemblies", part_number=part_number)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class AssemblyBomConfig(AppConfig):
     name = 'assembly_bom'
+
+    def ready(self):
+        import assembly_bom.signals
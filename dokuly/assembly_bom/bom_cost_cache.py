@@ -0,0 +1,74 @@
+"""
+Cached BOM cost rollups.
+
+get_bom_cost stores its result per assembly / pcba in Bom_cost_cache. A cached rollup is
+dropped as soon as anything it was computed from changes:
+
+- Bom items: refresh_bom_explosion drops the rows of every rebuilt tree.
+- Prices: the Price signals drop the rows of every item using the priced item, found through
+  the where-used index of the Bom_explosion table.
+- Currency and conversion rates: every row stores a fingerprint of the rates it was computed
+  with, and is treated as stale when the organization's rates no longer match.
+"""
+
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+from assembly_bom.models import Bom_cost_cache, Bom_explosion
+from assembly_bom.bom_explosion import _descendant_q, _root_q, item_key
+
+
+def _hash(value):
+    encoded = json.dumps(value, cls=DjangoJSONEncoder, sort_keys=True)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def rates_fingerprint(currency, conversion_rates):
+    """Fingerprint of the currency settings a rollup is computed with."""
+    return _hash([currency, conversion_rates or {}])
+
+
+def get_cached_bom_cost(app, item_id, fingerprint):
+    """Cached rollup of an assembly or pcba, None if missing or computed with other rates.
+
+    Args:
+        app: "assemblies" or "pcbas"
+        item_id: ID of the root item
+        fingerprint: rates_fingerprint of the current organization settings
+    """
+    cached = Bom_cost_cache.objects.filter(_root_q([item_key(app, item_id)])).first()
+    if cached is None or cached.rates_fingerprint != fingerprint:
+        return None
+    return cached
+
+
+def store_bom_cost(app, item_id, fingerprint, data):
+    """Store a computed rollup, replacing any previous one. Returns the cache row."""
+    root = {"root_assembly_id": item_id} if app == "assemblies" else {"root_pcba_id": item_id}
+    cached, _ = Bom_cost_cache.objects.update_or_create(
+        **root,
+        defaults={"data": data, "rates_fingerprint": fingerprint, "etag": _hash(data)},
+    )
+    return cached
+
+
+def invalidate_bom_cost(keys):
+    """Drop the cached rollups of the given assemblies / pcbas."""
+    keys = [key for key in keys if key and not key.startswith("parts:")]
+    if keys:
+        Bom_cost_cache.objects.filter(_root_q(keys)).delete()
+
+
+def invalidate_bom_cost_using(keys):
+    """Drop the cached rollups of every assembly / pcba with any of the given items in its tree."""
+    keys = [key for key in keys if key]
+    if not keys:
+        return
+    roots = Bom_explosion.objects.filter(_descendant_q(keys))
+    Bom_cost_cache.objects.filter(
+        Q(root_assembly_id__in=roots.values("root_assembly_id"))
+        | Q(root_pcba_id__in=roots.values("root_pcba_id"))
+    ).delete()
@@ -0,0 +1,423 @@
+"""
+Materialized BOM explosion.
+
+Keeps the Bom_explosion table in sync with Bom_item, so that the fully exploded BOM tree of an
+assembly or PCBA can be read with a single indexed query instead of one query per BOM.
+
+Rows are rebuilt per root item. When a BOM changes, its owner and every item that has the owner
+somewhere in its tree are rebuilt. Unaffected sub-assemblies and PCBAs are not walked again,
+their already materialized rows are reused, so a refresh costs a fixed number of queries
+regardless of the depth of the tree.
+
+A refresh holds a transaction level advisory lock on every root it rebuilds or reuses, and reads
+the tree after taking them, so refreshes of overlapping trees are applied one after the other.
+
+Items are identified by keys on the form "<app>:<id>", e.g. "assemblies:12", "pcbas:4", "parts:7".
+"""
+
+import logging
+import threading
+
+from django.db import OperationalError, connection, transaction
+from django.db.models import Min, Q, Sum
+
+from assembly_bom.models import Assembly_bom, Bom_item, Bom_cost_cache, Bom_explosion, Bom_snapshot
+
+logger = logging.getLogger(__name__)
+
+BULK_BATCH_SIZE = 2000
+
+# First key of the advisory locks of refresh_bom_explosion, the second is the hashed item key.
+LOCK_NAMESPACE = 0x424F4D
+# Refreshes rolled back by a deadlock are attempted this many times.
+REFRESH_ATTEMPTS = 3
+
+# Keys scheduled for refresh when the current transaction commits.
+_pending = threading.local()
+
+
+def item_key(app, item_id):
+    """Key of a part, pcba or assembly, e.g. item_key("assemblies", 12) -> "assemblies:12"."""
+    return f"{app}:{item_id}"
+
+
+def parse_item_key(key):
+    """Inverse of item_key, "assemblies:12" -> ("assemblies", 12)."""
+    app, item_id = key.split(":")
+    return app, int(item_id)
+
+
+def child_path(row):
+    """Path of the items found in the BOM of the item in an exploded row."""
+    key = bom_item_key(row.part_id, row.pcba_id, row.assembly_id)
+    return f"{row.path}/{key}" if row.path else key
+
+
+def bom_item_key(part_id, pcba_id, assembly_id):
+    """Key of the item linked on a bom item, None for unmatched items."""
+    if part_id:
+        return item_key("parts", part_id)
+    if pcba_id:
+        return item_key("pcbas", pcba_id)
+    if assembly_id:
+        return item_key("assemblies", assembly_id)
+    return None
+
+
+def _owner_key(assembly_id, pcba_id):
+    if assembly_id:
+        return item_key("assemblies", assembly_id)
+    if pcba_id:
+        return item_key("pcbas", pcba_id)
+    return None
+
+
+def bom_owner_key(bom):
+    """Key of the assembly or pcba owning an Assembly_bom."""
+    if bom is None:
+        return None
+    return _owner_key(bom.assembly_id, bom.pcba_id)
+
+
+def bom_owner_key_by_id(bom_id):
+    """Like bom_owner_key, but memoized until the pending refresh runs.
+
+    Used by the Bom_item signals, where a bulk delete would otherwise look up the same BOM
+    once for every deleted item.
+    """
+    if bom_id is None:
+        return None
+    owners = _pending_state().bom_owners
+    if bom_id not in owners:
+        owners[bom_id] = bom_owner_key(Assembly_bom.objects.filter(id=bom_id).first())
+    return owners[bom_id]
+
+
+def _ids_by_app(keys):
+    ids = {"parts": [], "pcbas": [], "assemblies": []}
+    for key in keys:
+        app, item_id = parse_item_key(key)
+        ids[app].append(item_id)
+    return ids
+
+
+def _root_q(keys):
+    ids = _ids_by_app(keys)
+    return Q(root_assembly_id__in=ids["assemblies"]) | Q(root_pcba_id__in=ids["pcbas"])
+
+
+def _descendant_q(keys):
+    ids = _ids_by_app(keys)
+    return (
+        Q(part_id__in=ids["parts"])
+        | Q(pcba_id__in=ids["pcbas"])
+        | Q(assembly_id__in=ids["assemblies"])
+    )
+
+
+def get_bom_explosion(app, item_id):
+    """All exploded rows of an assembly or pcba, with the bom items and linked items selected.
+
+    Rows are ordered by depth, so parents always come before their children.
+
+    Args:
+        app: "assemblies" or "pcbas"
+        item_id: ID of the root item
+    """
+    if app == "assemblies":
+        rows = Bom_explosion.objects.filter(root_assembly_id=item_id)
+    elif app == "pcbas":
+        rows = Bom_explosion.objects.filter(root_pcba_id=item_id)
+    else:
+        return Bom_explosion.objects.none()
+    return rows.select_related("bom_item", "part", "pcba", "assembly").order_by("depth", "bom_item_id")
+
+
+def get_where_used(app, item_ids, max_depth=None):
+    """Every assembly and pcba using any of the given items, at any level of their BOM.
+
+    The exploded rows are found through the descendant indexes, so the full set of ancestors is
+    read with a single query, however deep the items are used.
+
+    Args:
+        app: "parts", "pcbas" or "assemblies"
+        item_ids: IDs of the used items
+        max_depth: Only include ancestors using the items within this many levels, 1 for direct parents
+
+    Returns:
+        Values queryset with one row per (ancestor, used item), with the fields root_assembly_id,
+        root_pcba_id, part_id, pcba_id, assembly_id, total_quantity (quantity per ancestor, summed
+        over all paths) and min_depth (the highest level the item is used at).
+    """
+    rows = Bom_explosion.objects.filter(
+        _descendant_q([item_key(app, item_id) for item_id in item_ids])
+    )
+    if max_depth is not None:
+        rows = rows.filter(depth__lte=max_depth)
+    return (
+        rows.values("root_assembly_id", "root_pcba_id", "part_id", "pcba_id", "assembly_id")
+        .annotate(total_quantity=Sum("quantity"), min_depth=Min("depth"))
+        .order_by()
+    )
+
+
+def group_by_path(rows):
+    """Group exploded rows by path, i.e. by the BOM they are found in.
+
+    The items of the root BOM are found under "", the items of any other BOM in the tree
+    under child_path(<row of the item owning that BOM>).
+    """
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row.path, []).append(row)
+    return grouped
+
+
+def explode_boms(edges, materialized=None):
+    """Explode BOMs in memory.
+
+    Args:
+        edges: {owner_key: [(bom_item_id, child_key, quantity, is_mounted), ...]} for every
+            root to explode.
+        materialized: {item_key: [row, ...]} of already exploded items that are used in, but
+            not part of, the roots to explode.
+
+    Returns:
+        {owner_key: [(bom_item_id, child_key, path, depth, quantity, is_mounted), ...]}
+    """
+    if materialized is None:
+        materialized = {}
+    exploded = {}
+
+    def explode(root_key, stack):
+        if root_key in exploded:
+            return exploded[root_key]
+        stack.add(root_key)
+        rows = []
+        for bom_item_id, child_key, quantity, is_mounted in edges.get(root_key, []):
+            rows.append((bom_item_id, child_key, "", 1, quantity, is_mounted))
+            if child_key.startswith("parts:"):
+                continue
+            if child_key in stack:
+                logger.warning(f"Circular BOM reference {root_key} -> {child_key}")
+                continue
+
+            if child_key in edges:
+                sub_rows = explode(child_key, stack)
+            else:
+                sub_rows = materialized.get(child_key, [])
+
+            for sub_bom_item_id, sub_key, sub_path, sub_depth, sub_quantity, sub_mounted in sub_rows:
+                path = f"{child_key}/{sub_path}" if sub_path else child_key
+                if root_key in path.split("/"):
+                    continue
+                rows.append(
+                    (
+                        sub_bom_item_id,
+                        sub_key,
+                        path,
+                        sub_depth + 1,
+                        quantity * sub_quantity,
+                        sub_mounted,
+                    )
+                )
+        stack.discard(root_key)
+        exploded[root_key] = rows
+        return rows
+
+    for root_key in edges:
+        explode(root_key, set())
+    return exploded
+
+
+def _load_bom_edges(owner_keys):
+    """Direct BOM lines of the given assemblies and pcbas, see explode_boms."""
+    ids = _ids_by_app(owner_keys)
+    edges = {key: [] for key in owner_keys}
+
+    boms = (
+        Assembly_bom.objects.filter(
+            Q(assembly_id__in=ids["assemblies"]) | Q(pcba_id__in=ids["pcbas"])
+        )
+        .order_by("id")
+        .values_list("id", "assembly_id", "pcba_id")
+    )
+    bom_owner = {}
+    owners_found = set()
+    for bom_id, assembly_id, pcba_id in boms:
+        owner = _owner_key(assembly_id, pcba_id)
+        # Use the first BOM of an item, like Assembly_bom.objects.filter(...).first()
+        if owner in edges and owner not in owners_found:
+            bom_owner[bom_id] = owner
+            owners_found.add(owner)
+
+    items = (
+        Bom_item.objects.filter(bom_id__in=list(bom_owner.keys()))
+        .order_by("id")
+        .values_list("id", "bom_id", "part_id", "pcba_id", "assembly_id", "quantity", "is_mounted")
+    )
+    for bom_item_id, bom_id, part_id, pcba_id, assembly_id, quantity, is_mounted in items:
+        child_key = bom_item_key(part_id, pcba_id, assembly_id)
+        if child_key is None:
+            continue  # Unmatched items are not part of the tree
+        edges[bom_owner[bom_id]].append((bom_item_id, child_key, quantity, is_mounted))
+    return edges
+
+
+def _load_materialized(keys):
+    materialized = {}
+    if not keys:
+        return materialized
+    rows = Bom_explosion.objects.filter(_root_q(keys)).values_list(
+        "root_assembly_id", "root_pcba_id", "bom_item_id", "part_id", "pcba_id",
+        "assembly_id", "path", "depth", "quantity", "is_mounted",
+    )
+    for root_assembly_id, root_pcba_id, bom_item_id, part_id, pcba_id, assembly_id, path, depth, quantity, is_mounted in rows:
+        materialized.setdefault(_owner_key(root_assembly_id, root_pcba_id), []).append(
+            (bom_item_id, bom_item_key(part_id, pcba_id, assembly_id), path, depth, quantity, is_mounted)
+        )
+    return materialized
+
+
+def _to_explosion_row(root_key, row):
+    bom_item_id, child_key, path, depth, quantity, is_mounted = row
+    root_app, root_id = parse_item_key(root_key)
+    child_app, child_id = parse_item_key(child_key)
+    return Bom_explosion(
+        root_assembly_id=root_id if root_app == "assemblies" else None,
+        root_pcba_id=root_id if root_app == "pcbas" else None,
+        bom_item_id=bom_item_id,
+        part_id=child_id if child_app == "parts" else None,
+        pcba_id=child_id if child_app == "pcbas" else None,
+        assembly_id=child_id if child_app == "assemblies" else None,
+        path=path,
+        depth=depth,
+        quantity=quantity,
+        is_mounted=is_mounted,
+    )
+
+
+def _lock_roots(keys):
+    """Lock the exploded BOMs of the given items until the current transaction ends."""
+    with connection.cursor() as cursor:
+        # Taken in key order, so refreshes locking the same roots queue instead of deadlocking
+        cursor.execute(
+            "SELECT pg_advisory_xact_lock(%s, hashtext(key)) FROM unnest(%s::text[]) AS key",
+            [LOCK_NAMESPACE, sorted(keys)],
+        )
+
+
+def _read_trees(keys):
+    """Roots to rebuild for a change of keys, their BOM lines, and the reused sub-items."""
+    ancestors = Bom_explosion.objects.filter(_descendant_q(keys)).values_list(
+        "root_assembly_id", "root_pcba_id"
+    ).distinct()
+    affected = set(keys)
+    for root_assembly_id, root_pcba_id in ancestors:
+        affected.add(_owner_key(root_assembly_id, root_pcba_id))
+
+    edges = _load_bom_edges(affected)
+    unaffected_children = {
+        child_key
+        for rows in edges.values()
+        for _, child_key, _, _ in rows
+        if not child_key.startswith("parts:") and child_key not in affected
+    }
+    return affected, edges, unaffected_children
+
+
+def _is_deadlock(error):
+    return getattr(error.__cause__, "pgcode", None) == "40P01"
+
+
+def refresh_bom_explosion(keys):
+    """Rebuild the exploded BOM of the given assemblies / pcbas, and of every item using them."""
+    keys = {key for key in keys if key and not key.startswith("parts:")}
+    if not keys:
+        return
+
+    for attempt in range(REFRESH_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                _refresh_locked(keys)
+            return
+        except OperationalError as error:
+            if attempt == REFRESH_ATTEMPTS - 1 or not _is_deadlock(error):
+                raise
+            logger.warning(f"BOM explosion refresh of {sorted(keys)} deadlocked, retrying")
+
+
+def _refresh_locked(keys):
+    # Lock every root that is rebuilt or reused, then read the trees again. A refresh committed
+    # while waiting may have moved items, which then have to be locked too.
+    locked = set()
+    while True:
+        affected, edges, unaffected_children = _read_trees(keys)
+        missing = (affected | unaffected_children) - locked
+        if not missing:
+            break
+        _lock_roots(missing)
+        locked |= missing
+
+    exploded = explode_boms(edges, _load_materialized(unaffected_children))
+
+    # Cost rollups of the rebuilt trees are computed from the old BOM
+    Bom_cost_cache.objects.filter(_root_q(affected)).delete()
+    # Released BOMs should not change, if one did its snapshot is rewritten on the next save
+    Bom_snapshot.objects.filter(_root_q(keys)).delete()
+    Bom_explosion.objects.filter(_root_q(affected)).delete()
+    Bom_explosion.objects.bulk_create(
+        [
+            _to_explosion_row(root_key, row)
+            for root_key, rows in exploded.items()
+            for row in rows
+        ],
+        batch_size=BULK_BATCH_SIZE,
+    )
+
+
+def _pending_state():
+    """Pending refresh of the current transaction, started on first use.
+
+    A rolled back transaction discards its on_commit callbacks but leaves _pending as it was, so
+    the state is only kept while its own flush is registered in the current transaction.
+    """
+    flush = getattr(_pending, "flush", None)
+    if flush is None or not any(func is flush for _, func, _ in connection.run_on_commit):
+        _pending.keys = set()
+        _pending.bom_owners = {}
+        _pending.flush = None
+        if connection.in_atomic_block:
+            # A function of its own, the callbacks of earlier transactions are not mistaken for it
+            def flush():
+                _flush_pending_refresh()
+
+            _pending.flush = flush
+            transaction.on_commit(flush)
+    return _pending
+
+
+def _flush_pending_refresh():
+    keys = getattr(_pending, "keys", None)
+    _pending.keys = None
+    _pending.bom_owners = None
+    _pending.flush = None
+    if keys:
+        refresh_bom_explosion(keys)
+
+
+def schedule_bom_explosion_refresh(keys):
+    """Refresh the exploded BOM of the given items once the current transaction commits.
+
+    Changes made in the same transaction are refreshed together, so bulk edits of a BOM
+    only rebuild the affected trees once. Outside a transaction the refresh runs right away.
+    """
+    keys = {key for key in keys if key}
+    if not keys:
+        return
+    if not transaction.get_connection().in_atomic_block:
+        _pending.bom_owners = None
+        refresh_bom_explosion(keys)
+        return
+
+    _pending_state().keys.update(keys)
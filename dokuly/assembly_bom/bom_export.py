@@ -0,0 +1,291 @@
+"""
+Streaming multi-level BOM export.
+
+The BOM tree is walked one level at a time. Every level is read with a single query joining the
+bom items with their linked items and latest prices, and is consumed through a server side cursor.
+Rows are yielded as they are produced, so only the sub-assemblies and PCBAs of the current level
+are held in memory, never the exported rows themselves.
+
+Rows are written as CSV, XLSX or NDJSON by the iter_* functions, which are meant to be passed
+directly to a StreamingHttpResponse.
+"""
+
+import csv
+import json
+import logging
+import re
+import zipfile
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import OuterRef, Q, Subquery
+
+from assemblies.models import Assembly
+from pcbas.models import Pcba
+from purchasing.priceModel import Price
+from assembly_bom.models import Assembly_bom, Bom_item
+from assembly_bom.bom_explosion import _ids_by_app, _owner_key, bom_item_key, item_key
+from files.zip_stream import ZipStream
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip from the server side cursor.
+CHUNK_SIZE = 2000
+# Guards against runaway exports of very deep or corrupt trees.
+MAX_DEPTH = 50
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "ndjson": "application/x-ndjson",
+}
+
+COLUMNS = [
+    "level",
+    "path",
+    "parent",
+    "designator",
+    "item_type",
+    "full_part_number",
+    "display_name",
+    "mpn",
+    "manufacturer",
+    "quantity",
+    "total_quantity",
+    "is_mounted",
+    "unit_price",
+    "currency",
+    "comment",
+]
+
+ITEM_TYPES = {"parts": "part", "pcbas": "pcba", "assemblies": "assembly"}
+
+
+def _root_full_part_number(app, item_id):
+    model = Assembly if app == "assemblies" else Pcba
+    return model.objects.filter(id=item_id).values_list("full_part_number", flat=True).first() or ""
+
+
+def _first_boms(owner_keys):
+    """{bom_id: owner_key} for the first BOM of each owner, like Assembly_bom.objects.filter(...).first()"""
+    ids = _ids_by_app(owner_keys)
+    boms = (
+        Assembly_bom.objects.filter(Q(assembly_id__in=ids["assemblies"]) | Q(pcba_id__in=ids["pcbas"]))
+        .order_by("id")
+        .values_list("id", "assembly_id", "pcba_id")
+    )
+    bom_owner = {}
+    owners_found = set()
+    for bom_id, assembly_id, pcba_id in boms:
+        owner = _owner_key(assembly_id, pcba_id)
+        if owner not in owners_found:
+            bom_owner[bom_id] = owner
+            owners_found.add(owner)
+    return bom_owner
+
+
+def _level_lines(bom_ids):
+    """All lines of the given BOMs, joined with the linked items and their lowest MOQ latest price."""
+    latest_price = (
+        Price.objects.filter(is_latest_price=True)
+        .filter(
+            Q(part_id=OuterRef("part_id"))
+            | Q(pcba_id=OuterRef("pcba_id"))
+            | Q(assembly_id=OuterRef("assembly_id"))
+        )
+        .order_by("minimum_order_quantity", "price")
+    )
+    return (
+        Bom_item.objects.filter(bom_id__in=bom_ids)
+        .annotate(
+            unit_price=Subquery(latest_price.values("price")[:1]),
+            price_currency=Subquery(latest_price.values("currency")[:1]),
+        )
+        .order_by("bom_id", "id")
+        .values(
+            "bom_id", "designator", "quantity", "is_mounted", "comment",
+            "temporary_mpn", "temporary_manufacturer",
+            "part_id", "pcba_id", "assembly_id",
+            "part__full_part_number", "part__display_name", "part__mpn", "part__manufacturer",
+            "pcba__full_part_number", "pcba__display_name",
+            "assembly__full_part_number", "assembly__display_name",
+            "unit_price", "price_currency",
+        )
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+
+def iter_bom_export_rows(app, item_id, max_depth=MAX_DEPTH):
+    """Yield one dict per line of the fully exploded BOM of an assembly or pcba, keyed by COLUMNS.
+
+    A sub-assembly used in several places is exported once for every place it is used, with
+    total_quantity being the quantity per root item along that path.
+    Unmatched lines are exported with their temporary MPN and manufacturer.
+
+    Args:
+        app: "assemblies" or "pcbas"
+        item_id: ID of the root item
+        max_depth: Number of BOM levels to export
+    """
+    root_key = item_key(app, item_id)
+    # Every place the owners of the current level are used: (keys along the path, full part numbers along the path, quantity per root)
+    occurrences = {root_key: [((root_key,), (_root_full_part_number(app, item_id),), 1.0)]}
+
+    level = 1
+    while occurrences and level <= max_depth:
+        bom_owner = _first_boms(occurrences.keys())
+        next_occurrences = {}
+
+        for line in _level_lines(list(bom_owner.keys())):
+            child_key = bom_item_key(line["part_id"], line["pcba_id"], line["assembly_id"])
+            child_app = child_key.split(":")[0] if child_key else None
+            if child_app == "parts":
+                full_part_number = line["part__full_part_number"]
+                display_name = line["part__display_name"]
+                mpn = line["part__mpn"]
+                manufacturer = line["part__manufacturer"]
+            elif child_app == "pcbas":
+                full_part_number = line["pcba__full_part_number"]
+                display_name = line["pcba__display_name"]
+                mpn, manufacturer = "", ""
+            elif child_app == "assemblies":
+                full_part_number = line["assembly__full_part_number"]
+                display_name = line["assembly__display_name"]
+                mpn, manufacturer = "", ""
+            else:
+                full_part_number, display_name = "", ""
+                mpn = line["temporary_mpn"]
+                manufacturer = line["temporary_manufacturer"]
+
+            quantity = line["quantity"]
+            for path_keys, path_numbers, multiplier in occurrences[bom_owner[line["bom_id"]]]:
+                total_quantity = multiplier * quantity
+                yield {
+                    "level": level,
+                    "path": "/".join(path_numbers),
+                    "parent": path_numbers[-1],
+                    "designator": line["designator"] or "",
+                    "item_type": ITEM_TYPES.get(child_app, ""),
+                    "full_part_number": full_part_number or "",
+                    "display_name": display_name or "",
+                    "mpn": mpn or "",
+                    "manufacturer": manufacturer or "",
+                    "quantity": quantity,
+                    "total_quantity": total_quantity,
+                    "is_mounted": line["is_mounted"],
+                    "unit_price": line["unit_price"],
+                    "currency": line["price_currency"] or "",
+                    "comment": line["comment"] or "",
+                }
+
+                if child_app not in ("pcbas", "assemblies"):
+                    continue
+                if child_key in path_keys:
+                    logger.warning(f"Circular BOM reference {path_keys[-1]} -> {child_key}")
+                    continue
+                next_occurrences.setdefault(child_key, []).append(
+                    (path_keys + (child_key,), path_numbers + (full_part_number or "",), total_quantity)
+                )
+
+        occurrences = next_occurrences
+        level += 1
+
+
+class _Echo:
+    """File-like object returning what is written, lets csv.writer produce single lines."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(COLUMNS)
+    for row in rows:
+        yield writer.writerow([row[column] for column in COLUMNS])
+
+
+def iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+
+
+_XLSX_STATIC_PARTS = [
+    (
+        "[Content_Types].xml",
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        "</Types>",
+    ),
+    (
+        "_rels/.rels",
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        "</Relationships>",
+    ),
+    (
+        "xl/workbook.xml",
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="BOM" sheetId="1" r:id="rId1"/></sheets>'
+        "</workbook>",
+    ),
+    (
+        "xl/_rels/workbook.xml.rels",
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        "</Relationships>",
+    ),
+]
+
+# Characters not allowed in XML 1.0
+_ILLEGAL_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _xlsx_cell(value):
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if value is None:
+        return "<c/>"
+    if isinstance(value, (int, float, Decimal)):
+        return f"<c><v>{value}</v></c>"
+    text = escape(_ILLEGAL_XML_CHARS.sub("", str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return ("<row>" + "".join(_xlsx_cell(value) for value in values) + "</row>").encode("utf-8")
+
+
+def iter_xlsx(rows):
+    """Minimal single sheet workbook, with the sheet compressed and sent while it is written."""
+    stream = ZipStream()
+    with zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED) as workbook:
+        for name, content in _XLSX_STATIC_PARTS:
+            workbook.writestr(name, content)
+        yield stream.pop()
+
+        with workbook.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(_xlsx_row(COLUMNS))
+            for row in rows:
+                sheet.write(_xlsx_row([row[column] for column in COLUMNS]))
+                chunk = stream.pop()
+                if chunk:
+                    yield chunk
+            sheet.write(b"</sheetData></worksheet>")
+    yield stream.pop()
+
+
+EXPORT_WRITERS = {"csv": iter_csv, "xlsx": iter_xlsx, "ndjson": iter_ndjson}
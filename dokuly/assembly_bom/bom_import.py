@@ -0,0 +1,140 @@
+"""
+Streaming import of BOM CSV files.
+
+Uploads are parsed row by row straight from the uploaded file, and written in fixed size batches,
+so memory use does not grow with the size of the BOM. Each batch is matched against parts,
+assemblies and PCBAs with match_bom_items before it is inserted.
+
+The encoding and delimiter of the file are detected from its first bytes, which covers the
+UTF-8 / UTF-16 exports of CAD tools as well as semicolon separated Excel exports in Windows-1252.
+"""
+
+import codecs
+import csv
+import io
+
+from assembly_bom.models import Bom_item
+from assembly_bom.bom_matching import match_bom_items
+
+BATCH_SIZE = 2000
+SAMPLE_SIZE = 64 * 1024
+DELIMITERS = [",", ";", "\t", "|"]
+
+
+def detect_encoding(sample):
+    """Encoding of a file from its first bytes."""
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if sample.startswith(codecs.BOM_UTF16_LE) or sample.startswith(codecs.BOM_UTF16_BE):
+        return "utf-16"
+    try:
+        # final=False, the sample may end in the middle of a multibyte character
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    try:
+        sample.decode("cp1252")
+        return "cp1252"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+
+def detect_delimiter(header_line):
+    """The most frequent of the supported delimiters in the header line, "," if none is found."""
+    counts = {delimiter: header_line.count(delimiter) for delimiter in DELIMITERS}
+    delimiter = max(DELIMITERS, key=lambda d: counts[d])
+    return delimiter if counts[delimiter] else ","
+
+
+def iter_csv_rows(upload):
+    """Yield the rows of an uploaded CSV file as dicts, reading the file incrementally.
+
+    Args:
+        upload: UploadedFile, or any binary file-like object
+    """
+    upload.seek(0)
+    sample = upload.read(SAMPLE_SIZE)
+    upload.seek(0)
+
+    encoding = detect_encoding(sample)
+    lines = sample.decode(encoding, errors="ignore").splitlines()
+    delimiter = detect_delimiter(lines[0] if lines else "")
+
+    # UploadedFile proxies its underlying file, wrap that directly
+    text = io.TextIOWrapper(
+        getattr(upload, "file", upload), encoding=encoding, errors="replace", newline=""
+    )
+    try:
+        reader = csv.DictReader(text, delimiter=delimiter)
+        if reader.fieldnames:
+            reader.fieldnames = [name.strip() for name in reader.fieldnames]
+        for row in reader:
+            yield row
+    finally:
+        # Leave the upload open, it is closed with the request
+        text.detach()
+
+
+def bom_item_from_row(bom, row):
+    """Unsaved Bom_item from a CSV row with the columns Reference, MPN, QUANTITY and DNP."""
+    designator = (row.get("Reference") or "").strip()
+    temporary_mpn = (row.get("MPN") or "").strip() or None
+    quantity_str = (row.get("QUANTITY") or "1").strip()
+    try:
+        quantity = float(quantity_str) if quantity_str else 1.0
+    except (ValueError, TypeError):
+        quantity = 1.0
+    dnp = (row.get("DNP") or "").strip()
+    return Bom_item(
+        bom=bom,
+        designator=designator,
+        quantity=quantity,
+        temporary_mpn=temporary_mpn,
+        is_mounted=not bool(dnp),  # If DNP field is empty, is_mounted is True
+    )
+
+
+def import_bom_rows(bom, rows, batch_size=BATCH_SIZE):
+    """Replace the items of a BOM with the given CSV rows, matched and inserted in batches.
+
+    Must be called inside a transaction. Existing items are only deleted once the first row
+    has been read, so an empty file leaves the BOM untouched.
+
+    Returns:
+        Number of imported items, 0 if there were no rows.
+    """
+    rows = iter(rows)
+    first_row = next(rows, None)
+    if first_row is None:
+        return 0
+
+    _delete_bom_items(bom, batch_size)
+
+    imported = 0
+    batch = [bom_item_from_row(bom, first_row)]
+    for row in rows:
+        if len(batch) >= batch_size:
+            imported += _insert_batch(batch)
+            batch = []
+        batch.append(bom_item_from_row(bom, row))
+    imported += _insert_batch(batch)
+    return imported
+
+
+def _delete_bom_items(bom, batch_size):
+    """Delete the items of a BOM a batch at a time.
+
+    Bom_item has delete signals, so a single delete() would load every item into memory at once.
+    """
+    while True:
+        ids = list(Bom_item.objects.filter(bom=bom).values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return
+        Bom_item.objects.filter(id__in=ids).delete()
+
+
+def _insert_batch(batch):
+    match_bom_items(batch)
+    Bom_item.objects.bulk_create(batch)
+    return len(batch)
@@ -0,0 +1,158 @@
+"""
+Set based matching of imported BOM lines.
+
+Imported lines only carry a temporary MPN. match_bom_items resolves all of them with one query
+per candidate model, instead of up to four queries per line.
+A temporary MPN is matched, in order of precedence, against:
+
+1. Part.full_part_number
+2. Assembly.full_part_number
+3. Pcba.full_part_number
+4. Part.mpn of the latest revision
+
+Lines still unmatched after that can be given ranked candidates with rank_mpn_candidates, which
+compares normalized MPNs by trigram similarity.
+"""
+
+from django.db import connection
+from django.db.models import Q
+
+from assemblies.models import Assembly
+from parts.models import Part
+from parts.mpn import has_trigram_extension, normalize_mpn
+from pcbas.models import Pcba
+
+CANDIDATE_FIELDS = ["id", "full_part_number", "display_name", "mpn", "manufacturer"]
+
+
+def _first_by(queryset, field, values):
+    """{value: first object by id} for objects with field in values."""
+    if not values:
+        return {}
+    matches = {}
+    for obj in queryset.filter(**{f"{field}__in": values}).only("id", "full_part_number", field).order_by("id"):
+        matches.setdefault(getattr(obj, field), obj)
+    return matches
+
+
+def match_bom_items(bom_items):
+    """Link unmatched bom items to a part, assembly or pcba by their temporary MPN.
+
+    The bom items are updated in memory, saving them is left to the caller, e.g. with bulk_update.
+
+    Args:
+        bom_items: Iterable of Bom_item
+
+    Returns:
+        List of (bom_item, full_part_number of the linked item) for every newly matched item.
+    """
+    unmatched = [
+        bom_item
+        for bom_item in bom_items
+        if not (bom_item.part_id or bom_item.assembly_id or bom_item.pcba_id)
+        and bom_item.temporary_mpn is not None
+    ]
+    remaining = {bom_item.temporary_mpn for bom_item in unmatched}
+
+    # Each lookup only asks for the MPNs not matched by a previous one
+    candidates = []
+    for queryset, field, attribute in [
+        (Part.objects.all(), "full_part_number", "part"),
+        (Assembly.objects.all(), "full_part_number", "assembly"),
+        (Pcba.objects.all(), "full_part_number", "pcba"),
+        (Part.objects.filter(is_latest_revision=True), "mpn", "part"),
+    ]:
+        matches = _first_by(queryset, field, remaining)
+        candidates.append((attribute, matches))
+        remaining -= matches.keys()
+
+    matched = []
+    for bom_item in unmatched:
+        for attribute, matches in candidates:
+            match = matches.get(bom_item.temporary_mpn)
+            if match is not None:
+                setattr(bom_item, attribute, match)
+                matched.append((bom_item, match.full_part_number or ""))
+                break
+    return matched
+
+
+def _trigram_candidates(lines, limit):
+    """One query ranking the latest part revisions by similarity for every line."""
+    columns = ", ".join(f"p.{field}" for field in CANDIDATE_FIELDS)
+    candidate_columns = ", ".join(CANDIDATE_FIELDS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT q.line_id, {columns}, p.score
+            FROM unnest(%s::integer[], %s::text[]) AS q(line_id, normalized)
+            CROSS JOIN LATERAL (
+                SELECT {candidate_columns}, similarity(normalized_mpn, q.normalized) AS score
+                FROM {Part._meta.db_table}
+                WHERE is_latest_revision
+                  AND is_archived IS NOT TRUE
+                  AND normalized_mpn %% q.normalized
+                ORDER BY score DESC, id
+                LIMIT %s
+            ) AS p
+            ORDER BY q.line_id, p.score DESC, p.id
+            """,
+            [list(lines.keys()), list(lines.values()), limit],
+        )
+        for row in cursor.fetchall():
+            yield row[0], dict(zip(CANDIDATE_FIELDS, row[1:-1]), similarity=row[-1])
+
+
+def _exact_candidates(lines, limit):
+    """Fallback without pg_trgm, exact matches of the normalized MPN."""
+    lines_by_mpn = {}
+    for line_id, normalized in lines.items():
+        lines_by_mpn.setdefault(normalized, []).append(line_id)
+    parts = (
+        Part.objects.filter(
+            Q(is_archived=False) | Q(is_archived=None),
+            is_latest_revision=True,
+            normalized_mpn__in=lines_by_mpn.keys(),
+        )
+        .order_by("id")
+        .values("normalized_mpn", *CANDIDATE_FIELDS)
+    )
+    for part in parts:
+        for line_id in lines_by_mpn[part.pop("normalized_mpn")]:
+            yield line_id, dict(part, similarity=1.0)
+
+
+def rank_mpn_candidates(bom_items, limit=5):
+    """Ranked part candidates for every unmatched bom item, resolved for the whole BOM at once.
+
+    Candidates are latest, non archived part revisions whose normalized MPN is similar to the
+    normalized temporary MPN of the line, best match first.
+
+    Args:
+        bom_items: Iterable of Bom_item
+        limit: Maximum number of candidates per line
+
+    Returns:
+        {bom_item_id: [{"id", "full_part_number", "display_name", "mpn", "manufacturer", "similarity"}, ...]}
+        with an entry for every unmatched line with a temporary MPN.
+    """
+    lines = {}
+    for bom_item in bom_items:
+        if bom_item.part_id or bom_item.assembly_id or bom_item.pcba_id:
+            continue
+        normalized = normalize_mpn(bom_item.temporary_mpn)
+        if normalized:
+            lines[bom_item.id] = normalized
+
+    candidates = {line_id: [] for line_id in lines}
+    if not lines:
+        return candidates
+
+    if has_trigram_extension():
+        ranked = _trigram_candidates(lines, limit)
+    else:
+        ranked = _exact_candidates(lines, limit)
+    for line_id, candidate in ranked:
+        if len(candidates[line_id]) < limit:
+            candidates[line_id].append(candidate)
+    return candidates
@@ -0,0 +1,226 @@
+"""
+Frozen BOM snapshots of released assemblies and PCBAs.
+
+A released item can no longer change, so its BOM is written once, when it is released, as a
+compressed Bom_snapshot holding:
+
+- data: the response of get_bom_items_with_linked_parts (bom, bom_items, parts, asms, pcbas),
+  with the linked items unfiltered by project, and project_ids to filter them per user on read.
+- export_data: the rows of the multi-level BOM export, as NDJSON. It is read from the database
+  and decompressed a chunk at a time, so released exports are streamed like live ones.
+
+Reads of released BOMs decompress the snapshot instead of joining Bom_item, Part, Pcba, Assembly
+and Price. The snapshot is dropped if the item is taken out of the released state. Items released
+before snapshots existed are snapshotted the next time they are saved, until then they are read
+from the live tables.
+"""
+
+import hashlib
+import json
+import zlib
+from decimal import Decimal
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Subquery
+from django.db.models.functions import Length, Substr
+
+from assemblies.models import Assembly
+from assembly_bom.models import Assembly_bom, Bom_item, Bom_snapshot
+from assembly_bom.serializers import Assembly_bomSerializer, BomItemSerializer
+from assembly_bom.bom_export import iter_bom_export_rows
+from parts.models import Part
+from pcbas.models import Pcba
+from projects.models import Project
+
+VERSION = 2
+
+# Bytes of compressed export rows read per query.
+EXPORT_CHUNK_SIZE = 1024 * 1024
+
+# Response key of the linked items of each model.
+_LINKED = [("parts", Part), ("asms", Assembly), ("pcbas", Pcba)]
+
+
+def _root(app, item_id):
+    return {"root_assembly_id": item_id} if app == "assemblies" else {"root_pcba_id": item_id}
+
+
+def _item_model(app):
+    return Assembly if app == "assemblies" else Pcba
+
+
+def build_bom_snapshot(app, item_id):
+    """Current BOM of an assembly or pcba in the snapshot format, None if it has no BOM."""
+    # Imported here, the views use this module
+    from assembly_bom.viewsBomitems import _fetch_linked_parts_response
+
+    owner = {"assembly_id": item_id} if app == "assemblies" else {"pcba_id": item_id}
+    bom = Assembly_bom.objects.filter(**owner).order_by("id").first()
+    if bom is None:
+        return None
+
+    bom_items = list(Bom_item.objects.filter(bom=bom))
+    ids = {
+        "asms": [item.assembly_id for item in bom_items if item.assembly_id],
+        "parts": [item.part_id for item in bom_items if item.part_id],
+        "pcbas": [item.pcba_id for item in bom_items if item.pcba_id],
+    }
+    linked = _fetch_linked_parts_response(None, ids["asms"], ids["parts"], ids["pcbas"])
+
+    project_ids = {}
+    for key, model in _LINKED:
+        project_ids[key] = {
+            str(pk): project_id
+            for pk, project_id in model.objects.filter(id__in=ids[key]).values_list("id", "project_id")
+        }
+
+    return {
+        "version": VERSION,
+        "bom": Assembly_bomSerializer(bom).data,
+        "bom_items": BomItemSerializer(bom_items, many=True).data,
+        "parts": linked["parts"],
+        "asms": linked["asms"],
+        "pcbas": linked["pcbas"],
+        "project_ids": project_ids,
+    }
+
+
+def _encode(value):
+    return json.dumps(value, cls=DjangoJSONEncoder, separators=(",", ":")).encode("utf-8")
+
+
+def build_export_data(app, item_id):
+    """Export rows of an assembly or pcba as zlib compressed NDJSON."""
+    compressor = zlib.compressobj(6)
+    chunks = [compressor.compress(_encode(row) + b"\n") for row in iter_bom_export_rows(app, item_id)]
+    chunks.append(compressor.flush())
+    return b"".join(chunks)
+
+
+def write_bom_snapshot(app, item_id):
+    """Snapshot the BOM of a released assembly or pcba, if not already done.
+
+    Returns the Bom_snapshot, None if the item is not released or has no BOM.
+    """
+    existing = Bom_snapshot.objects.filter(**_root(app, item_id)).first()
+    if existing is not None:
+        return existing
+    if not _item_model(app).objects.filter(id=item_id, release_state="Released").exists():
+        return None
+
+    data = build_bom_snapshot(app, item_id)
+    if data is None:
+        return None
+    encoded = _encode(data)
+    snapshot, _ = Bom_snapshot.objects.get_or_create(
+        **_root(app, item_id),
+        defaults={
+            "data": zlib.compress(encoded, 6),
+            "export_data": build_export_data(app, item_id),
+            "content_hash": hashlib.sha256(encoded).hexdigest(),
+        },
+    )
+    return snapshot
+
+
+def schedule_bom_snapshot(app, item_id):
+    """Snapshot the BOM of a released item once the current transaction commits."""
+    transaction.on_commit(lambda: write_bom_snapshot(app, item_id))
+
+
+def delete_bom_snapshot(app, item_id):
+    Bom_snapshot.objects.filter(**_root(app, item_id)).delete()
+
+
+def decode_bom_snapshot(data):
+    """Snapshot from the compressed data of a Bom_snapshot."""
+    return json.loads(zlib.decompress(bytes(data)))
+
+
+def load_bom_snapshot(app, item_id):
+    """Decompressed snapshot of an assembly or pcba, None if there is none."""
+    data = (
+        Bom_snapshot.objects.filter(**_root(app, item_id))
+        .values_list("data", flat=True)
+        .first()
+    )
+    if data is None:
+        return None
+    return decode_bom_snapshot(data)
+
+
+def with_snapshot_data(boms, app, item_id):
+    """Annotate BOMs with the compressed snapshot of an item as snapshot_data, None if it has none.
+
+    Lets the BOM of a draft item be read without a query of its own for the snapshot.
+    """
+    snapshot = Bom_snapshot.objects.filter(**_root(app, item_id)).values("data")[:1]
+    return boms.annotate(snapshot_data=Subquery(snapshot))
+
+
+def snapshot_response(snapshot, user):
+    """Body of get_bom_items_with_linked_parts from a snapshot, with the linked items filtered
+    to the projects of the user, like _fetch_linked_parts_response."""
+    project_ids = snapshot["project_ids"]
+    used_projects = {
+        project_id
+        for key, _ in _LINKED
+        for project_id in project_ids[key].values()
+        if project_id is not None
+    }
+    member_of = set()
+    if used_projects:
+        member_of = set(
+            Project.objects.filter(project_members=user, id__in=used_projects).values_list("id", flat=True)
+        )
+
+    response = {"bom": snapshot["bom"], "bom_items": snapshot["bom_items"]}
+    for key, _ in _LINKED:
+        response[key] = []
+        for item in snapshot[key]:
+            project_id = project_ids[key].get(str(item["id"]))
+            if project_id is None or project_id in member_of:
+                response[key].append(item)
+    return response
+
+
+def iter_snapshot_export_rows(app, item_id):
+    """Export rows of the snapshot of an item, like iter_bom_export_rows.
+
+    Returns:
+        Iterator of the rows, None if the item has no snapshot.
+    """
+    snapshot = (
+        Bom_snapshot.objects.filter(**_root(app, item_id), export_data__isnull=False)
+        .values_list("id", Length("export_data"))
+        .first()
+    )
+    if snapshot is None:
+        return None
+    return _iter_export_data(*snapshot)
+
+
+def _iter_export_data(snapshot_id, size):
+    decompressor = zlib.decompressobj()
+    pending = b""
+    for offset in range(0, size, EXPORT_CHUNK_SIZE):
+        chunk = (
+            Bom_snapshot.objects.filter(id=snapshot_id)
+            .values_list(Substr("export_data", offset + 1, EXPORT_CHUNK_SIZE), flat=True)
+            .get()
+        )
+        *lines, pending = (pending + decompressor.decompress(bytes(chunk))).split(b"\n")
+        for line in lines:
+            yield _export_row(line)
+    pending += decompressor.flush()
+    if pending:
+        yield _export_row(pending)
+
+
+def _export_row(line):
+    row = json.loads(line)
+    # Prices are Decimal like in iter_bom_export_rows
+    if row["unit_price"] is not None:
+        row["unit_price"] = Decimal(row["unit_price"])
+    return row
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.11 on 2026-10-18 08:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parts', '0098_rename_parts_starr_user_idx_parts_starr_user_id_8d328d_idx_and_more'),
+        ('pcbas', '0062_starred_pcba'),
+        ('assemblies', '0058_starredassembly'),
+        ('assembly_bom', '0020_remove_assembly_bom_asm_bom_part_number_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Bom_explosion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.TextField(blank=True, default='')),
+                ('depth', models.IntegerField(default=1)),
+                ('quantity', models.FloatField(default=1.0)),
+                ('is_mounted', models.BooleanField(default=True)),
+                ('assembly', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='assemblies.assembly')),
+                ('bom_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='assembly_bom.bom_item')),
+                ('part', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='parts.part')),
+                ('pcba', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='pcbas.pcba')),
+                ('root_assembly', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='assemblies.assembly')),
+                ('root_pcba', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='pcbas.pcba')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['root_assembly', 'depth'], name='assembly_bo_root_as_9f687a_idx'), models.Index(fields=['root_pcba', 'depth'], name='assembly_bo_root_pc_3d6ae7_idx')],
+            },
+        ),
+    ]
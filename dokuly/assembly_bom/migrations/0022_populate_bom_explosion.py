@@ -0,0 +1,91 @@
+# Generated migration to populate the Bom_explosion table from existing BOMs
+
+from django.db import migrations
+
+
+# Explodes the first BOM of every assembly and PCBA, like assembly_bom.bom_explosion.explode_boms.
+# A line whose item is already on its path is kept, but not exploded further.
+POPULATE_SQL = """
+    WITH RECURSIVE first_boms AS (
+        SELECT DISTINCT ON (owner) "id", owner
+        FROM (
+            SELECT "id", CASE
+                WHEN "assembly_id" IS NOT NULL THEN 'assemblies:' || "assembly_id"
+                WHEN "pcba_id" IS NOT NULL THEN 'pcbas:' || "pcba_id"
+            END AS owner
+            FROM {bom_table}
+        ) AS boms
+        WHERE owner IS NOT NULL
+        ORDER BY owner, "id"
+    ), lines AS (
+        SELECT
+            first_boms.owner, item."id" AS bom_item_id,
+            item."part_id", item."pcba_id", item."assembly_id",
+            item."quantity", item."is_mounted",
+            CASE
+                WHEN item."part_id" IS NOT NULL THEN 'parts:' || item."part_id"
+                WHEN item."pcba_id" IS NOT NULL THEN 'pcbas:' || item."pcba_id"
+                ELSE 'assemblies:' || item."assembly_id"
+            END AS child
+        FROM {item_table} AS item
+        JOIN first_boms ON first_boms."id" = item."bom_id"
+        WHERE item."part_id" IS NOT NULL OR item."pcba_id" IS NOT NULL OR item."assembly_id" IS NOT NULL
+    ), tree AS (
+        SELECT
+            owner AS root, bom_item_id, "part_id", "pcba_id", "assembly_id", child,
+            ''::text AS path, 1 AS depth, "quantity" AS quantity, "is_mounted",
+            ARRAY[owner] AS visited
+        FROM lines
+        UNION ALL
+        SELECT
+            tree.root, lines.bom_item_id, lines."part_id", lines."pcba_id", lines."assembly_id",
+            lines.child,
+            CASE WHEN tree.path = '' THEN tree.child ELSE tree.path || '/' || tree.child END,
+            tree.depth + 1, tree.quantity * lines."quantity", lines."is_mounted",
+            tree.visited || tree.child
+        FROM tree
+        JOIN lines ON lines.owner = tree.child
+        WHERE NOT tree.child = ANY(tree.visited)
+    )
+    INSERT INTO {explosion_table} (
+        "root_assembly_id", "root_pcba_id", "bom_item_id", "part_id", "pcba_id", "assembly_id",
+        "path", "depth", "quantity", "is_mounted"
+    )
+    SELECT
+        CASE WHEN root LIKE 'assemblies:%%' THEN split_part(root, ':', 2)::integer END,
+        CASE WHEN root LIKE 'pcbas:%%' THEN split_part(root, ':', 2)::integer END,
+        bom_item_id, "part_id", "pcba_id", "assembly_id", path, depth, quantity, "is_mounted"
+    FROM tree
+"""
+
+
+def populate_bom_explosion(apps, schema_editor):
+    """Explode every assembly and PCBA BOM into the Bom_explosion table."""
+    Assembly_bom = apps.get_model('assembly_bom', 'Assembly_bom')
+    Bom_item = apps.get_model('assembly_bom', 'Bom_item')
+    Bom_explosion = apps.get_model('assembly_bom', 'Bom_explosion')
+
+    quote = schema_editor.connection.ops.quote_name
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(POPULATE_SQL.format(
+            bom_table=quote(Assembly_bom._meta.db_table),
+            item_table=quote(Bom_item._meta.db_table),
+            explosion_table=quote(Bom_explosion._meta.db_table),
+        ), [])
+        print(f"Exploded BOMs into {cursor.rowcount} rows")
+
+
+def reverse_migration(apps, schema_editor):
+    Bom_explosion = apps.get_model('assembly_bom', 'Bom_explosion')
+    Bom_explosion.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assembly_bom', '0021_bom_explosion'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_bom_explosion, reverse_migration),
+    ]
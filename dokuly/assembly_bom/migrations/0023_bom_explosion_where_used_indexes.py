@@ -0,0 +1,44 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assemblies', '0058_starredassembly'),
+        ('parts', '0098_rename_parts_starr_user_idx_parts_starr_user_id_8d328d_idx_and_more'),
+        ('pcbas', '0062_starred_pcba'),
+        ('assembly_bom', '0022_populate_bom_explosion'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bom_explosion',
+            name='assembly',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='assemblies.assembly'),
+        ),
+        migrations.AlterField(
+            model_name='bom_explosion',
+            name='part',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='parts.part'),
+        ),
+        migrations.AlterField(
+            model_name='bom_explosion',
+            name='pcba',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='pcbas.pcba'),
+        ),
+        migrations.AddIndex(
+            model_name='bom_explosion',
+            index=models.Index(fields=['part', 'root_assembly', 'root_pcba'], name='assembly_bo_part_id_3c70ab_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bom_explosion',
+            index=models.Index(fields=['pcba', 'root_assembly', 'root_pcba'], name='assembly_bo_pcba_id_1be248_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bom_explosion',
+            index=models.Index(fields=['assembly', 'root_assembly', 'root_pcba'], name='assembly_bo_assembl_ddbc53_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:07
+
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assemblies', '0058_starredassembly'),
+        ('pcbas', '0062_starred_pcba'),
+        ('assembly_bom', '0023_bom_explosion_where_used_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Bom_cost_cache',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('rates_fingerprint', models.CharField(max_length=64)),
+                ('etag', models.CharField(max_length=64)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('root_assembly', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='assemblies.assembly')),
+                ('root_pcba', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='pcbas.pcba')),
+            ],
+        ),
+    ]
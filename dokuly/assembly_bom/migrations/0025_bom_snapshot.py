@@ -0,0 +1,27 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assemblies', '0058_starredassembly'),
+        ('pcbas', '0062_starred_pcba'),
+        ('assembly_bom', '0024_bom_cost_cache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Bom_snapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.BinaryField()),
+                ('content_hash', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('root_assembly', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='assemblies.assembly')),
+                ('root_pcba', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='pcbas.pcba')),
+            ],
+        ),
+    ]
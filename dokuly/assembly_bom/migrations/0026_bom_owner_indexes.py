@@ -0,0 +1,21 @@
+# Generated by Django 4.2.11 on 2026-10-18 10:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assembly_bom', '0025_bom_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assembly_bom',
+            index=models.Index(fields=['assembly_id', 'id'], name='assembly_bo_assembl_0de9b4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assembly_bom',
+            index=models.Index(fields=['pcba', 'id'], name='assembly_bo_pcba_id_b099ad_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 10:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assembly_bom', '0026_bom_owner_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bom_snapshot',
+            name='export_data',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
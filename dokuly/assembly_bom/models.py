@@ -6,6 +6,7 @@ from parts.models import Part
 from pcbas.models import Pcba
 from assemblies.models import Assembly
 from django.core.validators import validate_comma_separated_integer_list
+from django.core.serializers.json import DjangoJSONEncoder
 
 
 # Create your models here.
@@ -23,6 +24,13 @@ class Assembly_bom(models.Model):
     bom_name = models.TextField(null=True, blank=True, max_length=50)
     comments = models.CharField(max_length=500, null=True, blank=True)
 
+    class Meta:
+        # The first BOM of an item is looked up by owner, ordered by id
+        indexes = [
+            models.Index(fields=["assembly_id", "id"]),
+            models.Index(fields=["pcba", "id"]),
+        ]
+
 
 class Bom_item(models.Model):
     """An ingoing item in a bill of materials."""
@@ -56,3 +64,104 @@ class Bom_item(models.Model):
         null=True,
         related_name="bom_item",
     )
+
+
+class Bom_explosion(models.Model):
+    """Materialized, fully exploded BOM tree of an assembly or PCBA.
+
+    One row per occurrence of a bom item anywhere below the root item.
+    A sub-assembly used twice gives two sets of rows, one for each path.
+    Rows are maintained by assembly_bom.bom_explosion whenever Bom_item rows change,
+    and let a whole tree be read with a single indexed query.
+    """
+
+    # The root item whose exploded tree this row belongs to. Exactly one is set.
+    root_assembly = models.ForeignKey(
+        Assembly, on_delete=models.CASCADE, blank=True, null=True, related_name="+"
+    )
+    root_pcba = models.ForeignKey(
+        Pcba, on_delete=models.CASCADE, blank=True, null=True, related_name="+"
+    )
+
+    # The BOM line this row was exploded from.
+    bom_item = models.ForeignKey(Bom_item, on_delete=models.CASCADE, related_name="+")
+
+    # The descendant item. Mirrors the linked item on bom_item.
+    # Indexed together with the root in Meta, which makes the table a transitive where-used index.
+    part = models.ForeignKey(
+        Part, on_delete=models.CASCADE, blank=True, null=True, related_name="+", db_index=False
+    )
+    pcba = models.ForeignKey(
+        Pcba, on_delete=models.CASCADE, blank=True, null=True, related_name="+", db_index=False
+    )
+    assembly = models.ForeignKey(
+        Assembly, on_delete=models.CASCADE, blank=True, null=True, related_name="+", db_index=False
+    )
+
+    # Item keys between the root and the descendant, e.g. "assemblies:12/pcbas:4".
+    # Empty for items directly in the root BOM.
+    path = models.TextField(blank=True, default="")
+    # 1 for items directly in the root BOM.
+    depth = models.IntegerField(default=1)
+    # Quantity of the descendant per root item, accumulated along the path.
+    quantity = models.FloatField(default=1.0)
+    # Mounted flag of bom_item itself, not of the whole path.
+    is_mounted = models.BooleanField(default=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["root_assembly", "depth"]),
+            models.Index(fields=["root_pcba", "depth"]),
+            models.Index(fields=["part", "root_assembly", "root_pcba"]),
+            models.Index(fields=["pcba", "root_assembly", "root_pcba"]),
+            models.Index(fields=["assembly", "root_assembly", "root_pcba"]),
+        ]
+
+
+class Bom_cost_cache(models.Model):
+    """Last computed BOM cost rollup of an assembly or PCBA.
+
+    Rows are dropped by assembly_bom.bom_cost_cache whenever a bom item or a price anywhere in
+    the tree changes. Conversion rates are checked on read through rates_fingerprint.
+    """
+
+    # Exactly one is set.
+    root_assembly = models.OneToOneField(
+        Assembly, on_delete=models.CASCADE, blank=True, null=True, related_name="+"
+    )
+    root_pcba = models.OneToOneField(
+        Pcba, on_delete=models.CASCADE, blank=True, null=True, related_name="+"
+    )
+
+    # Response body of get_bom_cost.
+    data = models.JSONField(encoder=DjangoJSONEncoder)
+    # Hash of the organization currency and conversion rates the data was computed with.
+    rates_fingerprint = models.CharField(max_length=64)
+    # Hash of data, sent as the ETag of the cost endpoint.
+    etag = models.CharField(max_length=64)
+    computed_at = models.DateTimeField(auto_now=True)
+
+
+class Bom_snapshot(models.Model):
+    """Frozen BOM of a released assembly or PCBA.
+
+    Written by assembly_bom.bom_snapshot when the item is released, and never updated.
+    Released BOM reads and exports are served from it instead of joining the live tables.
+    Rows are dropped if the item leaves the released state.
+    """
+
+    # Exactly one is set.
+    root_assembly = models.OneToOneField(
+        Assembly, on_delete=models.CASCADE, blank=True, null=True, related_name="+"
+    )
+    root_pcba = models.OneToOneField(
+        Pcba, on_delete=models.CASCADE, blank=True, null=True, related_name="+"
+    )
+
+    # zlib compressed JSON, see assembly_bom.bom_snapshot.build_bom_snapshot.
+    data = models.BinaryField()
+    # zlib compressed NDJSON of the export rows, see assembly_bom.bom_snapshot.build_export_data.
+    export_data = models.BinaryField(blank=True, null=True)
+    # sha256 of the uncompressed JSON.
+    content_hash = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True)
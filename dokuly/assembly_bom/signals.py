@@ -0,0 +1,104 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from assemblies.models import Assembly
+from parts.models import Part
+from pcbas.models import Pcba
+from purchasing.priceModel import Price
+from .models import Assembly_bom, Bom_item
+from .bom_explosion import (
+    _owner_key,
+    bom_item_key,
+    bom_owner_key_by_id,
+    schedule_bom_explosion_refresh,
+)
+from .bom_cost_cache import invalidate_bom_cost_using
+from .bom_snapshot import delete_bom_snapshot, schedule_bom_snapshot
+
+
+@receiver(post_save, sender=Bom_item)
+def refresh_explosion_on_save(sender, instance, raw=False, **kwargs):
+    """
+    Keep the exploded BOMs of the owning item and its ancestors up to date.
+    """
+    if raw:
+        return
+    schedule_bom_explosion_refresh([bom_owner_key_by_id(instance.bom_id)])
+
+
+@receiver(pre_delete, sender=Bom_item)
+def store_owner_before_delete(sender, instance, **kwargs):
+    """
+    The BOM may be deleted together with its items, resolve the owner while it still exists.
+    """
+    instance._explosion_owner_key = bom_owner_key_by_id(instance.bom_id)
+
+
+@receiver(post_delete, sender=Bom_item)
+def refresh_explosion_on_delete(sender, instance, **kwargs):
+    schedule_bom_explosion_refresh([getattr(instance, "_explosion_owner_key", None)])
+
+
+@receiver(pre_delete, sender=Part)
+@receiver(pre_delete, sender=Pcba)
+@receiver(pre_delete, sender=Assembly)
+def store_users_before_item_delete(sender, instance, **kwargs):
+    """
+    Deleting an item unlinks it from bom items through SET_NULL, an update sending no Bom_item
+    signals. Find the BOMs using the item while the bom items still point to it.
+    """
+    field = {Part: "part", Pcba: "pcba", Assembly: "assembly"}[sender]
+    boms = Assembly_bom.objects.filter(
+        id__in=Bom_item.objects.filter(**{field: instance.pk}).values("bom_id")
+    ).values_list("assembly_id", "pcba_id")
+    instance._explosion_user_keys = [_owner_key(assembly_id, pcba_id) for assembly_id, pcba_id in boms]
+
+
+@receiver(post_delete, sender=Part)
+@receiver(post_delete, sender=Pcba)
+@receiver(post_delete, sender=Assembly)
+def refresh_explosion_on_item_delete(sender, instance, **kwargs):
+    """
+    Rebuild the exploded BOMs the deleted item and everything below it were part of.
+    """
+    schedule_bom_explosion_refresh(getattr(instance, "_explosion_user_keys", []))
+
+
+@receiver(post_save, sender=Price)
+@receiver(post_delete, sender=Price)
+def invalidate_bom_cost_on_price_change(sender, instance, raw=False, **kwargs):
+    """
+    Drop the cached cost rollups of every assembly and pcba using the priced item.
+    Saves are included, as they are also how a price stops being the latest price.
+    """
+    if raw:
+        return
+    invalidate_bom_cost_using(
+        [bom_item_key(instance.part_id, instance.pcba_id, instance.assembly_id)]
+    )
+
+
+@receiver(post_init, sender=Assembly)
+@receiver(post_init, sender=Pcba)
+def store_loaded_release_state(sender, instance, **kwargs):
+    """
+    Only items that were released can have a snapshot to drop. An item loaded without its
+    release state is taken as released, reading the deferred field would cost a query.
+    """
+    instance._snapshot_release_state = instance.__dict__.get("release_state", "Released")
+
+
+@receiver(post_save, sender=Assembly)
+@receiver(post_save, sender=Pcba)
+def snapshot_bom_on_release(sender, instance, raw=False, **kwargs):
+    """
+    Freeze the BOM of released items, and drop the snapshot of items taken back to draft.
+    """
+    if raw:
+        return
+    app = "assemblies" if sender is Assembly else "pcbas"
+    if instance.release_state == "Released":
+        schedule_bom_snapshot(app, instance.id)
+    elif getattr(instance, "_snapshot_release_state", "Released") == "Released":
+        delete_bom_snapshot(app, instance.id)
+    instance._snapshot_release_state = instance.release_state
@@ -1,3 +1,513 @@
-from django.test import TestCase
+import importlib
+import io
+from pathlib import Path
+import threading
+import zipfile
+from unittest import mock
+from xml.etree import ElementTree
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from assemblies.models import Assembly
+from parts.models import Part
+from pcbas.models import Pcba
+from assembly_bom.models import Assembly_bom, Bom_explosion, Bom_item, Bom_snapshot
+from assembly_bom.bom_explosion import (
+    _lock_roots,
+    _pending,
+    get_bom_explosion,
+    get_where_used,
+    schedule_bom_explosion_refresh,
+)
+from assembly_bom.bom_flattening import flatten_bom_for_odoo
+from assembly_bom.bom_matching import rank_mpn_candidates
+from assembly_bom.bom_import import import_bom_rows, iter_csv_rows
+from assembly_bom.viewsBomCost import BOMCostCalculator
+from assembly_bom.bom_cost_cache import get_cached_bom_cost, rates_fingerprint, store_bom_cost
+from assembly_bom.bom_export import COLUMNS, iter_bom_export_rows, iter_csv, iter_xlsx
+from assembly_bom.bom_snapshot import iter_snapshot_export_rows, load_bom_snapshot
+from parts.mpn import has_trigram_extension
+from purchasing.priceModel import Price
+from profiles.models import Profile
+from traceability.models import TraceabilityEvent
+
+
+class BomTreeMixin:
+    """ASM1 -> (2x ASM2, 1x PRT1), ASM2 -> 3x PCBA1, PCBA1 -> 4x PRT2."""
+
+    def setUp(self):
+        self.top = Assembly.objects.create(part_number=1, full_part_number="ASM1", price=0)
+        self.sub = Assembly.objects.create(part_number=2, full_part_number="ASM2", price=0)
+        self.pcba = Pcba.objects.create(part_number=1, full_part_number="PCBA1")
+        self.part = Part.objects.create(part_number=1, full_part_number="PRT1")
+        self.resistor = Part.objects.create(part_number=2, full_part_number="PRT2")
+
+        self.top_bom = Assembly_bom.objects.create(assembly_id=self.top.id)
+        self.sub_bom = Assembly_bom.objects.create(assembly_id=self.sub.id)
+        self.pcba_bom = Assembly_bom.objects.create(pcba=self.pcba)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Bom_item.objects.create(bom=self.pcba_bom, part=self.resistor, quantity=4)
+            Bom_item.objects.create(bom=self.sub_bom, pcba=self.pcba, quantity=3)
+            Bom_item.objects.create(bom=self.top_bom, assembly=self.sub, quantity=2)
+            Bom_item.objects.create(bom=self.top_bom, part=self.part, quantity=1)
+
+
+class BomExplosionTests(BomTreeMixin, TestCase):
+    def test_explosion_accumulates_quantities(self):
+        rows = {
+            (row.part_id, row.pcba_id, row.assembly_id): row
+            for row in get_bom_explosion("assemblies", self.top.id)
+        }
+        self.assertEqual(len(rows), 4)
+
+        resistor = rows[(self.resistor.id, None, None)]
+        self.assertEqual(resistor.depth, 3)
+        self.assertEqual(resistor.quantity, 24)
+        self.assertEqual(resistor.path, f"assemblies:{self.sub.id}/pcbas:{self.pcba.id}")
+
+    def test_changed_bom_item_refreshes_ancestors(self):
+        resistor_line = Bom_item.objects.get(bom=self.pcba_bom)
+        resistor_line.quantity = 5
+        with self.captureOnCommitCallbacks(execute=True):
+            resistor_line.save()
+
+        for app, item_id, quantity in [
+            ("pcbas", self.pcba.id, 5),
+            ("assemblies", self.sub.id, 15),
+            ("assemblies", self.top.id, 30),
+        ]:
+            row = get_bom_explosion(app, item_id).get(part=self.resistor)
+            self.assertEqual(row.quantity, quantity)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            resistor_line.delete()
+        self.assertFalse(get_bom_explosion("assemblies", self.top.id).filter(part=self.resistor).exists())
+
+    def test_deleted_item_is_removed_from_ancestors(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pcba.delete()
+
+        rows = get_bom_explosion("assemblies", self.top.id)
+        self.assertEqual(
+            {(row.part_id, row.pcba_id, row.assembly_id) for row in rows},
+            {(None, None, self.sub.id), (self.part.id, None, None)},
+        )
+        self.assertFalse(get_bom_explosion("assemblies", self.sub.id).exists())
+
+    def test_rolled_back_refresh_is_not_kept(self):
+        try:
+            with transaction.atomic():
+                schedule_bom_explosion_refresh([f"assemblies:{self.sub.id}"])
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule_bom_explosion_refresh([f"pcbas:{self.pcba.id}"])
+            self.assertEqual(_pending.keys, {f"pcbas:{self.pcba.id}"})
+
+    def test_populate_migration_matches_refresh(self):
+        migration = importlib.import_module("assembly_bom.migrations.0022_populate_bom_explosion")
+        fields = ["root_assembly_id", "root_pcba_id", "bom_item_id", "part_id", "pcba_id",
+                  "assembly_id", "path", "depth", "quantity", "is_mounted"]
+        refreshed = list(Bom_explosion.objects.values_list(*fields))
+
+        Bom_explosion.objects.all().delete()
+        with connection.schema_editor() as schema_editor:
+            migration.populate_bom_explosion(apps, schema_editor)
+
+        self.assertCountEqual(Bom_explosion.objects.values_list(*fields), refreshed)
+
+    def test_flatten_bom_for_odoo_keeps_pcbas(self):
+        flattened = {
+            (item["item_type"], item["item_id"]): item["quantity"]
+            for item in flatten_bom_for_odoo(self.top.id)
+        }
+        self.assertEqual(
+            flattened,
+            {("pcbas", self.pcba.id): 6, ("parts", self.part.id): 1},
+        )
+
+    def test_where_used_returns_all_ancestors(self):
+        where_used = {
+            (row["root_assembly_id"], row["root_pcba_id"]): (row["total_quantity"], row["min_depth"])
+            for row in get_where_used("parts", [self.resistor.id])
+        }
+        self.assertEqual(
+            where_used,
+            {
+                (None, self.pcba.id): (4, 1),
+                (self.sub.id, None): (12, 2),
+                (self.top.id, None): (24, 3),
+            },
+        )
+
+        direct = get_where_used("parts", [self.resistor.id], max_depth=1)
+        self.assertEqual([row["root_pcba_id"] for row in direct], [self.pcba.id])
+
+    def test_where_used_all_levels_endpoint(self):
+        user = User.objects.create_user(username="where_used", password="pass")
+        Profile.objects.create(user=user)
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        response = client.get(
+            f"/api/assembly_bom/whereUsed/parts/{self.resistor.id}/allLevels/?latest_only=false",
+            secure=True,
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [
+                (parent["parent_type"], parent["id"], parent["total_quantity"], parent["depth"])
+                for parent in response.json()
+            ],
+            [
+                ("pcba", self.pcba.id, 4, 1),
+                ("assembly", self.sub.id, 12, 2),
+                ("assembly", self.top.id, 24, 3),
+            ],
+        )
+
+
+class BomExplosionLockTests(TransactionTestCase):
+    def test_refresh_waits_for_refresh_of_shared_root(self):
+        top = Assembly.objects.create(part_number=1, full_part_number="ASM1", price=0)
+        sub = Assembly.objects.create(part_number=2, full_part_number="ASM2", price=0)
+        part = Part.objects.create(part_number=1, full_part_number="PRT1")
+        top_bom = Assembly_bom.objects.create(assembly_id=top.id)
+        sub_bom = Assembly_bom.objects.create(assembly_id=sub.id)
+        Bom_item.objects.create(bom=top_bom, assembly=sub, quantity=2)
+        Bom_item.objects.create(bom=sub_bom, part=part, quantity=1)
+
+        done = threading.Event()
+
+        def edit_sub():
+            try:
+                Bom_item.objects.create(bom=sub_bom, part=part, quantity=5)
+            finally:
+                connection.close()
+                done.set()
+
+        with transaction.atomic():
+            # Another refresh of the tree of ASM1 is in progress
+            _lock_roots({f"assemblies:{top.id}"})
+            thread = threading.Thread(target=edit_sub)
+            thread.start()
+            self.assertFalse(done.wait(0.5))
+        thread.join(10)
+
+        self.assertTrue(done.is_set())
+        self.assertEqual(get_bom_explosion("assemblies", top.id).count(), 3)
+        self.assertEqual(get_bom_explosion("assemblies", sub.id).count(), 2)
+
+
+class BomCostCacheTests(BomTreeMixin, TestCase):
+    fingerprint = rates_fingerprint("USD", {"USD": 1.0})
+
+    def cache_all(self):
+        for app, item_id in [
+            ("assemblies", self.top.id), ("assemblies", self.sub.id), ("pcbas", self.pcba.id)
+        ]:
+            store_bom_cost(app, item_id, self.fingerprint, {"price_breaks": []})
+
+    def cached(self):
+        return {
+            (app, item_id)
+            for app, item_id in [
+                ("assemblies", self.top.id), ("assemblies", self.sub.id), ("pcbas", self.pcba.id)
+            ]
+            if get_cached_bom_cost(app, item_id, self.fingerprint)
+        }
+
+    def test_price_change_invalidates_users_of_the_item(self):
+        self.cache_all()
+        Price.objects.create(assembly=self.sub, price=10)
+        self.assertEqual(self.cached(), {("assemblies", self.sub.id), ("pcbas", self.pcba.id)})
+
+        self.cache_all()
+        Price.objects.create(part=self.resistor, price=1)
+        self.assertEqual(self.cached(), set())
+
+    def test_bom_change_invalidates_rebuilt_trees(self):
+        self.cache_all()
+        with self.captureOnCommitCallbacks(execute=True):
+            Bom_item.objects.filter(bom=self.sub_bom).first().delete()
+        self.assertEqual(self.cached(), {("pcbas", self.pcba.id)})
+
+    def test_changed_rates_are_stale(self):
+        cached = store_bom_cost("pcbas", self.pcba.id, self.fingerprint, {"price_breaks": []})
+        self.assertEqual(len(cached.etag), 64)
+        self.assertIsNone(
+            get_cached_bom_cost("pcbas", self.pcba.id, rates_fingerprint("USD", {"USD": 1.0, "EUR": 0.9}))
+        )
+
+
+class BomExportTests(BomTreeMixin, TestCase):
+    def test_rows_cover_every_level(self):
+        Price.objects.create(part=self.resistor, price=2, minimum_order_quantity=100, currency="USD")
+        Price.objects.create(part=self.resistor, price=3, minimum_order_quantity=1, currency="EUR")
+        Bom_item.objects.create(bom=self.top_bom, temporary_mpn="UNMATCHED-1", quantity=7)
+
+        with self.assertNumQueries(1 + 3 * 2):  # Root, then boms and lines per level
+            rows = list(iter_bom_export_rows("assemblies", self.top.id))
+
+        self.assertEqual([row["level"] for row in rows], [1, 1, 1, 2, 3])
+        unmatched = next(row for row in rows if row["mpn"] == "UNMATCHED-1")
+        self.assertEqual(unmatched["item_type"], "")
+
+        resistor = rows[-1]
+        self.assertEqual(resistor["path"], "ASM1/ASM2/PCBA1")
+        self.assertEqual(resistor["parent"], "PCBA1")
+        self.assertEqual((resistor["quantity"], resistor["total_quantity"]), (4, 24))
+        self.assertEqual((resistor["unit_price"], resistor["currency"]), (3, "EUR"))
+
+    def test_csv_and_xlsx_writers(self):
+        rows = list(iter_bom_export_rows("pcbas", self.pcba.id))
+
+        lines = "".join(iter_csv(rows)).splitlines()
+        self.assertEqual(lines[0], ",".join(COLUMNS))
+        self.assertEqual(len(lines), 2)
+
+        workbook = zipfile.ZipFile(io.BytesIO(b"".join(iter_xlsx(rows))))
+        sheet = ElementTree.fromstring(workbook.read("xl/worksheets/sheet1.xml"))
+        namespace = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+        self.assertEqual(len(list(sheet.iter(f"{namespace}row"))), 2)
+
+
+class BomSnapshotTests(BomTreeMixin, TestCase):
+    def release(self, item):
+        item.release_state = "Released"
+        with self.captureOnCommitCallbacks(execute=True):
+            item.save()
+
+    def test_release_freezes_bom(self):
+        Price.objects.create(part=self.part, price="1.2500", minimum_order_quantity=1, currency="USD")
+        rows = list(iter_bom_export_rows("assemblies", self.top.id))
+        self.release(self.top)
+        self.assertTrue(Bom_snapshot.objects.filter(root_assembly=self.top).exists())
+
+        # Changes below a released item do not reach its snapshot
+        with self.captureOnCommitCallbacks(execute=True):
+            Bom_item.objects.filter(bom=self.pcba_bom).update(quantity=10)
+            Bom_item.objects.create(bom=self.pcba_bom, temporary_mpn="NEW-1")
+
+        snapshot = load_bom_snapshot("assemblies", self.top.id)
+        self.assertEqual(list(iter_snapshot_export_rows("assemblies", self.top.id)), rows)
+        self.assertEqual(len(snapshot["bom_items"]), 2)
+        self.assertNotEqual(list(iter_bom_export_rows("assemblies", self.top.id)), rows)
+
+    def test_export_rows_are_read_in_chunks(self):
+        rows = list(iter_bom_export_rows("assemblies", self.top.id))
+        self.release(self.top)
+
+        with mock.patch("assembly_bom.bom_snapshot.EXPORT_CHUNK_SIZE", 16):
+            self.assertEqual(list(iter_snapshot_export_rows("assemblies", self.top.id)), rows)
+        self.assertIsNone(iter_snapshot_export_rows("pcbas", self.pcba.id))
+
+    def test_draft_drops_snapshot(self):
+        self.release(self.pcba)
+        self.assertIsNotNone(load_bom_snapshot("pcbas", self.pcba.id))
+        self.pcba.release_state = "Draft"
+        self.pcba.save()
+        self.assertIsNone(load_bom_snapshot("pcbas", self.pcba.id))
+
+    def test_draft_saves_do_not_touch_snapshots(self):
+        pcba = Pcba.objects.get(id=self.pcba.id)
+        with self.assertNumQueries(1):
+            pcba.save()
+
+    def test_released_bom_served_from_snapshot(self):
+        user = User.objects.create_user(username="reader", password="pass")
+        Profile.objects.create(user=user)
+        client = APIClient()
+        client.force_authenticate(user=user)
+        url = f"/api/assembly_bom/getItemsWithLinkedParts/assemblies/{self.top.id}/"
+        live = client.get(url, secure=True).json()
+
+        self.release(self.top)
+        # The profile and the snapshot, no BOM tables are joined
+        with self.assertNumQueries(2):
+            frozen = client.get(url, secure=True).json()
+        self.assertEqual(frozen, live)
+
+
+class BomMatchingTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username="matcher", password="pass")
+        Profile.objects.create(user=user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=user)
+
+        self.assembly = Assembly.objects.create(part_number=1, full_part_number="ASM1", price=0)
+        self.bom = Assembly_bom.objects.create(assembly_id=self.assembly.id)
+
+    def match(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.put(f"/api/assembly_bom/{self.bom.id}/matchItemsWithParts/", secure=True)
+
+    def test_match_precedence(self):
+        part = Part.objects.create(part_number=1, full_part_number="PRT1", mpn="ASM2")
+        old_revision = Part.objects.create(part_number=2, full_part_number="PRT2A", mpn="RC0603", is_latest_revision=False)
+        latest_revision = Part.objects.create(part_number=2, full_part_number="PRT2B", mpn="RC0603", is_latest_revision=True)
+        sub = Assembly.objects.create(part_number=2, full_part_number="ASM2", price=0)
+        pcba = Pcba.objects.create(part_number=1, full_part_number="PCBA1")
+
+        # Committed before the match, like lines uploaded in an earlier request
+        with self.captureOnCommitCallbacks(execute=True):
+            lines = {
+                mpn: Bom_item.objects.create(bom=self.bom, temporary_mpn=mpn, designator=mpn)
+                for mpn in ["PRT1", "ASM2", "PCBA1", "RC0603", "UNKNOWN"]
+            }
+        response = self.match()
+        self.assertEqual(response.status_code, 200)
+
+        for mpn, expected in [
+            ("PRT1", {"part": part}), ("ASM2", {"assembly": sub}),
+            ("PCBA1", {"pcba": pcba}), ("RC0603", {"part": latest_revision}),
+        ]:
+            line = Bom_item.objects.get(id=lines[mpn].id)
+            for field, value in expected.items():
+                self.assertEqual(getattr(line, field), value)
+        self.assertNotEqual(Bom_item.objects.get(id=lines["RC0603"].id).part, old_revision)
+        self.assertIsNone(Bom_item.objects.get(id=lines["UNKNOWN"].id).part)
+
+        events = TraceabilityEvent.objects.filter(bom_id=self.bom.id, event_type="bom_imported")
+        self.assertEqual(events.count(), 4)
+        self.assertTrue(events.filter(new_value="RC0603 → PRT2B").exists())
+        self.assertEqual(get_bom_explosion("assemblies", self.assembly.id).count(), 4)
+
+    def test_rank_mpn_candidates(self):
+        part = Part.objects.create(part_number=1, full_part_number="PRT1", mpn="LM317T", is_latest_revision=True)
+        Part.objects.create(part_number=1, full_part_number="PRT1A", mpn="LM317T", is_latest_revision=False)
+        line = Bom_item.objects.create(bom=self.bom, temporary_mpn="lm317t/tr")
+        unknown = Bom_item.objects.create(bom=self.bom, temporary_mpn="XYZ")
+
+        bom_items = list(Bom_item.objects.filter(bom=self.bom))
+        has_trigram_extension()
+        with self.assertNumQueries(1):  # The whole BOM is resolved at once
+            candidates = rank_mpn_candidates(bom_items, limit=3)
+        self.assertEqual([candidate["id"] for candidate in candidates[line.id]], [part.id])
+        self.assertEqual(candidates[unknown.id], [])
+
+    def test_10k_rows_use_a_fixed_number_of_queries(self):
+        """Benchmark: 10k imported lines, matched by full part number and by MPN."""
+        Part.objects.bulk_create(
+            Part(part_number=i, full_part_number=f"PRT{i}", mpn=f"MPN{i}", is_latest_revision=True)
+            for i in range(5000)
+        )
+        Bom_item.objects.bulk_create(
+            Bom_item(bom=self.bom, designator=f"R{i}", temporary_mpn=f"PRT{i}" if i % 2 else f"MPN{i}")
+            for i in range(10000)
+        )
+
+        with self.assertNumQueriesLessThan(60):
+            response = self.match()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Bom_item.objects.filter(bom=self.bom, part__isnull=False).count(), 5000)
+        self.assertEqual(TraceabilityEvent.objects.filter(bom_id=self.bom.id).count(), 5000)
+
+    def assertNumQueriesLessThan(self, maximum):
+        test = self
+
+        class _Context(CaptureQueriesContext):
+            def __exit__(self, exc_type, exc_value, traceback):
+                super().__exit__(exc_type, exc_value, traceback)
+                if exc_type is None:
+                    test.assertLess(len(self), maximum)
+
+        return _Context(connection)
+
+
+class BomImportTests(TestCase):
+    data_dir = Path(__file__).resolve().parents[2] / "tests" / "data"
+
+    def test_semicolon_fixture(self):
+        with open(self.data_dir / "excel-semi-column.csv", "rb") as upload:
+            rows = list(iter_csv_rows(upload))
+        self.assertEqual([row["MPN"] for row in rows], ["1234", "4312"])
+        self.assertEqual(rows[0]["REF"], "c1,c2")
+
+    def test_detects_encoding(self):
+        text = "Reference;MPN;QUANTITY\nR1;10µF;2\n"
+        for encoding in ["utf-8", "utf-8-sig", "utf-16", "cp1252"]:
+            rows = list(iter_csv_rows(io.BytesIO(text.encode(encoding))))
+            self.assertEqual(rows, [{"Reference": "R1", "MPN": "10µF", "QUANTITY": "2"}], encoding)
+
+    def test_import_in_batches(self):
+        part = Part.objects.create(part_number=1, full_part_number="PRT1")
+        bom = Assembly_bom.objects.create()
+        Bom_item.objects.create(bom=bom, temporary_mpn="OLD")
+        upload = io.BytesIO(
+            ("Reference,MPN,QUANTITY,DNP\n" + "".join(f"R{i},PRT1,2,{'x' if i == 0 else ''}\n" for i in range(5))).encode()
+        )
+
+        self.assertEqual(import_bom_rows(bom, iter_csv_rows(upload), batch_size=2), 5)
+        items = Bom_item.objects.filter(bom=bom).order_by("id")
+        self.assertEqual([item.designator for item in items], [f"R{i}" for i in range(5)])
+        self.assertTrue(all(item.part_id == part.id and item.quantity == 2 for item in items))
+        self.assertEqual([item.is_mounted for item in items], [False, True, True, True, True])
+
+        self.assertEqual(import_bom_rows(bom, iter([])), 0)
+        self.assertEqual(Bom_item.objects.filter(bom=bom).count(), 5)
+
+
+class BOMCostCalculatorTests(TestCase):
+    def setUp(self):
+        self.calculator = BOMCostCalculator("USD", {"USD": 1.0, "EUR": 0.5})
+        self.calculator.price_tree = {
+            ("part", 1): {
+                "app": "part", "id": 1, "quantity": 3,
+                "price_data": [
+                    {"price": 2.0, "minimum_order_quantity": 1, "currency": "USD"},
+                    {"price": 1.5, "minimum_order_quantity": 100, "currency": "USD"},
+                    {"price": 1.0, "minimum_order_quantity": 1000, "currency": "EUR"},
+                ],
+            },
+            ("part", 2): {
+                "app": "part", "id": 2, "quantity": 0.5,
+                "price_data": [{"price": 10.0, "minimum_order_quantity": 50, "currency": "USD"}],
+            },
+            ("assembly", 1): {
+                "app": "assembly", "id": 1, "quantity": 2, "price_data": [],
+                "bom_cost_data": {
+                    ("part", 1): {
+                        "app": "part", "id": 1, "quantity": 4,
+                        "price_data": [
+                            {"price": 2.0, "minimum_order_quantity": 1, "currency": "USD"},
+                            {"price": 1.5, "minimum_order_quantity": 100, "currency": "USD"},
+                            {"price": 1.0, "minimum_order_quantity": 1000, "currency": "EUR"},
+                        ],
+                    },
+                },
+            },
+        }
+        self.calculator.flatten_bom()
+        self.calculator.calculate_aggregated_cost_breaks()
+
+    def expected_cost(self, quantity):
+        """Item by item evaluation with select_best_price."""
+        total_cost = 0.0
+        for details in self.calculator.flat_bom.values():
+            required = quantity * details["quantity"]
+            best_price = self.calculator.select_best_price(details["price_data"], required)
+            if best_price:
+                price = self.calculator._convert_currency(best_price["price"], best_price["currency"])
+                total_cost += price * max(required, best_price["minimum_order_quantity"])
+        return total_cost
+
+    def test_flatten_aggregates_quantities(self):
+        self.assertEqual(self.calculator.flat_bom[("part", 1)]["quantity"], 11)
+        self.assertEqual(self.calculator.cost_break_quantitites, [1, 9, 90, 100])
+
+    def test_cost_breaks_match_item_by_item_evaluation(self):
+        quantities = [1, 9, 10, 90, 100, 1000]
+        costs = self.calculator.calculate_bom_cost_breaks(quantities)
+        for quantity, cost in zip(quantities, costs):
+            self.assertAlmostEqual(cost, self.expected_cost(quantity))
+        self.assertAlmostEqual(self.calculator.calculate_bom_cost(1), 22 + 500)
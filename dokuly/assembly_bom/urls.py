@@ -4,6 +4,7 @@ from rest_framework import routers
 from .api import Assembly_bomViewset
 from . import views
 from . import viewsBomitems
+from . import viewsBomExport
 
 router = routers.DefaultRouter()
 router.register("api/assembly_bom", Assembly_bomViewset, "assembly_bom")
@@ -45,16 +46,28 @@ urlpatterns = [
         "api/assembly_bom/<int:bomId>/matchItemsWithParts/",
         viewsBomitems.match_bom_items_with_parts,
     ),
+    path(
+        "api/assembly_bom/<int:bomId>/matchCandidates/",
+        viewsBomitems.get_bom_match_candidates,
+    ),
     # Views for BOM Cost
     path(
         "api/assembly_bom/get/bomCost/<str:app>/<int:id>/",
         viewsBomCost.get_bom_cost,
     ),
+    path(
+        "api/assembly_bom/export/<str:app>/<int:item_id>/<str:export_format>/",
+        viewsBomExport.export_bom,
+    ),
     # Where Used functionality
     path(
         "api/assembly_bom/whereUsed/<str:app>/<int:item_id>/",
         views.get_where_used,
     ),
+    path(
+        "api/assembly_bom/whereUsed/<str:app>/<int:item_id>/allLevels/",
+        views.get_where_used_all_levels,
+    ),
 ]
 
 urlpatterns += router.urls
@@ -10,6 +10,7 @@ from pcbas.models import Pcba
 from parts.models import Part
 from assemblies.models import Assembly
 from .models import Assembly_bom
+from .bom_explosion import get_where_used as get_exploded_where_used
 from pcbas.serializers import PcbaSerializer
 from .serializers import Assembly_bomSerializer
 from assemblies.serializers import AssemblySerializer
@@ -329,3 +330,75 @@ def get_where_used(request, app, item_id):
             f"get_where_used failed: {e}",
             status=status.HTTP_500_INTERNAL_SERVER_ERROR,
         )
+
+
+@api_view(("GET",))
+@renderer_classes((JSONRenderer,))
+@login_required(login_url="/login")
+def get_where_used_all_levels(request, app, item_id):
+    """
+    Get every assembly and PCBA using a part, assembly or PCBA, at any level of their BOM.
+    Quantities are accumulated through the BOM tree, and summed when the item is found in several branches.
+
+    Query parameters:
+    - latest_only: If true, only show usage in latest revisions (default: true)
+    - max_depth: Only show ancestors using the item within this many levels (default: all levels)
+    """
+    permission, response = check_user_auth_and_app_permission(request, "assemblies")
+    if not permission:
+        return response
+
+    if item_id is None or item_id == -1:
+        return Response("Invalid item id", status=status.HTTP_400_BAD_REQUEST)
+    if app not in ("parts", "pcbas", "assemblies"):
+        return Response(f"Invalid app: {app}", status=status.HTTP_400_BAD_REQUEST)
+
+    latest_only = request.GET.get('latest_only', 'true').lower() == 'true'
+
+    try:
+        max_depth = request.GET.get('max_depth', None)
+        max_depth = int(max_depth) if max_depth else None
+
+        where_used = get_exploded_where_used(app, [item_id], max_depth=max_depth)
+
+        usage_by_parent = {}
+        for row in where_used:
+            if row['root_assembly_id']:
+                key = ('assembly', row['root_assembly_id'])
+            else:
+                key = ('pcba', row['root_pcba_id'])
+            usage_by_parent[key] = (row['total_quantity'], row['min_depth'])
+
+        parents = []
+        for parent_type, model_cls in (('assembly', Assembly), ('pcba', Pcba)):
+            parent_ids = [parent_id for (kind, parent_id) in usage_by_parent if kind == parent_type]
+            if not parent_ids:
+                continue
+            parent_qs = model_cls.objects.filter(id__in=parent_ids)
+            if latest_only:
+                parent_qs = parent_qs.filter(is_latest_revision=True)
+            for parent in parent_qs.only(
+                'id', 'full_part_number', 'display_name', 'release_state',
+                'is_latest_revision', 'thumbnail',
+            ):
+                total_quantity, depth = usage_by_parent[(parent_type, parent.id)]
+                parents.append({
+                    'parent_type': parent_type,
+                    'id': parent.id,
+                    'full_part_number': parent.full_part_number,
+                    'display_name': parent.display_name,
+                    'release_state': parent.release_state,
+                    'is_latest_revision': parent.is_latest_revision,
+                    'thumbnail': parent.thumbnail_id,
+                    'total_quantity': total_quantity,
+                    'depth': depth,
+                })
+
+        parents.sort(key=lambda parent: (parent['depth'], parent['full_part_number'] or ''))
+        return Response(parents, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        return Response(
+            f"get_where_used_all_levels failed: {e}",
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        )
@@ -3,8 +3,13 @@ from rest_framework.response import Response
 from rest_framework import status
 from django.contrib.auth.decorators import login_required
 from rest_framework.renderers import JSONRenderer
+from django.db.models import Q
+import numpy as np
 
-from .models import Bom_item
+from django.utils.http import http_date, parse_etags, quote_etag
+
+from .bom_explosion import child_path, get_bom_explosion, group_by_path
+from .bom_cost_cache import get_cached_bom_cost, rates_fingerprint, store_bom_cost
 from purchasing.priceModel import Price
 from organizations.models import Organization
 from profiles.views import check_user_auth_and_app_permission
@@ -24,90 +29,106 @@ class BOMCostCalculator:
     def build_price_tree(self, app, id):
         self.price_tree = self.build_cost_data(app, id)
 
-    def build_cost_data(self, app, id, visited=None):
-        """Build an object with the necessary data to calculate cost at different quantities."""
-        if visited is None:
-            visited = set()
-
-        if (app, id) in visited:
+    def build_cost_data(self, app, id):
+        """Build an object with the necessary data to calculate cost at different quantities.
+        The exploded BOM and the latest prices of all its items are read in two queries,
+        and the tree is walked in memory."""
+        try:
+            root_app = "pcbas" if app == "pcba" else "assemblies"
+            rows = list(get_bom_explosion(root_app, id))
+            prices_by_item = self.load_latest_prices(rows)
+            return self.build_cost_data_level(group_by_path(rows), "", app, prices_by_item)
+        except Exception as e:
+            print(f"build_cost_data failed: {e}")
             return {}
 
-        visited.add((app, id))
-        cost_data = {}
-
-        try:
-            bom_items_query = Bom_item.objects.all().select_related(
-                "part", "pcba", "assembly"
+    def load_latest_prices(self, rows):
+        """Fetch the latest prices of every item in the exploded rows with a single query.
+
+        Returns a dict keyed by (app, id). Items with latest prices are always present, also when
+        none of their prices are valid, so that they are not expanded.
+        """
+        part_ids = {row.part_id for row in rows if row.part_id}
+        pcba_ids = {row.pcba_id for row in rows if row.pcba_id}
+        assembly_ids = {row.assembly_id for row in rows if row.assembly_id}
+
+        prices_by_item = {}
+        if not (part_ids or pcba_ids or assembly_ids):
+            return prices_by_item
+
+        prices = Price.objects.filter(
+            Q(part_id__in=part_ids) | Q(pcba_id__in=pcba_ids) | Q(assembly_id__in=assembly_ids),
+            is_latest_price=True,
+        ).values_list("part_id", "pcba_id", "assembly_id", "price", "minimum_order_quantity", "currency")
+
+        for part_id, pcba_id, assembly_id, price, minimum_order_quantity, currency in prices.order_by("id"):
+            if part_id in part_ids:
+                key = ("part", part_id)
+            elif pcba_id in pcba_ids:
+                key = ("pcba", pcba_id)
+            else:
+                key = ("assembly", assembly_id)
+            price_data = prices_by_item.setdefault(key, [])
+
+            # Require price and currency to be set
+            if price is None or currency is None or currency == "":
+                continue
+            price_data.append(
+                {
+                    "price": price,
+                    "minimum_order_quantity": minimum_order_quantity,
+                    "currency": currency,
+                }
             )
+        return prices_by_item
 
-            bom_items = []
-            if app == "assembly":
-                bom_items = bom_items_query.filter(bom__assembly_id=id)
-            elif app == "pcba":
-                bom_items = bom_items_query.filter(bom__pcba__id=id).exclude(
-                    is_mounted=False
-                )
+    def build_cost_data_level(self, rows_by_path, path, app, prices_by_item):
+        """Build the cost data of the BOM found at path in the exploded tree."""
+        cost_data = {}
+        for item in rows_by_path.get(path, []):
+            # Unmounted items are not part of the cost of a PCBA
+            if app == "pcba" and not item.is_mounted:
+                continue
+
+            item_id = None
+            app_type = None
+            if item.part_id:
+                item_id = item.part_id
+                app_type = "part"
+            elif item.pcba_id:
+                item_id = item.pcba_id
+                app_type = "pcba"
+            elif item.assembly_id:
+                item_id = item.assembly_id
+                app_type = "assembly"
+
+            if item_id:
+                has_prices = (app_type, item_id) in prices_by_item
+                price_data = prices_by_item.get((app_type, item_id), [])
+
+                # Store the price data for this item, with the quantity of this BOM line
+                cost_data[(app_type, item_id)] = {
+                    "app": app_type,
+                    "id": item_id,
+                    "quantity": item.bom_item.quantity,
+                    "price_data": price_data,
+                }
 
-            for item in bom_items:
-                item_id = None
-                app_type = None
-                if item.part:
-                    item_id = item.part.id
-                    app_type = "part"
-                elif item.pcba:
-                    item_id = item.pcba.id
-                    app_type = "pcba"
-                elif item.assembly:
-                    item_id = item.assembly.id
-                    app_type = "assembly"
-
-                if item_id:
-                    prices = Price.objects.filter(
-                        **{f"{app_type}__id": item_id}, is_latest_price=True
-                    )
-                    price_data = []
-                    for price in prices:
-                        # Require price and currency to be set
-                        if (
-                            price.price is None
-                            or price.currency is None
-                            or price.currency == ""
-                        ):
-                            continue
-                        price_data.append(
-                            {
-                                "price": price.price,
-                                "minimum_order_quantity": price.minimum_order_quantity,
-                                "currency": price.currency,
-                            }
+                # If no direct price, recurse into its BOM
+                if not has_prices or (app_type == "part" and not price_data):
+                    if app_type != "part":  # Recurse only if it's not a part
+                        cost_data[(app_type, item_id)]["bom_cost_data"] = self.build_cost_data_level(
+                            rows_by_path, child_path(item), app_type, prices_by_item
                         )
+                    elif app_type == "part":
+                        self.parts_missing_price.append(item_id)
 
-                    # Store the price data for this item
-                    cost_data[item_id] = {
-                        "app": app_type,
-                        "id": item_id,
-                        "quantity": item.quantity,
-                        "price_data": price_data,
-                    }
-
-                    # If no direct price, recurse into its BOM
-                    if not prices.exists() or (app_type == "part" and not price_data):
-                        if app_type != "part":  # Recurse only if it's not a part
-                            cost_data[item_id]["bom_cost_data"] = self.build_cost_data(
-                                app_type, item_id, visited
-                            )
-                        elif app_type == "part":
-                            self.parts_missing_price.append(item_id)
-
-            return cost_data
-
-        except Exception as e:
-            print(f"build_cost_data failed: {e}")
-            return {}
+        return cost_data
 
     def flatten_bom(self):
         """Flatten the BOM cost data to a single-level dictionary."""
         self.flat_bom = self.flatten_bom_recursive()
+        self.build_price_matrix()
 
     def flatten_bom_recursive(self, node=None, multiplier=1, flat_bom=None):
         if node is None:
@@ -115,16 +136,16 @@ class BOMCostCalculator:
         if flat_bom is None:
             flat_bom = {}  # Initialize the flat BOM
 
-        for item_id, details in node.items():
+        for item_key, details in node.items():
             quantity = details["quantity"] * multiplier
-            if item_id in flat_bom:
-                flat_bom[item_id][
+            if item_key in flat_bom:
+                flat_bom[item_key][
                     "quantity"
                 ] += quantity  # Aggregate quantity for existing components
             else:
-                flat_bom[item_id] = {
+                flat_bom[item_key] = {
                     "app": details["app"],
-                    "id": item_id,
+                    "id": details["id"],
                     "quantity": quantity,
                     "price_data": details["price_data"],
                 }
@@ -136,7 +157,7 @@ class BOMCostCalculator:
 
     def calculate_aggregated_cost_breaks(self):
         cost_breaks = set()
-        for item_id, details in self.flat_bom.items():
+        for item_key, details in self.flat_bom.items():
             for price_info in details["price_data"]:
                 minimum_order_quantity = price_info.get("minimum_order_quantity", 0)
                 # Calculate cost break considering the total aggregated quantity
@@ -145,28 +166,74 @@ class BOMCostCalculator:
         self.cost_break_quantitites = sorted(list(cost_breaks))
         return cost_breaks
 
-    def calculate_bom_cost(self, quantity=1):
-        """Calculates the total cost of the BOM based on aggregated price data and given quantity."""
-        total_cost = 0.0
-        for item_id, details in self.flat_bom.items():
-            best_price = self.select_best_price(
-                details["price_data"], quantity * details["quantity"]
-            )
-            if best_price:
-                converted_price = self._convert_currency(
-                    best_price["price"], best_price["currency"]
+    def build_price_matrix(self):
+        """Build the price data of the flat BOM as NumPy arrays, one row per item.
+
+        Items have a varying number of prices, rows are padded with an infinite MOQ.
+        Sets:
+            item_quantities: Quantity of each item per BOM, shape (items,)
+            price_counts: Number of prices of each item, shape (items,)
+            moq_matrix: Minimum order quantity of each price, shape (items, prices)
+            price_matrix: Price in the organization currency, shape (items, prices)
+        """
+        items = list(self.flat_bom.values())
+        max_prices = max((len(details["price_data"]) for details in items), default=0)
+        max_prices = max(max_prices, 1)
+
+        self.item_quantities = np.array([details["quantity"] for details in items], dtype=float)
+        self.price_counts = np.array([len(details["price_data"]) for details in items], dtype=int)
+        self.moq_matrix = np.full((len(items), max_prices), np.inf)
+        self.price_matrix = np.zeros((len(items), max_prices))
+
+        for row, details in enumerate(items):
+            if not details["price_data"]:
+                # A single zero price, keeps the items without prices out of the MOQ padding
+                self.moq_matrix[row, 0] = 1
+            for column, price_info in enumerate(details["price_data"]):
+                minimum_order_quantity = price_info["minimum_order_quantity"]
+                self.moq_matrix[row, column] = (
+                    minimum_order_quantity if minimum_order_quantity is not None else 1
+                )
+                self.price_matrix[row, column] = self._convert_currency(
+                    price_info["price"], price_info["currency"]
                 )
 
-                if (
-                    quantity * details["quantity"]
-                    < best_price["minimum_order_quantity"]
-                ):
-                    total_cost += converted_price * best_price["minimum_order_quantity"]
-                    continue
+    def calculate_bom_cost_breaks(self, quantities):
+        """Calculates the total cost of the BOM for several quantities at once.
+
+        Evaluates select_best_price for every item and quantity together, with one row per item
+        and one column per quantity. Returns an array with the total cost of each quantity.
+        """
+        quantities = np.asarray(quantities, dtype=float)
+        if len(self.item_quantities) == 0:
+            return np.zeros(len(quantities))
+
+        # Required quantity of each item for each BOM quantity, shape (items, quantities)
+        required = self.item_quantities[:, None] * quantities[None, :]
+
+        # The price with the highest MOQ that's still less than or equal to the required quantity
+        moqs = self.moq_matrix[:, None, :]
+        applicable = moqs <= required[:, :, None]
+        best_applicable = np.where(applicable, moqs, -np.inf).argmax(axis=2)
+        # Lowest MOQ price if no price is applicable
+        lowest_moq = np.broadcast_to(self.moq_matrix.argmin(axis=1)[:, None], required.shape)
+        best_index = np.where(applicable.any(axis=2), best_applicable, lowest_moq)
 
-                total_cost += converted_price * quantity * details["quantity"]
+        best_moq = np.take_along_axis(self.moq_matrix, best_index, axis=1)
+        best_price = np.take_along_axis(self.price_matrix, best_index, axis=1)
 
-        return total_cost
+        # Order the MOQ if the required quantity is below it
+        cost = best_price * np.where(required < best_moq, best_moq, required)
+
+        # Items without prices cost nothing. Items with several prices cost nothing if not required.
+        price_counts = self.price_counts[:, None]
+        cost[(price_counts == 0) | ((price_counts > 1) & (required <= 0))] = 0.0
+
+        return cost.sum(axis=0)
+
+    def calculate_bom_cost(self, quantity=1):
+        """Calculates the total cost of the BOM based on aggregated price data and given quantity."""
+        return float(self.calculate_bom_cost_breaks([quantity])[0])
 
     def select_best_price(self, price_data, required_quantity):
         """Selects the price with the highest MOQ that's still less than or equal to the required quantity."""
@@ -210,11 +277,62 @@ class BOMCostCalculator:
         return 0.0
 
 
+def compute_bom_cost(organization, app, id):
+    """Cost rollup of an assembly or pcba, as returned by get_bom_cost.
+
+    Args:
+        organization: Organization whose currency the cost is calculated in
+        app: "assembly" or "pcba"
+        id: ID of the root item
+    """
+    calculator = BOMCostCalculator(
+        organization.currency, organization.currency_conversion_rates
+    )
+    calculator.build_price_tree(app, id)
+    calculator.flatten_bom()
+    calculator.calculate_aggregated_cost_breaks()
+
+    # go through calculator.cost_break_quantitites and calculate the cost for each quantity
+    # make dict array of quantity:number and cost: number
+    # All cost breaks are evaluated together, one column per quantity
+    total_costs = calculator.calculate_bom_cost_breaks(calculator.cost_break_quantitites)
+    price_breaks = []
+    for quantity, total_cost in zip(calculator.cost_break_quantitites, total_costs):
+        total_cost = float(total_cost)
+        unit_cost = total_cost / quantity
+        price_breaks.append(
+            {"quantity": quantity, "total_cost": total_cost, "unit_cost": unit_cost}
+        )
+
+    # Fetch detailed information for parts missing prices
+    parts_missing_price_details = []
+    if calculator.parts_missing_price:
+        # Get unique part IDs
+        unique_part_ids = list(set(calculator.parts_missing_price))
+        parts = Part.objects.filter(id__in=unique_part_ids)
+        serializer = PartSerializer(parts, many=True)
+        parts_missing_price_details = serializer.data
+
+    return {
+        "currency": organization.currency,
+        "parts_missing_price": calculator.parts_missing_price,
+        "parts_missing_price_details": parts_missing_price_details,
+        "price_breaks": price_breaks,
+        "price_break_quantitites": calculator.cost_break_quantitites,
+    }
+
+
 @api_view(("GET",))
 @renderer_classes((JSONRenderer,))
 @login_required(login_url="/login")
 def get_bom_cost(request, app, id):
-    """Recursevly calculate the cost of a BOM. The cost is calculated in the currency of the organization."""
+    """Recursevly calculate the cost of a BOM. The cost is calculated in the currency of the organization.
+
+    Rollups are cached until a bom item, price or conversion rate they depend on changes.
+    The response carries an ETag, and "computed_at" tells when the rollup was calculated.
+    Requests with a matching If-None-Match header get a 304 without a body.
+    Add ?refresh=true to recalculate regardless of the cache.
+    """
     permission, response = check_user_auth_and_app_permission(request, "assemblies")
     if not permission:
         return response
@@ -228,48 +346,31 @@ def get_bom_cost(request, app, id):
         if app != "assemblies" and app != "pcbas":
             return Response("Invalid app", status=status.HTTP_400_BAD_REQUEST)
 
-        if app == "pcbas":
-            app = "pcba"
-        elif app == "assemblies":
-            app = "assembly"
-
         # Get updated currency conversion rates
         organization = Organization.objects.get(id=1)   # TODO hardcoded org ID, need to change
-
-        calculator = BOMCostCalculator(
+        fingerprint = rates_fingerprint(
             organization.currency, organization.currency_conversion_rates
         )
-        calculator.build_price_tree(app, id)
-        calculator.flatten_bom()
-        calculator.calculate_aggregated_cost_breaks()
-
-        # go through calculator.cost_break_quantitites and calculate the cost for each quantity
-        # make dict array of quantity:number and cost: number
-        price_breaks = []
-        for quantity in calculator.cost_break_quantitites:
-            total_cost = calculator.calculate_bom_cost(quantity)
-            unit_cost = total_cost / quantity
-            price_breaks.append(
-                {"quantity": quantity, "total_cost": total_cost, "unit_cost": unit_cost}
+
+        cached = None
+        if request.GET.get("refresh", "false").lower() != "true":
+            cached = get_cached_bom_cost(app, id, fingerprint)
+        if cached is None:
+            data = compute_bom_cost(
+                organization, "pcba" if app == "pcbas" else "assembly", id
             )
+            cached = store_bom_cost(app, id, fingerprint, data)
 
-        # Fetch detailed information for parts missing prices
-        parts_missing_price_details = []
-        if calculator.parts_missing_price:
-            # Get unique part IDs
-            unique_part_ids = list(set(calculator.parts_missing_price))
-            parts = Part.objects.filter(id__in=unique_part_ids)
-            serializer = PartSerializer(parts, many=True)
-            parts_missing_price_details = serializer.data
-
-        data = {
-            "currency": organization.currency,
-            "parts_missing_price": calculator.parts_missing_price,
-            "parts_missing_price_details": parts_missing_price_details,
-            "price_breaks": price_breaks,
-            "price_break_quantitites": calculator.cost_break_quantitites,
+        headers = {
+            "ETag": quote_etag(cached.etag),
+            "Last-Modified": http_date(cached.computed_at.timestamp()),
         }
-        return Response(data, status=status.HTTP_200_OK)
+        if_none_match = parse_etags(request.META.get("HTTP_IF_NONE_MATCH", ""))
+        if cached.etag in if_none_match or "*" in if_none_match:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        data = dict(cached.data, computed_at=cached.computed_at)
+        return Response(data, status=status.HTTP_200_OK, headers=headers)
 
     except Exception as e:
         return Response(f"get_bom_cost failed: {e}", status=status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,90 @@
+from rest_framework.decorators import api_view, renderer_classes, permission_classes
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework import status
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+
+from assemblies.models import Assembly
+from pcbas.models import Pcba
+from organizations.permissions import APIAndProjectAccess
+from .bom_export import EXPORT_FORMATS, EXPORT_WRITERS, iter_bom_export_rows
+from .bom_snapshot import iter_snapshot_export_rows
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_id='export_bom',
+    operation_description="""
+    Export the fully exploded, multi-level BOM of an assembly or PCBA.
+
+    The export is streamed while it is generated, and contains one row per BOM line at every
+    level of the tree, with the columns:
+    `level`, `path`, `parent`, `designator`, `item_type`, `full_part_number`, `display_name`,
+    `mpn`, `manufacturer`, `quantity`, `total_quantity`, `is_mounted`, `unit_price`, `currency`, `comment`.
+
+    `quantity` is the quantity in the parent BOM, `total_quantity` the quantity per root item.
+    `unit_price` is the latest price with the lowest minimum order quantity, in `currency`.
+
+    **Formats:** `csv`, `xlsx` or `ndjson` (one JSON object per line).
+    """,
+    tags=['assemblies', 'pcbas'],
+    produces=list(EXPORT_FORMATS.values()),
+    responses={
+        200: openapi.Response(
+            description='BOM export',
+            schema=openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_BINARY),
+        ),
+        400: openapi.Response(description='Unknown export format'),
+        401: openapi.Response(description='Unauthorized - invalid API key or no project access'),
+        404: openapi.Response(description='Item not found'),
+    },
+    security=[{'Token': []}, {'Api-Key': []}]
+)
+@api_view(("GET",))
+@renderer_classes((JSONRenderer,))
+@permission_classes([IsAuthenticated | APIAndProjectAccess])
+def export_bom(request, app, item_id, export_format, **kwargs):
+    """Stream the multi-level BOM of an assembly or pcba as CSV, XLSX or NDJSON."""
+    if app not in ("assemblies", "pcbas"):
+        return Response("Invalid app", status=status.HTTP_400_BAD_REQUEST)
+    if export_format not in EXPORT_FORMATS:
+        return Response(
+            f"Invalid format, use one of: {', '.join(EXPORT_FORMATS)}",
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    model = Assembly if app == "assemblies" else Pcba
+    try:
+        item = model.objects.only(
+            "id", "project_id", "full_part_number", "part_number", "release_state"
+        ).get(pk=item_id)
+    except model.DoesNotExist:
+        return Response("Item not found", status=status.HTTP_404_NOT_FOUND)
+
+    if APIAndProjectAccess.has_validated_key(request):
+        if item.project_id is not None and not APIAndProjectAccess.check_project_access(request, item.project_id):
+            return Response(
+                "Not authorized - no access to this project",
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+    elif not model.objects.filter(
+        Q(project__project_members=request.user) | Q(project__isnull=True), pk=item_id
+    ).exists():
+        return Response("Not authorized - no access to this project", status=status.HTTP_401_UNAUTHORIZED)
+
+    rows = None
+    if item.release_state == "Released":
+        # Released BOMs are frozen, export them from their snapshot
+        rows = iter_snapshot_export_rows(app, item.id)
+    if rows is None:
+        rows = iter_bom_export_rows(app, item.id)
+    response = StreamingHttpResponse(
+        EXPORT_WRITERS[export_format](rows), content_type=EXPORT_FORMATS[export_format]
+    )
+    file_name = (item.full_part_number or f"{app}_{item.part_number}").replace(" ", "_")
+    response["Content-Disposition"] = f'attachment; filename="{file_name}_bom.{export_format}"'
+    return response
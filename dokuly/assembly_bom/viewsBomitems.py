@@ -12,7 +12,10 @@ from .serializers import Assembly_bomSerializer, BomItemSerializer
 from django.db import transaction
 from .models import Assembly_bom, Part, Pcba, Assembly, Bom_item
 from profiles.views import check_user_auth_and_app_permission
-from traceability.utilities import log_bom_change
+from traceability.utilities import log_bom_change, log_bom_changes
+from .bom_explosion import bom_owner_key, schedule_bom_explosion_refresh
+from .bom_matching import match_bom_items, rank_mpn_candidates
+from .bom_snapshot import decode_bom_snapshot, snapshot_response, with_snapshot_data
 from parts.views import fetch_all_prices
 from parts.serializers import BomPartSerializer, SimpleAsmSerializer, SimplePcbaSerializer
 from purchasing.serializers import PriceSerializer
@@ -104,12 +107,19 @@ def get_bom_items_by_pcba_id(request, pcba_id):
 
 
 def _fetch_linked_parts_response(user, assembly_ids, part_ids, pcba_ids):
-    """Build the same structure as parts.views.get_bom_items for linked parts/assemblies/pcbas with prices."""
+    """Build the same structure as parts.views.get_bom_items for linked parts/assemblies/pcbas with prices.
+
+    Items are limited to the projects of the user, pass user=None for all items.
+    """
+    if user is not None:
+        project_access = Q(project__project_members=user) | Q(project__isnull=True)
+    else:
+        project_access = Q()
     res = {}
     if assembly_ids:
         asmsQs = (
             Assembly.objects.filter(
-                (Q(project__project_members=user) | Q(project__isnull=True)),
+                project_access,
                 id__in=assembly_ids,
                 is_archived=False,
             )
@@ -136,7 +146,7 @@ def _fetch_linked_parts_response(user, assembly_ids, part_ids, pcba_ids):
     if part_ids:
         partQs = (
             Part.objects.filter(
-                (Q(project__project_members=user) | Q(project__isnull=True)),
+                project_access,
                 Q(is_archived=False) | Q(is_archived=None),
                 id__in=part_ids,
             )
@@ -165,7 +175,7 @@ def _fetch_linked_parts_response(user, assembly_ids, part_ids, pcba_ids):
     if pcba_ids:
         pcbaQs = (
             Pcba.objects.filter(
-                (Q(project__project_members=user) | Q(project__isnull=True)),
+                project_access,
                 id__in=pcba_ids,
                 is_archived__in=[False, None],
             )
@@ -212,13 +222,15 @@ def get_bom_items_with_linked_parts(request, app, item_id):
         return Response("Unauthorized", status=status.HTTP_401_UNAUTHORIZED)
 
     try:
-        if app == "assemblies":
-            bom, created = Assembly_bom.objects.get_or_create(assembly_id=item_id)
-        else:
-            bom, created = Assembly_bom.objects.get_or_create(pcba__id=item_id)
-            if created:
-                bom.pcba_id = item_id
-                bom.save()
+        owner = {"assembly_id": item_id} if app == "assemblies" else {"pcba_id": item_id}
+        boms = Assembly_bom.objects.filter(**owner).order_by("id")
+        bom = with_snapshot_data(boms, app, item_id).first()
+        if bom is None:
+            bom = Assembly_bom.objects.create(**owner)
+        elif bom.snapshot_data is not None:
+            # Released BOMs are frozen, serve them from their snapshot
+            snapshot = decode_bom_snapshot(bom.snapshot_data)
+            return Response(snapshot_response(snapshot, user), status=status.HTTP_200_OK)
 
         bom_items = Bom_item.objects.filter(bom=bom).select_related("part", "pcba", "assembly")
         bom_items_data = BomItemSerializer(bom_items, many=True).data
@@ -593,99 +605,42 @@ def match_bom_items_with_parts(request, bomId):
         return response
 
     try:
-        bom_items = Bom_item.objects.filter(bom_id=bomId)
-
-        for bom_item in bom_items:
-            # if part is already matched, skip
-            if bom_item.part or bom_item.assembly or bom_item.pcba:
-                continue
-
-            if bom_item.temporary_mpn is None:
-                continue
-
-            # Match by full_part_number (which includes revision)
-            temporary_mpn = bom_item.temporary_mpn
-
-            # Attempt to match with Part
-            part_match = Part.objects.filter(
-                full_part_number=temporary_mpn
-            ).first()
-
-            # Attempt to match with Assembly if no Part match
-            assembly_match = (
-                Assembly.objects.filter(
-                    full_part_number=temporary_mpn
-                ).first()
-                if not part_match
-                else None
-            )
-
-            # Attempt to match with Pcba if no Part or Assembly match
-            pcba_match = (
-                Pcba.objects.filter(
-                    full_part_number=temporary_mpn
-                ).first()
-                if not part_match and not assembly_match
-                else None
-            )
+        bom_items = list(Bom_item.objects.filter(bom_id=bomId))
+        matched = match_bom_items(bom_items)
+
+        if matched:
+            with transaction.atomic():
+                Bom_item.objects.bulk_update(
+                    [bom_item for bom_item, _ in matched],
+                    ["part", "assembly", "pcba"],
+                    batch_size=1000,
+                )
 
-            part_match_latest = None
-            # If no match found yet, try to find a Part with is_latest_revision=True
-            if not part_match and not assembly_match and not pcba_match:
-                part_match_latest = Part.objects.filter(
-                    mpn=bom_item.temporary_mpn, is_latest_revision=True
-                ).first()
-                if part_match_latest:
-                    bom_item.part = part_match_latest
-            else:
-                # Update bom_item with the first match found
-                if part_match:
-                    bom_item.part = part_match
-                elif assembly_match:
-                    bom_item.assembly = assembly_match
-                elif pcba_match:
-                    bom_item.pcba = pcba_match
-
-            # Save changes if there's a match; log "add bom item" (temp → actual)
-            if part_match or assembly_match or pcba_match or part_match_latest:
-                bom_item.save()
-                part_or_latest = part_match or part_match_latest
-                if part_or_latest:
-                    linked = part_or_latest.full_part_number or ""
-                elif assembly_match:
-                    linked = assembly_match.full_part_number or ""
-                elif pcba_match:
-                    linked = pcba_match.full_part_number or ""
-                else:
-                    linked = ""
-                bom = bom_item.bom
-                app_type = None
-                parent_id = None
-                rev = None
+                # Log "add bom item" (temp → actual) for every matched item
+                bom = Assembly_bom.objects.select_related("pcba").get(id=bomId)
                 if bom.pcba_id:
-                    app_type = "pcbas"
-                    parent_id = bom.pcba_id
-                    rev = bom.pcba.formatted_revision or bom.pcba.revision
-                elif bom.assembly_id:
-                    try:
-                        asm = Assembly.objects.get(id=bom.assembly_id)
-                        app_type = "assemblies"
-                        parent_id = asm.id
-                        rev = asm.formatted_revision or asm.revision
-                    except Assembly.DoesNotExist:
-                        pass
-                if app_type and parent_id is not None:
-                    log_bom_change(
-                        app_type=app_type,
-                        item_id=parent_id,
+                    parent = bom.pcba
+                else:
+                    parent = Assembly.objects.filter(id=bom.assembly_id).first()
+                if parent is not None:
+                    log_bom_changes(
+                        app_type="pcbas" if bom.pcba_id else "assemblies",
+                        item_id=parent.id,
                         user=request.user,
                         bom_id=bom.id,
-                        revision=rev,
-                        field_name="bom import",
-                        old_value="",
-                        new_value=f"{bom_item.designator or '—'} → {linked or ''}",
+                        revision=parent.formatted_revision or parent.revision,
+                        changes=[
+                            {
+                                "field": "bom import",
+                                "old": "",
+                                "new": f"{bom_item.designator or '—'} → {linked}",
+                            }
+                            for bom_item, linked in matched
+                        ],
                         event_type="bom_imported",
                     )
+                # bulk_update does not send post_save
+                schedule_bom_explosion_refresh([bom_owner_key(bom)])
 
         # Serialize and return the updated bom_items
         serializer = BomItemSerializer(bom_items, many=True)
@@ -695,3 +650,34 @@ def match_bom_items_with_parts(request, bomId):
             f"match_bom_items_with_parts failed: {e}",
             status=status.HTTP_400_BAD_REQUEST,
         )
+
+
+@api_view(("GET",))
+@renderer_classes((JSONRenderer,))
+@login_required(login_url="/login")
+def get_bom_match_candidates(request, bomId):
+    """Ranked part candidates for every unmatched item in a BOM, by normalized MPN similarity.
+
+    Query params:
+        limit: Maximum number of candidates per item, default 5
+    """
+    permission, response = check_user_auth_and_app_permission(request, "assemblies")
+    if not permission:
+        return response
+
+    try:
+        limit = min(max(int(request.GET.get("limit", 5)), 1), 50)
+    except ValueError:
+        return Response("Invalid limit", status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        bom_items = Bom_item.objects.filter(bom_id=bomId).only(
+            "id", "temporary_mpn", "part_id", "pcba_id", "assembly_id"
+        )
+        candidates = rank_mpn_candidates(bom_items, limit=limit)
+        return Response(candidates, status=status.HTTP_200_OK)
+    except Exception as e:
+        return Response(
+            f"get_bom_match_candidates failed: {e}",
+            status=status.HTTP_400_BAD_REQUEST,
+        )
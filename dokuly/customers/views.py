@@ -10,6 +10,8 @@ from profiles.views import check_permissions_standard, check_user_auth_and_app_p
 from django.contrib.auth.decorators import login_required
 from rest_framework.permissions import IsAuthenticated
 from organizations.permissions import APIAndProjectAccess
+from part_numbers.methods import allocate_numbers
+from django.db.models import Max
 
 
 @api_view(("PUT",))
@@ -40,27 +42,22 @@ def edit_customer(request, customerId):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+def last_customer_supplier_number():
+    """Find the highest number used by customers and suppliers, numbering starts at 100.
+    """
+    highest_customer = Customer.objects.aggregate(highest=Max("customer_id"))["highest"]
+    highest_supplier = Supplier.objects.aggregate(highest=Max("supplier_id"))["highest"]
+    highest = [number for number in (highest_customer, highest_supplier) if number is not None]
+    if not highest:
+        return 99
+    return max(highest + [100])
+
+
 def next_customer_supplier_number():
-    """Find next available customer number.
-    Simply incerments the highest number.
+    """Reserve the next customer number.
+    Customers and suppliers share the numbering.
     """
-    customers = Customer.objects.all()
-    suppliers = Supplier.objects.all()
-
-    if len(customers) == 0 and len(suppliers) == 0:
-        return 100
-    highest_id = 100
-    for item in customers:
-        if item.customer_id == None:
-            continue
-        if highest_id < item.customer_id:
-            highest_id = item.customer_id
-    for item in suppliers:
-        if item.supplier_id == None:
-            continue
-        if highest_id < item.supplier_id:
-            highest_id = item.supplier_id
-    return highest_id + 1
+    return allocate_numbers("customer_supplier", last_used=last_customer_supplier_number)
 
 
 @api_view(("POST",))
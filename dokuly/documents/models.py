@@ -1,11 +1,14 @@
 from django.db import models
+from django.db.models.functions import Coalesce, Collate
 from django.contrib.auth.models import User
 from django.contrib.postgres.fields import ArrayField
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 
 from profiles.models import Profile
-from parts.models import Part
+from parts.models import Part, SearchVectorDeferredManager
 from assemblies.models import Assembly
 from projects.models import Project, Tag
 from files.models import File, Image
@@ -68,7 +71,7 @@ class Document(models.Model):
 
     # Document metadata
     created_at = models.DateTimeField(auto_now_add=True)
-    last_updated = models.DateTimeField(auto_now=True)
+    last_updated = models.DateTimeField(auto_now=True, db_index=True)
     # Consider the created by, field as author.
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
 
@@ -147,6 +150,22 @@ class Document(models.Model):
     document_file = models.FileField(upload_to="documents", blank=True, null=True)
     zip_file = models.FileField(upload_to="zipFiles", blank=True, null=True)
 
+    # Full-text search document, maintained by a database trigger on every insert and update.
+    # See parts.search.
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+
+    objects = SearchVectorDeferredManager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="documents_document_search_gin"),
+            # Keyset pages of parts.release_items, sorted on the number in the "C" collation
+            models.Index(
+                Collate(Coalesce("full_doc_number", models.Value("")), "C"), "id",
+                name="documents_doc_release_key", condition=~models.Q(is_archived=True),
+            ),
+        ]
+
 
 class MarkdownText(models.Model):
     """
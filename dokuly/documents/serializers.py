@@ -3,6 +3,7 @@ from documents.models import Document, MarkdownText
 from documents.models import Document_Prefix, Protection_Level
 from documents.models import Reference_List
 from projects.models import Project, Tag
+from organizations.fieldsets import SparseFieldsetMixin
 # from .models import Employee
 
 # User Serializer
@@ -20,7 +21,7 @@ class ProtectionLevelSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class DocumentSerializer(serializers.ModelSerializer):
+class DocumentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     tags = DocumentTagSerializer(many=True)
     organization = serializers.SerializerMethodField()
 
@@ -44,7 +45,7 @@ class DocumentSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Document
-        fields = '__all__'
+        exclude = ["search_vector"]
 
 
 class MarkdownTextSerializer(serializers.ModelSerializer):
@@ -59,7 +60,7 @@ class MarkdownTabSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'text', 'last_updated', 'created_by']
 
 
-class DocumentTableSerializer(serializers.ModelSerializer):
+class DocumentTableSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """This serializer is used to only send the fields that are needed for the table view of documents.
     """
     tags = DocumentTagSerializer(many=True)
@@ -77,6 +78,7 @@ class DocumentTableSerializer(serializers.ModelSerializer):
                   'revision_count_minor',
                   'is_latest_revision', 'is_archived', 'tags',
                   'thumbnail', 'revision_notes', 'quality_assurance_id']
+        method_field_sources = {'quality_assurance_id': ['quality_assurance']}
 
     def get_quality_assurance_id(self, obj):
         return obj.quality_assurance_id if obj.quality_assurance else None
@@ -93,7 +95,7 @@ class ReferenceListSerializer(serializers.ModelSerializer):
     """
     class Meta:
         model = Document
-        fields = '__all__'
+        exclude = ["search_vector"]
         # Additional field to be added:
         # extra_kwargs = 'is_specificaiton'
 
@@ -8,10 +8,9 @@ import tempfile
 import os
 import shutil
 
-from organizations.models import Organization as OrgModel
 from organizations.revision_utils import build_full_document_number
 from organizations.revision_utils import increment_revision_counters, build_formatted_revision
-from part_numbers.methods import get_next_part_number
+from part_numbers.methods import allocate_numbers, get_next_part_number
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, renderer_classes
 from rest_framework.renderers import JSONRenderer
@@ -47,6 +46,10 @@ from django.http import FileResponse
 from rest_framework_api_key.permissions import HasAPIKey
 from rest_framework.permissions import IsAuthenticated
 from organizations.permissions import APIAndProjectAccess
+from organizations.fieldsets import InvalidFieldset, defer_unselected, get_fieldset
+from organizations.latest_revisions import update_latest_revisions
+from organizations.pagination import paginated_response
+from organizations.settings_cache import get_organization_settings
 
 from projects.models import Project
 from customers.models import Customer
@@ -112,17 +115,22 @@ def get_document_number(document, projects, prefixes):
     return document_number
 
 
-def increment_document_number(project_id):
-    """Find the next available document number for a project."""
-    documents = Document.objects.filter(project__id=project_id).exclude(
-        is_archived=True
+def last_document_number(project_id):
+    """Find the highest document number used in a project, archived documents included."""
+    document_numbers = Document.objects.filter(project__id=project_id).values_list(
+        "document_number", flat=True
     )
-    highest_num = 0
-    for doc in documents:
-        if highest_num < int(doc.document_number):
-            highest_num = int(doc.document_number)
+    return max(
+        (int(number) for number in document_numbers if number and number.isdigit()),
+        default=0,
+    )
+
 
-    return highest_num + 1
+def increment_document_number(project_id, count=1):
+    """Reserve the next document number of a project, or the first of count consecutive numbers."""
+    return allocate_numbers(
+        f"document:{project_id}", count, last_used=lambda: last_document_number(project_id)
+    )
 
 
 @swagger_auto_schema(
@@ -232,11 +240,8 @@ def create_new_document(request, **kwargs):
 
         document.save()
 
-        try:
-            _org = OrgModel.objects.get(id=organization_id)
-            doc_revision_format = _org.document_revision_format
-        except Exception:
-            doc_revision_format = "major-only"
+        _org_settings = get_organization_settings(organization_id)
+        doc_revision_format = _org_settings["document_revision_format"] if _org_settings else "major-only"
 
         document.formatted_revision = build_formatted_revision(
             organization_id=organization_id,
@@ -572,6 +577,10 @@ def admin_get_documents_enhanced(request):
 @renderer_classes((JSONRenderer,))
 @permission_classes([APIAndProjectAccess | IsAuthenticated])
 def get_latest_revisions(request, **kwargs):
+    try:
+        fieldset = get_fieldset(request, DocumentTableSerializer)
+    except InvalidFieldset as e:
+        return Response(str(e), status=status.HTTP_400_BAD_REQUEST)
     try:
         user = request.user
         documents_query = Document.objects.filter(is_latest_revision=True).exclude(is_archived=True).only(
@@ -586,8 +595,14 @@ def get_latest_revisions(request, **kwargs):
             "is_latest_revision",
             "is_archived",
             "tags",
-            "thumbnail"
+            "thumbnail",
+            "part_number",
+            "revision_count_major",
+            "revision_count_minor",
+            "revision_notes",
+            "quality_assurance",
         ).prefetch_related("tags")
+        documents_query = defer_unselected(documents_query, DocumentTableSerializer, fieldset)
         if APIAndProjectAccess.has_validated_key(request):
             if not APIAndProjectAccess.check_wildcard_access(request):
                 documents_query = documents_query.filter(
@@ -599,7 +614,14 @@ def get_latest_revisions(request, **kwargs):
                 is_latest_revision=True,
             )
 
-        serializer = DocumentTableSerializer(documents_query, many=True)
+        context = {'fieldset': fieldset}
+        page = paginated_response(
+            request, documents_query, lambda items: DocumentTableSerializer(items, many=True, context=context).data
+        )
+        if page is not None:
+            return page
+
+        serializer = DocumentTableSerializer(documents_query, many=True, context=context)
         return Response(serializer.data, status=status.HTTP_200_OK)
     except Exception as e:
         return Response(
@@ -650,11 +672,16 @@ def get_latest_revisions_first_25(request):
 @permission_classes([APIAndProjectAccess | IsAuthenticated])
 def get_document(request, pk, **kwargs):
     """Gets a single document by ID. Excludes archived documents."""
+    try:
+        fieldset = get_fieldset(request, DocumentSerializer)
+    except InvalidFieldset as e:
+        return Response(str(e), status=status.HTTP_400_BAD_REQUEST)
+    context = {'request': request, 'fieldset': fieldset}
     try:
         user = request.user
         if APIAndProjectAccess.has_validated_key(request):
             document = get_object_or_404(Document, id=pk)
-            serializer = DocumentSerializer(document, many=False, context={'request': request})
+            serializer = DocumentSerializer(document, many=False, context=context)
             return Response(serializer.data, status=status.HTTP_200_OK)
         else:
             document = get_object_or_404(
@@ -666,7 +693,7 @@ def get_document(request, pk, **kwargs):
                 return Response("Document is archived.",
                                 status=status.HTTP_204_NO_CONTENT)
 
-            serializer = DocumentSerializer(document, many=False, context={'request': request})
+            serializer = DocumentSerializer(document, many=False, context=context)
             return Response(serializer.data, status=status.HTTP_200_OK)
     except Exception as e:
         return Response(
@@ -1028,11 +1055,8 @@ def auto_new_revision(request, pk, **kwargs):
         prefix = Document_Prefix.objects.get(pk=old_revision.prefix_id) if old_revision.prefix_id and old_revision.prefix_id != -1 else None
         prefix_str = prefix.prefix if prefix else ""
 
-        try:
-            _org = OrgModel.objects.get(id=organization_id)
-            doc_revision_format = _org.document_revision_format
-        except Exception:
-            doc_revision_format = "major-only"
+        _org_settings = get_organization_settings(organization_id)
+        doc_revision_format = _org_settings["document_revision_format"] if _org_settings else "major-only"
 
         # Use template-based revision generation
         new_revision.formatted_revision = build_formatted_revision(
@@ -2002,32 +2026,6 @@ def get_revisions(request, documentId):
         )
 
 
-def is_latest_revision(document_number, project_id, revision_count_major, revision_count_minor):
-    """Check if the current item is the latest revision."""
-    items = Document.objects.filter(
-        document_number=document_number, project__id=project_id
-    ).exclude(is_archived=True)
-
-    if len(items) == 1:
-        return True
-
-    for item in items:
-        # If any item has a higher major revision, this is not the latest
-        if item.revision_count_major > revision_count_major:
-            return False
-        # If any item has the same major but higher minor, this is not the latest
-        if item.revision_count_major == revision_count_major and item.revision_count_minor > revision_count_minor:
-            return False
-    return True
-
-
 def batch_process_is_latest_revision_by_doc_number(project_id, document_number):
-    """This view runs through Documents and corrects the is_latest_revision field"""
-    items = Document.objects.filter(
-        project__id=project_id, document_number=document_number
-    ).exclude(is_archived=True)
-    for item in items:
-        item.is_latest_revision = is_latest_revision(
-            item.document_number, item.project.id, item.revision_count_major, item.revision_count_minor
-        )
-        item.save()
+    """Correct the is_latest_revision field of all Documents with a document number in a project."""
+    update_latest_revisions("documents", project=project_id, document_number=document_number)
@@ -142,7 +142,8 @@ def bulk_upload_documents(request, **kwargs):
             documents_to_create = []
             document_part_mapping = []
 
-            document_number = increment_document_number(project_id)
+            # Reserve a number for every document in the batch
+            document_number = increment_document_number(project_id, len(documents_data))
             for i, doc_data in enumerate(documents_data):
                 try:
                     # Clean up the file name to use as title
@@ -411,6 +411,11 @@ AZURE_ACCOUNT_KEY = os.getenv("AZURE_ACCOUNT_KEY")
 MEDIA_ROOT = os.path.join("/dokuly_image/", "media/")
 MEDIA_URL = f"https://{AZURE_CUSTOM_DOMAIN}/{AZURE_CONTAINER_NAME}/"
 
+# Number of files read from storage at the same time by multi-file jobs, see files.prefetch
+FILE_PREFETCH_WORKERS = int(os.getenv("FILE_PREFETCH_WORKERS", 4))
+# Total size in bytes of the cached production bundles, see files.bundle_cache
+PRODUCTION_BUNDLE_CACHE_SIZE = int(os.getenv("PRODUCTION_BUNDLE_CACHE_SIZE", 5 * 1024 ** 3))
+
 
 if local_server or testing_server:
     print("Running local development bucket...")
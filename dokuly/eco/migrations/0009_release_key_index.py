@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 11:19
+
+from django.db import migrations, models
+import django.db.models.functions.comparison
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('eco', '0008_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='eco',
+            index=models.Index(django.db.models.functions.comparison.Collate(django.db.models.functions.comparison.Coalesce('display_name', models.Value('')), 'C'), models.F('id'), name='eco_eco_release_key'),
+        ),
+    ]
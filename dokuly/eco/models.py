@@ -1,7 +1,10 @@
 from django.db import models
+from django.db.models.functions import Coalesce, Collate
 from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from profiles.models import Profile
-from parts.models import Part
+from parts.models import Part, SearchVectorDeferredManager
 from pcbas.models import Pcba
 from assemblies.models import Assembly
 from documents.models import Document
@@ -46,6 +49,22 @@ class Eco(models.Model):
         User, on_delete=models.SET_NULL, null=True, related_name="eco_released_by"
     )
 
+    # Full-text search document, maintained by a database trigger on every insert and update.
+    # See parts.search.
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+
+    objects = SearchVectorDeferredManager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="eco_eco_search_gin"),
+            # Keyset pages of parts.release_items, sorted on the number in the "C" collation
+            models.Index(
+                Collate(Coalesce("display_name", models.Value("")), "C"), "id",
+                name="eco_eco_release_key",
+            ),
+        ]
+
 
 class AffectedItem(models.Model):
     """An item affected by an ECO.
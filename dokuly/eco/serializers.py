@@ -18,7 +18,7 @@ class EcoSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Eco
-        fields = '__all__'
+        exclude = ["search_vector"]
 
     def get_description_text(self, obj):
         """Return the markdown text from the description field."""
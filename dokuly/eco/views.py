@@ -20,6 +20,7 @@ from projects.models import Project, Tag
 from projects.issuesModel import Issues
 from projects.viewsTags import check_for_and_create_new_tags
 from assembly_bom.models import Assembly_bom, Bom_item
+from assembly_bom.bom_explosion import get_where_used
 from projects.views import check_project_access
 
 
@@ -817,7 +818,7 @@ def get_ecos_for_issue(request, issue_id):
 @login_required(login_url="/login")
 def get_downstream_impact(request, eco_id):
     """
-    For each affected item in an ECO, find all downstream items (where-used)
+    For each affected item in an ECO, find all downstream items (where-used, at any BOM level)
     across current and prior revisions of the affected item's part number line.
     Only returns the latest revision of each downstream parent.
     Excludes downstream parents whose latest revision no longer references
@@ -903,8 +904,9 @@ def get_downstream_impact(request, eco_id):
     if not affected_data:
         return Response([], status=status.HTTP_200_OK)
 
-    # ── Phase 2: Find all BOMs containing any revision of affected items ──
-    # One query per type to get bom_ids
+    # ── Phase 2: Find every assembly / PCBA using any revision of affected items ──
+    # One query per type against the transitive where-used index, so parents at all levels
+    # are found, not only the BOMs directly containing the item.
     all_part_rev_ids = set()
     all_pcba_rev_ids = set()
     all_asm_rev_ids = set()
@@ -916,47 +918,31 @@ def get_downstream_impact(request, eco_id):
         elif app == "assemblies":
             all_asm_rev_ids |= rev_ids
 
-    # Map: bom_item FK value -> set of bom_ids (one query per FK type)
-    bom_ids_by_part = {}
-    bom_ids_by_pcba = {}
-    bom_ids_by_asm = {}
-
-    if all_part_rev_ids:
-        for part_id, bom_id in Bom_item.objects.filter(
-            part_id__in=all_part_rev_ids
-        ).values_list('part_id', 'bom_id'):
-            bom_ids_by_part.setdefault(part_id, set()).add(bom_id)
-
-    if all_pcba_rev_ids:
-        for pcba_id, bom_id in Bom_item.objects.filter(
-            pcba_id__in=all_pcba_rev_ids
-        ).values_list('pcba_id', 'bom_id'):
-            bom_ids_by_pcba.setdefault(pcba_id, set()).add(bom_id)
-
-    if all_asm_rev_ids:
-        for asm_id, bom_id in Bom_item.objects.filter(
-            assembly_id__in=all_asm_rev_ids
-        ).values_list('assembly_id', 'bom_id'):
-            bom_ids_by_asm.setdefault(asm_id, set()).add(bom_id)
-
-    # Collect all bom_ids across all affected items
-    every_bom_id = set()
-    for _, _, app, _, rev_ids in affected_data:
-        lookup = {"parts": bom_ids_by_part, "pcbas": bom_ids_by_pcba, "assemblies": bom_ids_by_asm}[app]
-        for rid in rev_ids:
-            every_bom_id |= lookup.get(rid, set())
-
-    # ── Phase 3: Bulk fetch all BOMs and their parent references ──
-    bom_parent_map = {}  # bom_id -> (assembly_id, pcba_id)
-    if every_bom_id:
-        for bom_id, asm_id, pcba_id in Assembly_bom.objects.filter(
-            id__in=every_bom_id
-        ).values_list('id', 'assembly_id', 'pcba_id'):
-            bom_parent_map[bom_id] = (asm_id, pcba_id)
-
-    # Bulk fetch parent part_numbers (one query per type)
-    parent_asm_ids = {asm_id for asm_id, _ in bom_parent_map.values() if asm_id}
-    parent_pcba_ids = {pcba_id for _, pcba_id in bom_parent_map.values() if pcba_id}
+    parents_by_rev = {}  # (app, rev_id) -> set of (parent_type, parent_id)
+    for app, rev_ids in [
+        ("parts", all_part_rev_ids),
+        ("pcbas", all_pcba_rev_ids),
+        ("assemblies", all_asm_rev_ids),
+    ]:
+        if not rev_ids:
+            continue
+        for row in get_where_used(app, rev_ids):
+            used_id = row['part_id'] or row['pcba_id'] or row['assembly_id']
+            if row['root_assembly_id']:
+                parent = ("assembly", row['root_assembly_id'])
+            else:
+                parent = ("pcba", row['root_pcba_id'])
+            parents_by_rev.setdefault((app, used_id), set()).add(parent)
+
+    # ── Phase 3: Bulk fetch parent part_numbers (one query per type) ──
+    parent_asm_ids = set()
+    parent_pcba_ids = set()
+    for parents in parents_by_rev.values():
+        for parent_type, parent_id in parents:
+            if parent_type == "assembly":
+                parent_asm_ids.add(parent_id)
+            else:
+                parent_pcba_ids.add(parent_id)
 
     asm_id_to_pn = {}
     if parent_asm_ids:
@@ -988,77 +974,28 @@ def get_downstream_impact(request, eco_id):
         ):
             latest_pcba_by_pn[pcba.part_number] = pcba
 
-    # ── Phase 5: Bulk fetch BOMs for all latest parents ──
-    latest_asm_ids = [a.id for a in latest_asm_by_pn.values()]
-    latest_pcba_ids = [p.id for p in latest_pcba_by_pn.values()]
-
-    latest_bom_by_asm_id = {}
-    if latest_asm_ids:
-        for bom in Assembly_bom.objects.filter(assembly_id__in=latest_asm_ids):
-            latest_bom_by_asm_id[bom.assembly_id] = bom
-
-    latest_bom_by_pcba_id = {}
-    if latest_pcba_ids:
-        for bom in Assembly_bom.objects.filter(pcba_id__in=latest_pcba_ids):
-            latest_bom_by_pcba_id[bom.pcba_id] = bom
-
-    # ── Phase 6: Bulk check still-used across all latest BOMs ──
-    all_latest_bom_ids = (
-        {b.id for b in latest_bom_by_asm_id.values()}
-        | {b.id for b in latest_bom_by_pcba_id.values()}
-    )
-
-    # For each (bom_id, FK_id) pair that exists, record it
-    # so we can check per-affected-item whether "still used"
-    still_used_part = set()  # (bom_id, part_id)
-    still_used_pcba = set()  # (bom_id, pcba_id)
-    still_used_asm = set()   # (bom_id, assembly_id)
-
-    if all_latest_bom_ids and all_part_rev_ids:
-        for bom_id, part_id in Bom_item.objects.filter(
-            bom_id__in=all_latest_bom_ids, part_id__in=all_part_rev_ids
-        ).values_list('bom_id', 'part_id'):
-            still_used_part.add((bom_id, part_id))
-
-    if all_latest_bom_ids and all_pcba_rev_ids:
-        for bom_id, pcba_id in Bom_item.objects.filter(
-            bom_id__in=all_latest_bom_ids, pcba_id__in=all_pcba_rev_ids
-        ).values_list('bom_id', 'pcba_id'):
-            still_used_pcba.add((bom_id, pcba_id))
-
-    if all_latest_bom_ids and all_asm_rev_ids:
-        for bom_id, asm_id in Bom_item.objects.filter(
-            bom_id__in=all_latest_bom_ids, assembly_id__in=all_asm_rev_ids
-        ).values_list('bom_id', 'assembly_id'):
-            still_used_asm.add((bom_id, asm_id))
-
-    # ── Phase 7: Assemble results per affected item (no queries) ──
+    # ── Phase 5: Assemble results per affected item (no queries) ──
     result = []
 
     for ai, linked, app, part_number, rev_ids in affected_data:
-        # Determine which bom_ids contain this affected item's revisions
-        lookup = {"parts": bom_ids_by_part, "pcbas": bom_ids_by_pcba, "assemblies": bom_ids_by_asm}[app]
-        item_bom_ids = set()
+        # All parents using any of this affected item's revisions
+        item_parents = set()
         for rid in rev_ids:
-            item_bom_ids |= lookup.get(rid, set())
+            item_parents |= parents_by_rev.get((app, rid), set())
 
-        if not item_bom_ids:
+        if not item_parents:
             continue
 
-        # Resolve parent part_numbers from cached bom data
+        # Resolve parent part_numbers from cached data
         parent_asm_pns = set()
         parent_pcba_pns = set()
-        for bid in item_bom_ids:
-            parent = bom_parent_map.get(bid)
-            if not parent:
-                continue
-            asm_id, pcba_id = parent
-            if asm_id:
-                pn = asm_id_to_pn.get(asm_id)
+        for parent_type, parent_id in item_parents:
+            if parent_type == "assembly":
+                pn = asm_id_to_pn.get(parent_id)
                 if pn and not (app == "assemblies" and pn == part_number):
                     parent_asm_pns.add(pn)
-            elif pcba_id:
-                pn = pcba_id_to_pn.get(pcba_id)
+            else:
+                pn = pcba_id_to_pn.get(parent_id)
                 if pn and not (app == "pcbas" and pn == part_number):
                     parent_pcba_pns.add(pn)
 
@@ -1066,9 +1003,6 @@ def get_downstream_impact(request, eco_id):
         parent_asm_pns -= eco_assembly_pns
         parent_pcba_pns -= eco_pcba_pns
 
-        # Check still-used against pre-fetched data
-        still_used_lookup = {"parts": still_used_part, "pcbas": still_used_pcba, "assemblies": still_used_asm}[app]
-
         downstream_items = []
         seen = set()
 
@@ -1076,10 +1010,8 @@ def get_downstream_impact(request, eco_id):
             latest = latest_asm_by_pn.get(pn)
             if not latest:
                 continue
-            bom = latest_bom_by_asm_id.get(latest.id)
-            if not bom:
-                continue
-            if any((bom.id, rid) in still_used_lookup for rid in rev_ids):
+            # The latest revision must still use a current/prior revision of the item
+            if ("assembly", latest.id) in item_parents:
                 key = ("assembly", latest.id)
                 if key not in seen:
                     seen.add(key)
@@ -1097,10 +1029,7 @@ def get_downstream_impact(request, eco_id):
             latest = latest_pcba_by_pn.get(pn)
             if not latest:
                 continue
-            bom = latest_bom_by_pcba_id.get(latest.id)
-            if not bom:
-                continue
-            if any((bom.id, rid) in still_used_lookup for rid in rev_ids):
+            if ("pcba", latest.id) in item_parents:
                 key = ("pcba", latest.id)
                 if key not in seen:
                     seen.add(key)
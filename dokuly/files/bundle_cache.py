@@ -0,0 +1,220 @@
+"""
+Cache of pre-built production ZIP bundles.
+
+A bundle is keyed by a hash of the (folder, file id, storage name, display name, last_updated) of
+every file in it, in archive order. Uploading, replacing, renaming or archiving a file anywhere
+in the BOM tree, or changing the tree, gives another key, so a cached bundle is never stale and
+nothing has to invalidate it. The display name is hashed itself, as it names the file in the
+archive and renames done with QuerySet.update() leave last_updated as it was.
+
+The first download of a bundle streams the archive to the client while it is spooled to a
+temporary file. Once the archive is complete it is uploaded to the storage backend on a
+background thread, so the download does not wait for the upload. Later downloads send the
+stored blob as it is. When the stored bundles grow over
+PRODUCTION_BUNDLE_CACHE_SIZE bytes, the least recently downloaded are deleted.
+"""
+
+import hashlib
+import logging
+import tempfile
+import threading
+
+from django.conf import settings
+from django.core.files import File as DjangoFile
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from files.models import File, ProductionBundle
+from files.zip_stream import iter_zip
+
+logger = logging.getLogger(__name__)
+
+SPOOL_MAX_SIZE = 16 * 1024 * 1024
+
+
+def bundle_cache_size():
+    """Size cap of the cache in bytes, the PRODUCTION_BUNDLE_CACHE_SIZE setting."""
+    return int(getattr(settings, "PRODUCTION_BUNDLE_CACHE_SIZE", 5 * 1024 ** 3))
+
+
+def bundle_key(entries):
+    """Hash of the files of a bundle.
+
+    Args:
+        entries: List of (folder path in the archive, File), in archive order
+    """
+    digest = hashlib.sha256()
+    for folder_path, file_obj in entries:
+        last_updated = file_obj.last_updated.isoformat() if file_obj.last_updated else ""
+        line = (
+            f"{folder_path}\0{file_obj.pk}\0{file_obj.file.name}\0{file_obj.display_name or ''}"
+            f"\0{last_updated}\n"
+        )
+        digest.update(line.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def get_bundle(key):
+    """Open a cached bundle and mark it as used.
+
+    Returns:
+        (ProductionBundle, opened file), None if the bundle is not cached.
+    """
+    bundle = ProductionBundle.objects.filter(key=key).first()
+    if bundle is None:
+        return None
+    try:
+        content = bundle.file.storage.open(bundle.file.name, "rb")
+    except Exception:
+        # The blob is gone, the bundle is built again
+        bundle.delete()
+        return None
+    ProductionBundle.objects.filter(pk=bundle.pk).update(last_accessed=timezone.now())
+    return bundle, content
+
+
+def store_bundle(key, content, size):
+    """Store a built bundle and evict the least recently used bundles over the size cap.
+
+    Args:
+        key: bundle_key of the files in the bundle
+        content: File object of the archive, positioned at the start
+        size: Size of the archive in bytes
+
+    Returns:
+        The ProductionBundle, None if the bundle is larger than the cache or already stored.
+    """
+    if size > bundle_cache_size():
+        return None
+    bundle = ProductionBundle(key=key, size=size)
+    bundle.file.save(f"{key}.zip", DjangoFile(content), save=False)
+    try:
+        with transaction.atomic():
+            bundle.save()
+    except IntegrityError:
+        # Built by another download at the same time
+        bundle.file.delete(save=False)
+        return None
+    evict_bundles()
+    return bundle
+
+
+def evict_bundles(max_size=None):
+    """Delete the least recently used bundles until the cache fits in max_size bytes.
+
+    Returns:
+        Number of bundles deleted.
+    """
+    max_size = bundle_cache_size() if max_size is None else max_size
+    total = 0
+    evicted = []
+    for bundle in ProductionBundle.objects.order_by("-last_accessed", "-pk"):
+        total += bundle.size
+        if total > max_size:
+            evicted.append(bundle)
+
+    for bundle in evicted:
+        try:
+            bundle.file.delete(save=False)
+        except Exception:
+            pass
+    ProductionBundle.objects.filter(pk__in=[bundle.pk for bundle in evicted]).delete()
+    return len(evicted)
+
+
+def _run_in_background(function):
+    """Run function on a thread of its own, which closes its database connection when done."""
+    def run():
+        try:
+            function()
+        finally:
+            connection.close()
+
+    # Non-daemon, so a started upload completes before the worker shuts down
+    threading.Thread(target=run).start()
+
+
+def _store_in_background(key, spool, size):
+    """Store a spooled bundle on a background thread, which closes the spool when done."""
+    # The thread stores the bundle in the tenant schema of the download
+    schema_name = getattr(connection, "schema_name", None)
+
+    def store():
+        try:
+            if schema_name is not None:
+                connection.set_schema(schema_name)
+            store_bundle(key, spool, size)
+        except Exception:
+            logger.exception(f"Storing production bundle {key} failed")
+        finally:
+            spool.close()
+
+    _run_in_background(store)
+
+
+def _iter_zip_and_store(entries, key):
+    """iter_zip, storing the archive as the bundle of key once all of it is sent.
+
+    Archives missing files that could not be read are not stored, neither are archives whose
+    download was cancelled.
+    """
+    size = 0
+    skipped = []
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    try:
+        for chunk in iter_zip(entries, skipped=skipped):
+            spool.write(chunk)
+            size += len(chunk)
+            yield chunk
+    except BaseException:
+        spool.close()
+        raise
+    if skipped:
+        spool.close()
+        return
+    spool.seek(0)
+    _store_in_background(key, spool, size)
+
+
+def _is_stored(file_obj):
+    try:
+        return file_obj.file.storage.exists(file_obj.file.name)
+    except Exception:
+        return False
+
+
+def cached_zip_response(entries, filename):
+    """Response sending a ZIP archive of files, from the bundle cache when it is there.
+
+    Args:
+        entries: Iterable of (folder path in the archive, File), the folder path may be ""
+        filename: Name of the downloaded archive
+
+    Returns:
+        The response, None if there are no entries or none of their files is in storage.
+    """
+    entries = list(entries)
+    if not entries:
+        return None
+
+    key = bundle_key(entries)
+    cached = get_bundle(key)
+    if cached is None:
+        if not any(_is_stored(file_obj) for _, file_obj in entries):
+            return None
+        response = StreamingHttpResponse(
+            _iter_zip_and_store(entries, key), content_type="application/zip"
+        )
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    bundle, content = cached
+    File.objects.filter(pk__in={file_obj.pk for _, file_obj in entries}).update(
+        download_count=F("download_count") + 1
+    )
+    response = FileResponse(content, content_type="application/zip")
+    response["Content-Length"] = bundle.size
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
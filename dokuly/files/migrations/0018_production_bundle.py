@@ -0,0 +1,26 @@
+# Generated by Django 4.2.11 on 2026-10-18 10:28
+
+from django.db import migrations, models
+import django.utils.timezone
+import tenants.azure_storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0017_file_created_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductionBundle',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('file', models.FileField(storage=tenants.azure_storage.CustomAzureStorage, upload_to='production_bundles/')),
+                ('size', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_accessed', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -73,6 +73,20 @@ class FileLock(models.Model):
         return f"Lock on File {self.file_id} by {self.locked_by} (expires {self.expires_at})"
 
 
+class ProductionBundle(models.Model):
+    """Pre-built production ZIP of an assembly, see files.bundle_cache.
+
+    Bundles are keyed by a hash of the files in them, so a bundle is never stale, bundles
+    nobody downloads any more are evicted when the cache grows over its size cap.
+    """
+    # Hash of the (folder, file id, storage name, last_updated) of every file in the bundle.
+    key = models.CharField(max_length=64, unique=True)
+    file = models.FileField(storage=CustomAzureStorage, upload_to="production_bundles/")
+    size = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_accessed = models.DateTimeField(default=timezone.now, db_index=True)
+
+
 class Image(models.Model):
     """Generic image table.
     Should make it easier to store images connected to any app.
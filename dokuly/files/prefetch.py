@@ -0,0 +1,115 @@
+"""
+Prefetching of stored files by a bounded thread pool.
+
+Jobs reading many files from storage, like the production ZIP bundles, spend most of their time
+waiting for the blob storage. prefetch() fetches the next files on worker threads while the
+caller handles the current one, and hands them over in the order they were given.
+
+At most `workers` files are fetched ahead of the file the caller handles. Fetched files are
+spooled to temporary files, so a prefetched file keeps at most SPOOL_MAX_SIZE bytes in memory
+however large it is.
+"""
+
+import collections
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+
+CHUNK_SIZE = 1024 * 1024
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+
+def prefetch_workers():
+    """Number of files fetched at the same time, the FILE_PREFETCH_WORKERS setting."""
+    return max(1, int(getattr(settings, "FILE_PREFETCH_WORKERS", 4)))
+
+
+def fetch_file(file_obj):
+    """Read a File from storage into a temporary file.
+
+    Returns:
+        The temporary file positioned at the start, the caller closes it.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    try:
+        # A handle of its own, the FieldFile of the File is not shared across threads
+        with file_obj.file.storage.open(file_obj.file.name, "rb") as source:
+            while True:
+                chunk = source.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                spool.write(chunk)
+    except Exception:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+def _close(future):
+    if not future.cancelled() and future.exception() is None:
+        result = future.result()
+        if hasattr(result, "close"):
+            result.close()
+
+
+def _in_schema_of_caller(fetch):
+    """Wrap fetch to run in the tenant schema of the calling thread.
+
+    django_tenants keeps the schema on the connection of each thread, and the storage builds the
+    blob paths of the tenant from it. Worker threads would otherwise read from the public schema.
+    """
+    schema_name = getattr(connection, "schema_name", None)
+    if schema_name is None:
+        return fetch
+
+    def fetch_in_schema(item):
+        # Only sets the search path of the worker's connection, no database connection is opened
+        connection.set_schema(schema_name)
+        return fetch(item)
+
+    return fetch_in_schema
+
+
+def prefetch(items, fetch=fetch_file, workers=None):
+    """Fetch items on a thread pool, ahead of the caller and in order.
+
+    Args:
+        items: Iterable of the items to fetch, read lazily
+        fetch: Callable fetching one item, run in the tenant schema of the caller. It must not
+            query the database.
+        workers: Number of items fetched at the same time, prefetch_workers() by default
+
+    Yields:
+        (item, result of fetch, None), or (item, None, exception) if fetch raised.
+
+    Results are closed by the caller. Results fetched ahead are closed when the caller stops
+    iterating early.
+    """
+    workers = workers or prefetch_workers()
+    fetch = _in_schema_of_caller(fetch)
+    items = iter(items)
+    pending = collections.deque()
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="file-prefetch")
+    try:
+        for item in items:
+            pending.append((item, executor.submit(fetch, item)))
+            if len(pending) <= workers:
+                continue
+            yield _result(*pending.popleft())
+        while pending:
+            yield _result(*pending.popleft())
+    finally:
+        for _, future in pending:
+            if not future.cancel():
+                future.add_done_callback(_close)
+        executor.shutdown(wait=False)
+
+
+def _result(item, future):
+    try:
+        return item, future.result(), None
+    except Exception as error:
+        return item, None, error
@@ -1,3 +1,263 @@
-from django.test import TestCase
+import io
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.db import connection, connections
+from django.http import FileResponse, StreamingHttpResponse
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from assemblies.models import Assembly
+from files.bundle_cache import _iter_zip_and_store, bundle_key, cached_zip_response, evict_bundles
+from files.models import File, ProductionBundle
+from files.prefetch import prefetch
+from files.zip_stream import iter_zip, streaming_zip_response
+from profiles.models import Profile
+
+
+class StoredFilesMixin:
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.storage = FileSystemStorage(location=directory.name)
+
+    def stored_file(self, name, content, display_name=None):
+        file_obj = File(display_name=display_name)
+        file_obj.file = self.storage.save(name, ContentFile(content))
+        file_obj.file.storage = self.storage
+        return file_obj
+
+
+class ZipStreamTests(StoredFilesMixin, TestCase):
+    def read_archive(self, entries):
+        return zipfile.ZipFile(io.BytesIO(b"".join(iter_zip(entries))))
+
+    def test_compressed_formats_are_stored(self):
+        archive = self.read_archive([
+            ("", self.stored_file("drawing.pdf", b"%PDF" * 100)),
+            ("", self.stored_file("notes.txt", b"notes " * 100)),
+        ])
+
+        self.assertEqual(archive.getinfo("drawing.pdf").compress_type, zipfile.ZIP_STORED)
+        self.assertEqual(archive.getinfo("notes.txt").compress_type, zipfile.ZIP_DEFLATED)
+        self.assertEqual(archive.read("drawing.pdf"), b"%PDF" * 100)
+        self.assertEqual(archive.read("notes.txt"), b"notes " * 100)
+
+    def test_duplicate_names_and_folders(self):
+        archive = self.read_archive([
+            ("ASM1", self.stored_file("a.txt", b"first", display_name="gerbers")),
+            ("ASM1", self.stored_file("b.txt", b"second", display_name="gerbers")),
+            ("ASM1/PCBA2", self.stored_file("c.txt", b"third")),
+        ])
+
+        self.assertEqual(
+            archive.namelist(), ["ASM1/gerbers.txt", "ASM1/gerbers_1.txt", "ASM1/PCBA2/c.txt"]
+        )
+        self.assertEqual(archive.read("ASM1/gerbers_1.txt"), b"second")
+
+    def test_unreadable_files_are_left_out(self):
+        missing = self.stored_file("missing.txt", b"gone")
+        self.storage.delete(missing.file.name)
+
+        archive = self.read_archive([
+            ("", missing),
+            ("", self.stored_file("kept.txt", b"kept")),
+        ])
+
+        self.assertEqual(archive.namelist(), ["kept.txt"])
+
+    def test_no_entries_gives_no_response(self):
+        self.assertIsNone(streaming_zip_response([], "empty.zip"))
+
+
+class PrefetchTests(TestCase):
+    def test_results_keep_the_order_of_the_items(self):
+        def fetch(item):
+            # Later items finish first
+            time.sleep(0.01 * (5 - item))
+            return item * 10
+
+        results = list(prefetch(range(5), fetch=fetch, workers=3))
+
+        self.assertEqual(results, [(item, item * 10, None) for item in range(5)])
+
+    def test_errors_are_returned_with_their_item(self):
+        def fetch(item):
+            if item == 1:
+                raise OSError("unreadable")
+            return item
+
+        results = list(prefetch(range(3), fetch=fetch, workers=2))
+
+        self.assertEqual([item for item, _, _ in results], [0, 1, 2])
+        self.assertIsInstance(results[1][2], OSError)
+        self.assertEqual(results[2], (2, 2, None))
+
+    def test_fetches_at_most_workers_items_ahead(self):
+        lock = threading.Lock()
+        fetched = []
+
+        def fetch(item):
+            with lock:
+                fetched.append(item)
+            return item
+
+        results = prefetch(range(100), fetch=fetch, workers=2)
+        next(results)
+        time.sleep(0.05)
+
+        with lock:
+            self.assertLessEqual(len(fetched), 3)
+        results.close()
+
+
+    def test_fetch_runs_in_the_schema_of_the_caller(self):
+        # django_tenants' set_schema, on the connection of whichever thread calls it
+        def set_schema(wrapper, schema_name):
+            wrapper.schema_name = schema_name
+
+        def fetch(item):
+            return threading.current_thread().name, connection.schema_name
+
+        wrapper_class = type(connections["default"])
+        with mock.patch.object(wrapper_class, "set_schema", set_schema, create=True), \
+                mock.patch.object(connection, "schema_name", "tenant_a", create=True):
+            results = list(prefetch(range(3), fetch=fetch, workers=2))
+
+        for _, (thread_name, schema_name), _ in results:
+            self.assertNotEqual(thread_name, threading.current_thread().name)
+            self.assertEqual(schema_name, "tenant_a")
+
+
+class BundleCacheTests(StoredFilesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(ProductionBundle._meta.get_field("file"), "storage", self.storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Bundles are stored right away instead of on a thread with a connection of its own
+        self.background = []
+        patcher = mock.patch("files.bundle_cache._run_in_background", self.background.append)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.entries = [
+            ("ASM1", self.stored_file("a.txt", b"first")),
+            ("ASM1/PCBA2", self.stored_file("b.pdf", b"second")),
+        ]
+        for _, file_obj in self.entries:
+            file_obj.last_updated = timezone.now()
+
+    def download(self):
+        response = cached_zip_response(self.entries, "bundle.zip")
+        content = b"".join(response.streaming_content)
+        # response.close() would send request_finished, closing the test database connection
+        if isinstance(response, FileResponse):
+            response.file_to_stream.close()
+        while self.background:
+            self.background.pop(0)()
+        return response, content
+
+    def test_repeat_downloads_send_the_stored_bundle(self):
+        first, built = self.download()
+        second, cached = self.download()
+
+        self.assertIsInstance(first, StreamingHttpResponse)
+        self.assertIsInstance(second, FileResponse)
+        self.assertEqual(cached, built)
+        self.assertEqual(int(second["Content-Length"]), len(built))
+        bundle = ProductionBundle.objects.get()
+        self.assertEqual(bundle.key, bundle_key(self.entries))
+
+    def test_bundle_is_stored_after_the_download(self):
+        response = cached_zip_response(self.entries, "bundle.zip")
+        chunks = iter(response.streaming_content)
+        next(chunks)
+        self.assertEqual(self.background, [])
+
+        list(chunks)
+        self.assertFalse(ProductionBundle.objects.exists())
+        self.assertEqual(len(self.background), 1)
+
+        self.background.pop()()
+        self.assertTrue(ProductionBundle.objects.exists())
+
+    def test_cancelled_downloads_are_not_stored(self):
+        chunks = _iter_zip_and_store(self.entries, bundle_key(self.entries))
+        next(chunks)
+        chunks.close()
+
+        self.assertEqual(self.background, [])
+
+    def test_changed_files_build_a_new_bundle(self):
+        self.download()
+        self.entries[0][1].last_updated += timedelta(seconds=1)
+
+        response, _ = self.download()
+
+        self.assertNotIsInstance(response, FileResponse)
+        self.assertEqual(ProductionBundle.objects.count(), 2)
+
+    def test_renamed_files_build_a_new_bundle(self):
+        self.download()
+        # Like the rename of production/views.py, an update leaving last_updated as it was
+        self.entries[0][1].display_name = "renamed"
+
+        response, content = self.download()
+
+        self.assertNotIsInstance(response, FileResponse)
+        self.assertIn("ASM1/renamed.txt", zipfile.ZipFile(io.BytesIO(content)).namelist())
+
+    def test_bundles_missing_files_are_not_stored(self):
+        self.storage.delete(self.entries[0][1].file.name)
+
+        self.download()
+
+        self.assertFalse(ProductionBundle.objects.exists())
+
+    def test_no_response_when_no_file_is_stored(self):
+        for _, file_obj in self.entries:
+            self.storage.delete(file_obj.file.name)
+
+        self.assertIsNone(cached_zip_response(self.entries, "bundle.zip"))
+
+    def test_least_recently_used_bundles_are_evicted(self):
+        now = timezone.now()
+        for index in range(3):
+            ProductionBundle.objects.create(
+                key=str(index),
+                file=self.storage.save(f"{index}.zip", ContentFile(b"x" * 10)),
+                size=10,
+                last_accessed=now - timedelta(hours=index),
+            )
+
+        with override_settings(PRODUCTION_BUNDLE_CACHE_SIZE=25):
+            self.assertEqual(evict_bundles(), 1)
+
+        self.assertEqual(sorted(ProductionBundle.objects.values_list("key", flat=True)), ["0", "1"])
+        self.assertFalse(self.storage.exists("2.zip"))
+
+
+class ProductionZipTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username="producer", password="pass")
+        Profile.objects.create(user=user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=user)
+
+    def test_assembly_without_files_is_not_found(self):
+        assembly = Assembly.objects.create(part_number=1, full_part_number="ASM1", price=0)
+
+        response = self.client.get(
+            f"/api/files/download/assembly_production_zip/{assembly.id}/", secure=True
+        )
+
+        self.assertEqual(response.status_code, 404)
@@ -1,6 +1,5 @@
 from datetime import datetime
 from django.shortcuts import render
-from django.http import HttpResponse
 from production.models import Production
 from rest_framework import generics, permissions
 from rest_framework.response import Response
@@ -26,7 +25,6 @@ import os
 import uuid
 import math
 import io
-import zipfile
 from PIL import Image as PILImage
 from django.core.files.uploadedfile import InMemoryUploadedFile
 from files.fileUtilities import delete_file_with_cleanup, delete_image_with_cleanup, get_file_name, save_file_content
@@ -46,7 +44,9 @@ from pcbas.models import Pcba
 from documents.models import Document
 from documents.pdfUtils import process_pdf_and_generate_thumbnail
 from purchasing.models import Supplier, PurchaseOrder
-from assembly_bom.models import Assembly_bom, Bom_item
+from assembly_bom.bom_explosion import child_path, get_bom_explosion, group_by_path
+from files.bundle_cache import cached_zip_response
+from files.zip_stream import streaming_zip_response
 
 from django.contrib.auth.models import User
 from profiles.models import Profile
@@ -173,50 +173,15 @@ def download_files_zip(request, app_str, object_id):
     label = category or "all"
     download_name = _get_zip_download_name(obj, app_str, object_id)
 
-    if not files_qs.exists():
+    response = streaming_zip_response(
+        (("", file_obj) for file_obj in files_qs),
+        f'{download_name.replace(" ", "_")}_{label}_files.zip',
+    )
+    if response is None:
         return Response(
             f"No {label} files found",
             status=status.HTTP_404_NOT_FOUND,
         )
-
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-        for file_obj in files_qs:
-            try:
-                file_obj.file.open("rb")
-                file_content = file_obj.file.read()
-                file_obj.file.close()
-
-                if file_obj.display_name:
-                    if os.path.splitext(file_obj.display_name)[1]:
-                        filename = file_obj.display_name
-                    else:
-                        _, ext = os.path.splitext(os.path.basename(file_obj.file.name))
-                        filename = file_obj.display_name + (ext if ext else "")
-                else:
-                    filename = os.path.basename(file_obj.file.name)
-
-                zip_path = filename
-                counter = 1
-                while zip_path in zip_file.namelist():
-                    name, ext = os.path.splitext(filename)
-                    zip_path = f"{name}_{counter}{ext}"
-                    counter += 1
-
-                zip_file.writestr(zip_path, file_content)
-
-                file_obj.download_count += 1
-                file_obj.save()
-            except Exception:
-                continue
-
-    zip_buffer.seek(0)
-    zip_data = zip_buffer.getvalue()
-    zip_buffer.close()
-
-    response = HttpResponse(zip_data, content_type="application/zip")
-    response["Content-Disposition"] = f'attachment; filename="{download_name.replace(" ", "_")}_{label}_files.zip"'
-    response["Content-Length"] = str(len(zip_data))
     return response
 
 
@@ -235,81 +200,44 @@ def _get_production_files(entity):
     ).exclude(file="")
 
 
-def _add_files_to_zip(zip_file, files_qs, folder_path):
-    """Add files from a queryset into a zip at the given folder path."""
-    for file_obj in files_qs:
-        try:
-            file_obj.file.open("rb")
-            file_content = file_obj.file.read()
-            file_obj.file.close()
-
-            if file_obj.display_name:
-                if os.path.splitext(file_obj.display_name)[1]:
-                    filename = file_obj.display_name
-                else:
-                    _, ext = os.path.splitext(os.path.basename(file_obj.file.name))
-                    filename = file_obj.display_name + (ext if ext else "")
-            else:
-                filename = os.path.basename(file_obj.file.name)
-
-            zip_path = f"{folder_path}/{filename}" if folder_path else filename
-            counter = 1
-            while zip_path in zip_file.namelist():
-                name, ext = os.path.splitext(filename)
-                base = f"{folder_path}/{name}" if folder_path else name
-                zip_path = f"{base}_{counter}{ext}"
-                counter += 1
+def _production_file_entries(assembly, folder_path):
+    """(folder path, File) of the production files of an assembly and all its BOM children.
+    The whole BOM tree is read in one query from the materialized BOM explosion."""
+    rows_by_path = group_by_path(get_bom_explosion("assemblies", assembly.id))
+    yield from _exploded_production_file_entries(assembly, rows_by_path, "", folder_path, set())
 
-            zip_file.writestr(zip_path, file_content)
-
-            file_obj.download_count += 1
-            file_obj.save()
-        except Exception:
-            continue
 
-
-def _add_assembly_production_files_recursive(zip_file, assembly, folder_path, visited):
-    """Recursively add production files for an assembly and all its BOM children."""
+def _exploded_production_file_entries(assembly, rows_by_path, path, folder_path, visited):
+    """Production files of an assembly, and of the BOM found at path in its exploded tree."""
     if assembly.id in visited:
         return
     visited.add(assembly.id)
 
-    # Add this assembly's own production files
-    files_qs = _get_production_files(assembly)
-    _add_files_to_zip(zip_file, files_qs, folder_path)
-
-    # Get BOM for this assembly
-    bom = Assembly_bom.objects.filter(assembly_id=assembly.id).first()
-    if not bom:
-        return
-
-    bom_items = Bom_item.objects.filter(bom=bom).select_related(
-        "part", "pcba", "assembly"
-    )
+    # This assembly's own production files
+    for file_obj in _get_production_files(assembly):
+        yield folder_path, file_obj
 
-    for item in bom_items:
+    for item in rows_by_path.get(path, []):
         if not item.is_mounted:
             continue
 
-        if item.part and item.part_id:
+        if item.part_id:
             part = item.part
-            part_files = _get_production_files(part)
-            if part_files.exists():
-                name = part.full_part_number or f"PRT{part.part_number}"
-                _add_files_to_zip(zip_file, part_files, f"{folder_path}/{name}")
+            name = part.full_part_number or f"PRT{part.part_number}"
+            for file_obj in _get_production_files(part):
+                yield f"{folder_path}/{name}", file_obj
 
-        elif item.pcba and item.pcba_id:
+        elif item.pcba_id:
             pcba = item.pcba
-            pcba_files = _get_production_files(pcba)
-            if pcba_files.exists():
-                name = pcba.full_part_number or f"PCBA{pcba.part_number}"
-                _add_files_to_zip(zip_file, pcba_files, f"{folder_path}/{name}")
+            name = pcba.full_part_number or f"PCBA{pcba.part_number}"
+            for file_obj in _get_production_files(pcba):
+                yield f"{folder_path}/{name}", file_obj
 
-        elif item.assembly and item.assembly_id:
+        elif item.assembly_id:
             sub_asm = item.assembly
             name = sub_asm.full_part_number or f"ASM{sub_asm.part_number}"
-            _add_assembly_production_files_recursive(
-                zip_file, sub_asm, f"{folder_path}/{name}", visited
+            yield from _exploded_production_file_entries(
+                sub_asm, rows_by_path, child_path(item), f"{folder_path}/{name}", visited
             )
 
 
@@ -333,26 +261,15 @@ def download_assembly_production_zip_recursive(request, assembly_id):
 
     asm_name = assembly.full_part_number or f"ASM{assembly.part_number}"
 
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-        _add_assembly_production_files_recursive(
-            zip_file, assembly, asm_name, set()
-        )
-
-    zip_buffer.seek(0)
-    zip_data = zip_buffer.getvalue()
-    zip_buffer.close()
-
-    if len(zip_data) <= 22:  # Empty ZIP is 22 bytes
+    response = cached_zip_response(
+        _production_file_entries(assembly, asm_name),
+        f'{asm_name.replace(" ", "_")}_production_files.zip',
+    )
+    if response is None:
         return Response(
             "No production files found in assembly or its BOM",
             status=status.HTTP_404_NOT_FOUND,
         )
-
-    response = HttpResponse(zip_data, content_type="application/zip")
-    safe_name = asm_name.replace(" ", "_")
-    response["Content-Disposition"] = f'attachment; filename="{safe_name}_production_files.zip"'
-    response["Content-Length"] = str(len(zip_data))
     return response
 
 
@@ -0,0 +1,148 @@
+"""
+ZIP archives of stored files, streamed to the client while they are written.
+
+The archive is written to a ZipStream sink and every compressed chunk is handed to the response
+right away. The files are read from storage by files.prefetch, ahead of the archive and in
+order, so a multi-GB production bundle is never held in memory as a whole.
+
+Formats that are already compressed are stored as they are, compressing them again costs CPU and
+saves nothing.
+"""
+
+import os
+import time
+import zipfile
+
+from django.db.models import F
+from django.http import StreamingHttpResponse
+
+from files.models import File
+from files.prefetch import fetch_file, prefetch
+
+CHUNK_SIZE = 1024 * 1024
+
+# Stored without compression, the suffixes are matched on the lower case file name
+STORED_SUFFIXES = (
+    ".zip", ".7z", ".rar", ".gz", ".tgz", ".bz2", ".xz", ".zst",
+    ".pdf", ".stpz", ".step.gz", ".stp.gz",
+    ".docx", ".xlsx", ".pptx", ".odt", ".ods",
+    ".png", ".jpg", ".jpeg", ".gif", ".webp",
+    ".mp4", ".mov", ".mp3",
+    ".glb", ".3mf",
+)
+
+
+class ZipStream:
+    """Write-only, non-seekable sink for zipfile, the written bytes are collected with pop()."""
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def zip_file_name(file_obj):
+    """Name of a File in an archive, the display name with the extension of the stored file."""
+    stored_name = os.path.basename(file_obj.file.name)
+    if not file_obj.display_name:
+        return stored_name
+    if os.path.splitext(file_obj.display_name)[1]:
+        return file_obj.display_name
+    return file_obj.display_name + os.path.splitext(stored_name)[1]
+
+
+def _unique_path(paths, folder_path, filename):
+    path = f"{folder_path}/{filename}" if folder_path else filename
+    name, ext = os.path.splitext(filename)
+    counter = 1
+    while path in paths:
+        base = f"{folder_path}/{name}" if folder_path else name
+        path = f"{base}_{counter}{ext}"
+        counter += 1
+    paths.add(path)
+    return path
+
+
+def iter_zip(entries, workers=None, skipped=None):
+    """Yield a ZIP archive of files chunk by chunk.
+
+    Args:
+        entries: Iterable of (folder path in the archive, File), the folder path may be ""
+        workers: Number of files read from storage ahead of the archive, see files.prefetch
+        skipped: Optional list, the Files that could not be read are appended to it
+
+    Files that cannot be read are left out. The download count of every file in the archive is
+    incremented.
+    """
+    stream = ZipStream()
+    paths = set()
+    fetched = prefetch(entries, fetch=_fetch_entry, workers=workers)
+    with zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED) as archive:
+        for (folder_path, file_obj), content, error in fetched:
+            if error is not None:
+                if skipped is not None:
+                    skipped.append(file_obj)
+                continue
+
+            with content:
+                filename = zip_file_name(file_obj)
+                info = zipfile.ZipInfo(_unique_path(paths, folder_path, filename), time.localtime()[:6])
+                info.external_attr = 0o600 << 16
+                if filename.lower().endswith(STORED_SUFFIXES):
+                    info.compress_type = zipfile.ZIP_STORED
+                else:
+                    info.compress_type = zipfile.ZIP_DEFLATED
+                with archive.open(info, "w", force_zip64=True) as target:
+                    for chunk in iter(lambda: content.read(CHUNK_SIZE), b""):
+                        target.write(chunk)
+                        yield from _pop(stream)
+
+            if file_obj.pk is not None:
+                File.objects.filter(pk=file_obj.pk).update(download_count=F("download_count") + 1)
+            yield from _pop(stream)
+    yield from _pop(stream)
+
+
+def _fetch_entry(entry):
+    return fetch_file(entry[1])
+
+
+def _pop(stream):
+    data = stream.pop()
+    if data:
+        yield data
+
+
+def streaming_zip_response(entries, filename):
+    """StreamingHttpResponse sending a ZIP archive of files, see iter_zip.
+
+    Returns:
+        The response, None if there are no entries.
+    """
+    entries = iter(entries)
+    first = next(entries, None)
+    if first is None:
+        return None
+
+    def all_entries():
+        yield first
+        yield from entries
+
+    response = StreamingHttpResponse(iter_zip(all_entries()), content_type="application/zip")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from "react";
+import React, { useState, useEffect, useCallback, useRef } from "react";
 
 import DokulyTable from "../../../dokuly_components/dokulyTable/dokulyTable";
 import DokulySearchBar from "../../../dokuly_components/dokulySearchBar";
@@ -11,6 +11,8 @@ const ReleaseStates = ({ setRefresh }) => {
   const [totalCount, setTotalCount] = useState(0);
   const [currentPage, setCurrentPage] = useState(1);
   const [searchTerm, setSearchTerm] = useState("");
+  // Cursor of each page reached from the page before it, lets the backend page without offsets
+  const pageCursors = useRef({});
   const pageSize = 50;
 
   const states = [
@@ -25,10 +27,13 @@ const ReleaseStates = ({ setRefresh }) => {
       setTotalCount(0);
       return;
     }
-    searchReleaseItems(search, page, pageSize).then((res) => {
+    searchReleaseItems(search, page, pageSize, pageCursors.current[page]).then((res) => {
       if (res.status === 200) {
         setItems(res.data.results);
         setTotalCount(res.data.total);
+        if (res.data.next_cursor) {
+          pageCursors.current[page + 1] = res.data.next_cursor;
+        }
       }
     });
   }, []);
@@ -40,6 +45,7 @@ const ReleaseStates = ({ setRefresh }) => {
   }, [currentPage]);
 
   const handleSearchChange = useCallback((term) => {
+    pageCursors.current = {};
     setSearchTerm(term);
     setCurrentPage(1);
     fetchItems(term, 1);
@@ -3,7 +3,7 @@ import { toast } from "react-toastify";
 import { Row, Col } from "react-bootstrap";
 import { useNavigate } from "react-router-dom";
 import DokulyTable from "../../dokuly_components/dokulyTable/dokulyTable";
-import { getBomWithLinkedParts } from "./functions/queries";
+import { getBomMatchCandidates, getBomWithLinkedParts } from "./functions/queries";
 import { buildBomObject } from "./functions/buildBomObject";
 import { thumbnailFormatter } from "../../dokuly_components/formatters/thumbnailFormatter";
 import BomAddItemButton from "./addItemButton";
@@ -74,6 +74,7 @@ const BomTable = ({
   const [bomCopy, setBomCopy] = useState([]);
   const [autoFocusItemId, setAutoFocusItemId] = useState(null);
   const [highlightedItemId, setHighlightedItemId] = useState(null);
+  const [matchCandidates, setMatchCandidates] = useState({});
 
   // Refs for values that change frequently but shouldn't invalidate the columns memo
   const bomRef = useRef(bom);
@@ -82,6 +83,8 @@ const BomTable = ({
   autoFocusItemIdRef.current = autoFocusItemId;
   const highlightedItemIdRef = useRef(highlightedItemId);
   highlightedItemIdRef.current = highlightedItemId;
+  const matchCandidatesRef = useRef(matchCandidates);
+  matchCandidatesRef.current = matchCandidates;
 
   const [suppliers, refreshSuppliers, loadingSuppliers, errorSuppliers] =
     useSuppliers();
@@ -143,6 +146,18 @@ const BomTable = ({
         setParts(res?.parts ?? []);
         setAssemblies(res?.asms ?? []);
         setPcbas(res?.pcbas ?? []);
+
+        // Suggest parts for lines the import could not match
+        const hasUnmatched = (res?.bom_items ?? []).some(
+          (item) => !item.part && !item.pcba && !item.assembly && item.temporary_mpn,
+        );
+        if (res?.bom?.id && hasUnmatched && !is_locked_bom) {
+          getBomMatchCandidates(res.bom.id)
+            .then((candidates) => setMatchCandidates(candidates ?? {}))
+            .catch(() => setMatchCandidates({}));
+        } else {
+          setMatchCandidates({});
+        }
       })
       .catch((err) => {
         toast.error(err?.message || "Error fetching BOM");
@@ -157,7 +172,7 @@ const BomTable = ({
       });
 
     refreshBomIssues();
-  }, [id, app, refreshCounter, refreshBomIssues]);
+  }, [id, app, refreshCounter, refreshBomIssues, is_locked_bom]);
 
   useEffect(() => {
     if (!bom_items || !Array.isArray(bom_items)) return;
@@ -249,6 +264,7 @@ const BomTable = ({
       setAutoFocusItemId: setAutoFocusItemId,
       allBomItemsRef: bomRef,
       onDuplicateFound: handleDuplicateFound,
+      matchCandidatesRef: matchCandidatesRef,
     };
     return getBomTableColumns(columnConfiguration);
   // eslint-disable-next-line react-hooks/exhaustive-deps
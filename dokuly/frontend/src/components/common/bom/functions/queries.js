@@ -101,6 +101,15 @@ export const matchBomItemsWithParts = (bomId) => {
     });
 };
 
+// Ranked part candidates of the unmatched lines of a BOM, { [bom item id]: [part, ...] }
+export const getBomMatchCandidates = (bomId, limit = 5) => {
+  const url = `/api/assembly_bom/${bomId}/matchCandidates/`;
+
+  return axios
+    .get(url, { ...tokenConfig(), params: { limit } })
+    .then((res) => res.data);
+};
+
 export const addBomItemWithValues = (
   bom_id,
   temporary_mpn,
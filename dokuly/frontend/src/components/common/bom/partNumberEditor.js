@@ -2,6 +2,7 @@ import React, { useState, useEffect, useRef } from "react";
 import { editBomItem, removeBomItem } from "./functions/queries";
 import { toast } from "react-toastify";
 import GlobalPartSelection from "../../dokuly_components/globalPartSelector/globalPartSelection";
+import { PartSuggestions } from "../../dokuly_components/globalPartSelector/partSuggestions";
 import DokulyModal from "../../dokuly_components/dokulyModal";
 import SubmitButton from "../../dokuly_components/submitButton";
 import CancelButton from "../../dokuly_components/cancelButton";
@@ -43,6 +44,7 @@ const PartNumberEditor = ({
   allBomItems = [],
   onDuplicateFound = null,
   designatorHeader = "F/N",
+  matchCandidates = [], // Ranked parts for an unmatched line, see getBomMatchCandidates
 }) => {
   const [isEditing, setIsEditing] = useState(false);
   const [selected_item, setSelectedItem] = useState(null);
@@ -267,6 +269,21 @@ const PartNumberEditor = ({
           <span>{displayPartNumber}</span>
         ) : isEditing ? (
           <div ref={globalPartSelectionRef}>
+            {matchCandidates.length > 0 && (
+              <div className="mb-1">
+                <small className="text-muted">Suggested matches</small>
+                <PartSuggestions
+                  searchTerm={row.temporary_mpn || ""}
+                  suggestions={matchCandidates.map((candidate) => ({
+                    ...candidate,
+                    item_type: "Part",
+                  }))}
+                  onSelectSuggestion={setSelectedItem}
+                  onHide={() => {}}
+                  organization={organization}
+                />
+              </div>
+            )}
             <GlobalPartSelection
               searchTerm={searchTerm}
               setSelectedItem={setSelectedItem}
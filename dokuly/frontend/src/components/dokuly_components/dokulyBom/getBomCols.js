@@ -29,6 +29,7 @@ export const getBomTableColumns = ({
   setAutoFocusItemId = () => {},
   allBomItemsRef = { current: [] },
   onDuplicateFound = null,
+  matchCandidatesRef = { current: {} },
 }) => {
   const columns = [
     {
@@ -49,6 +50,7 @@ export const getBomTableColumns = ({
             allBomItems={allBomItemsRef.current}
             onDuplicateFound={onDuplicateFound}
             designatorHeader={designatorHeader}
+            matchCandidates={matchCandidatesRef.current[row.id] ?? []}
           />
         );
       },
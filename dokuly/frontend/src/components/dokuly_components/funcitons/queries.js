@@ -14,6 +14,19 @@ export const searchPartsGlobal = (query, includeTables = ["parts", "pcbas", "ass
   return promise;
 };
 
+export const autocompletePartNumbers = (
+  prefix,
+  tables = ["parts", "pcbas", "assemblies"],
+  limit = 10,
+  latestOnly = false
+) => {
+  const promise = axios.get("api/parts/autocomplete/", {
+    ...tokenConfig(),
+    params: { q: prefix, tables: tables.join(","), limit, latest_only: latestOnly },
+  });
+  return promise;
+};
+
 export const getImage = (imageId, version = "compressed") => {
   const promise = axios.get(`api/files/image/${imageId}/${version}/`, {
     ...tokenConfig(),
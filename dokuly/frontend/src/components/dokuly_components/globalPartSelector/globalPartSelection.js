@@ -1,10 +1,14 @@
 import React, { useState, useEffect, useCallback, useRef } from "react";
 import { Container, Form, Row, Col } from "react-bootstrap";
-import { searchPartsGlobal } from "../funcitons/queries";
+import { autocompletePartNumbers, searchPartsGlobal } from "../funcitons/queries";
 import { toast } from "react-toastify";
 import highlightSearchTerm from "../funcitons/highlightSearchTerm"; // TODO
 import { PartSuggestions } from "./partSuggestions";
 
+// Tables the part number autocomplete covers, with the item_type global search gives their items
+const AUTOCOMPLETE_ITEM_TYPES = { parts: "Part", pcbas: "PCBA", assemblies: "Assembly" };
+const AUTOCOMPLETE_DELAY_MS = 200;
+
 const GlobalPartSelection = ({
   setSelectedItem,
   searchTerm = "",
@@ -18,21 +22,30 @@ const GlobalPartSelection = ({
   const [showSuggestions, setShowSuggestions] = useState(false);
   const searchInputRef = useRef(null);
   const hasAutoSearched = useRef(false);
+  const autocompleteTimer = useRef(null);
+  // Only the latest search or autocomplete request shows its results
+  const latestRequest = useRef(0);
 
   useEffect(() => {
     if (searchInputRef.current) {
       searchInputRef.current.focus();
     }
+    return () => clearTimeout(autocompleteTimer.current);
   }, []);
 
   const handleSearch = useCallback(
     async (searchQuery) => {
+      clearTimeout(autocompleteTimer.current);
+      const request = ++latestRequest.current;
       try {
         const response = await searchPartsGlobal(
           searchQuery,
           includeTables,
           latestOnly,
         );
+        if (request !== latestRequest.current) {
+          return;
+        }
         const searchResults = response.data;
 
         if (response.status === 200) {
@@ -48,6 +61,42 @@ const GlobalPartSelection = ({
     [includeTables, latestOnly],
   );
 
+  // Prefix matches of part numbers and MPNs while typing, Enter runs the full search
+  const handleAutocomplete = useCallback(
+    async (prefix) => {
+      const request = ++latestRequest.current;
+      const tables = includeTables.filter((table) => table in AUTOCOMPLETE_ITEM_TYPES);
+      if (!prefix.trim() || tables.length === 0) {
+        return;
+      }
+      try {
+        const response = await autocompletePartNumbers(prefix, tables, 10, latestOnly);
+        if (request !== latestRequest.current || response.status !== 200) {
+          return;
+        }
+        setResults(
+          response.data.map((item) => ({
+            ...item,
+            item_type: AUTOCOMPLETE_ITEM_TYPES[item.app],
+          })),
+        );
+        setShowSuggestions(true);
+      } catch (error) {
+        // Suggestions are optional, Enter still searches
+      }
+    },
+    [includeTables, latestOnly],
+  );
+
+  const handleQueryChange = (value) => {
+    setQuery(value);
+    clearTimeout(autocompleteTimer.current);
+    autocompleteTimer.current = setTimeout(
+      () => handleAutocomplete(value),
+      AUTOCOMPLETE_DELAY_MS,
+    );
+  };
+
   // Auto-search once on mount with the initial searchTerm
   useEffect(() => {
     if (searchTerm && !hasAutoSearched.current) {
@@ -102,7 +151,7 @@ const GlobalPartSelection = ({
             className="input-edit"
             type="text"
             value={query}
-            onChange={(e) => setQuery(e.target.value)}
+            onChange={(e) => handleQueryChange(e.target.value)}
             onKeyDown={(e) => {
               if (e.key === "Enter") {
                 handleSearch(query);
@@ -157,7 +206,7 @@ const GlobalPartSelection = ({
                 className="bom-inline-input"
                 type="text"
                 value={query}
-                onChange={(e) => setQuery(e.target.value)}
+                onChange={(e) => handleQueryChange(e.target.value)}
                 onKeyDown={(e) => {
                   if (e.key === "Enter") {
                     handleSearch(query);
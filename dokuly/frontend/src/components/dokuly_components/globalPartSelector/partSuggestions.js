@@ -14,8 +14,13 @@ export const PartSuggestions = ({
     if (!text) {
       return "";
     }
+    if (!searchTerm) {
+      return text;
+    }
 
-    const parts = text.split(new RegExp(`(${searchTerm})`, "gi"));
+    // Searched part numbers and MPNs may contain characters special to regular expressions
+    const escaped = searchTerm.replace(/[.*+?^${}()|[\]\\]/g, "\\$&");
+    const parts = text.split(new RegExp(`(${escaped})`, "gi"));
     return parts.map((part, index) => {
       const key = `${part}-${index}`;
       return part.toLowerCase() === searchTerm.toLowerCase() ? (
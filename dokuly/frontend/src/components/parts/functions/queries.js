@@ -17,9 +17,10 @@ export const editReleaseState = (id, app, releaseState) => {
   return dataPromise;
 };
 
-export const searchReleaseItems = (search = "", page = 1, pageSize = 50) => {
+export const searchReleaseItems = (search = "", page = 1, pageSize = 50, cursor = null) => {
+  const cursorParam = cursor ? `&cursor=${encodeURIComponent(cursor)}` : "";
   return axios.get(
-    `api/items/search/releaseManagement/?search=${encodeURIComponent(search)}&page=${page}&page_size=${pageSize}`,
+    `api/items/search/releaseManagement/?search=${encodeURIComponent(search)}&page=${page}&page_size=${pageSize}${cursorParam}`,
     tokenConfig()
   );
 };
@@ -1,6 +1,5 @@
 from django.db.models import Q, Count
 from django.db.models import Sum
-from parts.models import Part
 from inventory.models import Inventory
 from inventory.models import Location
 from inventory.models import LocationTypes
@@ -25,9 +24,7 @@ from purchasing.models import PoItem
 from django.db.models import Sum, Q, F, Count, FloatField
 from django.db.models.functions import Coalesce, Greatest, Cast
 from production.models import Lot, Production
-from assembly_bom.models import Bom_item, Assembly_bom
-from pcbas.models import Pcba
-from assemblies.models import Assembly
+from assembly_bom.bom_explosion import get_where_used
 from datetime import datetime
 from django.utils.dateparse import parse_date
 
@@ -271,26 +268,19 @@ def get_stock_forecast(request, object_id, app, to_date):
             is_archived=False
         )
 
-        # Building Q objects for dynamic filtering
-        q_objects = Q()
-        if isinstance(model_object, Part):
-            q_objects |= Q(part=model_object)
-        if isinstance(model_object, Pcba):
-            q_objects |= Q(pcba=model_object)
-        if isinstance(model_object, Assembly):
-            q_objects |= Q(assembly=model_object)
-
-        bom_items = Bom_item.objects.filter(q_objects).select_related('bom')
-        bom_ids = list(bom_items.values_list('bom__id', flat=True))
-
-        assembly_boms = Assembly_bom.objects.filter(id__in=bom_ids)
-        pcba_ids = list(assembly_boms.values_list('pcba', flat=True))
-        assembly_ids = list(assembly_boms.values_list('assembly_id', flat=True))
+        # Direct parents using the object, with the quantity used per parent, from the where-used index
+        quantity_per_assembly = {}
+        quantity_per_pcba = {}
+        for row in get_where_used(app, [model_object.id], max_depth=1):
+            if row['root_assembly_id']:
+                quantity_per_assembly[row['root_assembly_id']] = row['total_quantity']
+            elif row['root_pcba_id']:
+                quantity_per_pcba[row['root_pcba_id']] = row['total_quantity']
 
         # Filter lots based on identified BOMs
         bom_lots = Lot.objects.filter(
-            Q(pcba__id__in=pcba_ids) |
-            Q(assembly_id__in=assembly_ids),
+            Q(pcba__id__in=list(quantity_per_pcba)) |
+            Q(assembly_id__in=list(quantity_per_assembly)),
             planned_production_date__gt=to_date,
             is_archived=False
         )
@@ -304,33 +294,30 @@ def get_stock_forecast(request, object_id, app, to_date):
 
         forecast_data = []
         for lot in all_lots:
-
-            try:
-                production_count, lot_quantity = production_dict.get(lot.id, (0, lot.quantity))
-
-                if getattr(lot, model_name) == model_object:
-                    lot_type = 'Direct'
-                    stock_change = lot_quantity - production_count
+            production_count, lot_quantity = production_dict.get(lot.id, (0, lot.quantity))
+
+            if getattr(lot, model_name) == model_object:
+                lot_type = 'Direct'
+                stock_change = lot_quantity - production_count
+            else:
+                lot_type = 'BOM'
+                if lot.assembly_id in quantity_per_assembly:
+                    quantity_used = quantity_per_assembly[lot.assembly_id]
+                elif lot.pcba_id in quantity_per_pcba:
+                    quantity_used = quantity_per_pcba[lot.pcba_id]
                 else:
-                    lot_type = 'BOM'
-                    if lot.assembly:
-                        associated_bom = assembly_boms.get(assembly_id=lot.assembly.id)
-                    elif lot.pcba:
-                        associated_bom = assembly_boms.get(pcba=lot.pcba)
-
-                    related_bom_item = bom_items.get(bom=associated_bom, **{model_name: model_object})
-                    remaining_productions = lot_quantity - production_count
-                    bom_quantity_used = related_bom_item.quantity * remaining_productions
-                    stock_change = -bom_quantity_used
-
-                forecast_data.append({
-                    'lot_number': lot.lot_number,
-                    'planned_production_date': lot.planned_production_date,
-                    'stock_change': stock_change,
-                    'lot_type': lot_type
-                })
-            except Bom_item.DoesNotExist:
-                continue
+                    continue
+
+                remaining_productions = lot_quantity - production_count
+                bom_quantity_used = quantity_used * remaining_productions
+                stock_change = -bom_quantity_used
+
+            forecast_data.append({
+                'lot_number': lot.lot_number,
+                'planned_production_date': lot.planned_production_date,
+                'stock_change': stock_change,
+                'lot_type': lot_type
+            })
 
         return Response(forecast_data, status=status.HTTP_200_OK)
     except Exception as e:
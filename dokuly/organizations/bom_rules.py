@@ -0,0 +1,158 @@
+"""
+BOM release rule evaluation.
+
+evaluate_bom_rules walks the whole BOM tree of an assembly or PCBA with a single recursive query,
+visiting every BOM in it once however often it is reused, and computes the matched and released
+counts of every BOM line in it with conditional aggregation. The lines breaking a rule are
+returned by the same query, so gating a release costs one round trip regardless of the depth of
+the tree.
+"""
+
+from django.db import connection
+
+from assemblies.models import Assembly
+from assembly_bom.models import Assembly_bom, Bom_item
+from parts.models import Part
+from pcbas.models import Pcba
+
+_ITEM_TYPES = {"part": "Part", "assembly": "Assembly", "pcba": "PCBA"}
+
+_BOM_RULES_QUERY = """
+WITH RECURSIVE tree (bom_id) AS (
+    -- The first BOM of every item, like Assembly_bom.objects.filter(...).first()
+    SELECT id FROM (
+        SELECT id FROM {bom} WHERE {root_column} = %(root_id)s ORDER BY id LIMIT 1
+    ) AS root
+    UNION
+    -- UNION keeps every BOM once, however many paths lead to it, and stops at cycles
+    SELECT child.bom_id
+    FROM tree
+    JOIN {bom_item} line ON line.bom_id = tree.bom_id
+    CROSS JOIN LATERAL (
+        SELECT COALESCE(
+            (SELECT id FROM {bom} WHERE assembly_id = line.assembly_id ORDER BY id LIMIT 1),
+            (SELECT id FROM {bom} WHERE pcba_id = line.pcba_id ORDER BY id LIMIT 1)
+        ) AS bom_id
+    ) AS child
+    WHERE (line.assembly_id IS NOT NULL OR line.pcba_id IS NOT NULL) AND child.bom_id IS NOT NULL
+),
+items AS (
+    SELECT
+        line.id, line.designator, line.temporary_mpn, line.temporary_manufacturer, line.comment,
+        CASE
+            WHEN line.part_id IS NOT NULL THEN 'part'
+            WHEN line.assembly_id IS NOT NULL THEN 'assembly'
+            WHEN line.pcba_id IS NOT NULL THEN 'pcba'
+        END AS item_type,
+        CASE
+            WHEN line.part_id IS NOT NULL THEN part.full_part_number
+            WHEN line.assembly_id IS NOT NULL THEN assembly.full_part_number
+            ELSE pcba.full_part_number
+        END AS full_part_number,
+        CASE
+            WHEN line.part_id IS NOT NULL THEN part.display_name
+            WHEN line.assembly_id IS NOT NULL THEN assembly.display_name
+            ELSE pcba.display_name
+        END AS display_name,
+        CASE
+            WHEN line.part_id IS NOT NULL THEN part.release_state
+            WHEN line.assembly_id IS NOT NULL THEN assembly.release_state
+            ELSE pcba.release_state
+        END AS release_state,
+        COALESCE(owner_assembly.full_part_number, owner_pcba.full_part_number) AS parent
+    FROM tree
+    JOIN {bom} bom ON bom.id = tree.bom_id
+    JOIN {bom_item} line ON line.bom_id = tree.bom_id
+    LEFT JOIN {part} part ON part.id = line.part_id
+    LEFT JOIN {assembly} assembly ON assembly.id = line.assembly_id
+    LEFT JOIN {pcba} pcba ON pcba.id = line.pcba_id
+    LEFT JOIN {assembly} owner_assembly ON owner_assembly.id = bom.assembly_id
+    LEFT JOIN {pcba} owner_pcba ON owner_pcba.id = bom.pcba_id
+),
+counts AS (
+    SELECT
+        EXISTS (SELECT 1 FROM tree) AS has_bom,
+        COUNT(*) AS total_count,
+        COUNT(*) FILTER (WHERE item_type IS NOT NULL) AS matched_count,
+        COUNT(*) FILTER (WHERE item_type IS NULL OR release_state = 'Released') AS released_count
+    FROM items
+)
+SELECT
+    counts.has_bom, counts.total_count, counts.matched_count, counts.released_count,
+    offending.id, offending.item_type, offending.full_part_number, offending.display_name, offending.designator,
+    offending.temporary_mpn, offending.temporary_manufacturer, offending.comment, offending.parent
+FROM counts
+LEFT JOIN (
+    SELECT * FROM items WHERE item_type IS NULL OR release_state IS DISTINCT FROM 'Released'
+) AS offending ON TRUE
+ORDER BY offending.id
+"""
+
+
+def evaluate_bom_rules(app, item_id):
+    """Matched and released state of every line in the BOM tree of an assembly or pcba.
+
+    Args:
+        app: "assemblies" or "pcbas"
+        item_id: ID of the root item
+
+    Returns:
+        None if the item has no BOM, else a dict with:
+            total_count: Number of BOM lines in the whole tree
+            matched_count: Lines linked to a part, assembly or PCBA
+            released_count: Lines not linked to an unreleased item
+            offending_items: Lines breaking a rule, in BOM order, either
+                {"reason": "unmatched", "designator", "temporary_mpn", "temporary_manufacturer", "comment", "parent"}
+                or {"reason": "unreleased", "type", "part_number", "display_name", "parent"}
+        where parent is the full part number of the assembly or PCBA whose BOM holds the line.
+    """
+    query = _BOM_RULES_QUERY.format(
+        bom=Assembly_bom._meta.db_table,
+        bom_item=Bom_item._meta.db_table,
+        part=Part._meta.db_table,
+        assembly=Assembly._meta.db_table,
+        pcba=Pcba._meta.db_table,
+        root_column="assembly_id" if app == "assemblies" else "pcba_id",
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(query, {"root_id": item_id})
+        rows = cursor.fetchall()
+
+    has_bom, total_count, matched_count, released_count = rows[0][:4]
+    if not has_bom:
+        return None
+
+    offending_items = []
+    for row in rows:
+        line_id, item_type, full_part_number, display_name, designator, temporary_mpn, temporary_manufacturer, comment, parent = row[4:]
+        if line_id is None:
+            continue  # No offending lines, only the counts were returned
+        if item_type is None:
+            offending_items.append({
+                'reason': 'unmatched',
+                'designator': designator or '-',
+                'temporary_mpn': temporary_mpn or '-',
+                'temporary_manufacturer': temporary_manufacturer or '-',
+                'comment': comment or '-',
+                'parent': parent,
+            })
+        else:
+            offending_items.append({
+                'reason': 'unreleased',
+                'type': _ITEM_TYPES[item_type],
+                'part_number': full_part_number,
+                'display_name': display_name,
+                'parent': parent,
+            })
+
+    return {
+        "total_count": total_count,
+        "matched_count": matched_count,
+        "released_count": released_count,
+        "offending_items": offending_items,
+    }
+
+
+def offending_items_by_reason(result, reason):
+    """The offending items of an evaluate_bom_rules result for one reason, "unmatched" or "unreleased"."""
+    return [item for item in result["offending_items"] if item["reason"] == reason]
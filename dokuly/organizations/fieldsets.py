@@ -0,0 +1,110 @@
+"""
+Sparse fieldsets for the API v1 endpoints.
+
+Query parameters:
+- fields: Comma separated fields to return, e.g. fields=id,full_part_number,mpn,last_updated
+- exclude: Comma separated fields to leave out, e.g. exclude=part_information,price_history
+
+List endpoints also defer the model fields only used by fields left out, so they are not read
+from the database either.
+"""
+
+from drf_yasg import openapi
+
+# Swagger parameters of endpoints with sparse fieldsets
+FIELDSET_PARAMETERS = [
+    openapi.Parameter(
+        "fields", openapi.IN_QUERY, type=openapi.TYPE_STRING, required=False,
+        description="Comma separated fields to return, all fields when not given.",
+    ),
+    openapi.Parameter(
+        "exclude", openapi.IN_QUERY, type=openapi.TYPE_STRING, required=False,
+        description="Comma separated fields to leave out.",
+    ),
+]
+
+
+class InvalidFieldset(ValueError):
+    pass
+
+
+class SparseFieldsetMixin:
+    """Serializer returning only the fields listed in the "fieldset" context key.
+
+    Method fields reading model fields can list them in Meta.method_field_sources, so
+    defer_unselected knows what they need, e.g. {"quality_assurance_id": ["quality_assurance"]}.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fieldset = self.context.get("fieldset")
+        if fieldset is not None:
+            for name in set(self.fields) - set(fieldset):
+                self.fields.pop(name)
+
+
+def _split(value):
+    return [name.strip() for name in (value or "").split(",") if name.strip()]
+
+
+def get_fieldset(request, serializer_class):
+    """Fields of a serializer selected by the query parameters of a request.
+
+    Returns:
+        List of field names in serializer order, None if the request did not select fields.
+
+    Raises:
+        InvalidFieldset: If a field name is not a field of the serializer.
+    """
+    requested = _split(request.query_params.get("fields"))
+    excluded = _split(request.query_params.get("exclude"))
+    if not requested and not excluded:
+        return None
+
+    available = list(serializer_class().fields)
+    unknown = sorted(set(requested + excluded) - set(available))
+    if unknown:
+        raise InvalidFieldset(f"Unknown fields: {', '.join(unknown)}")
+    return [
+        name for name in available
+        if (not requested or name in requested) and name not in excluded
+    ]
+
+
+def wants_field(fieldset, *names):
+    """True if any of the fields is in the fieldset, or the fieldset is all fields."""
+    return fieldset is None or any(name in fieldset for name in names)
+
+
+def defer_unselected(queryset, serializer_class, fieldset):
+    """Defer the model fields only needed by serializer fields left out of the fieldset.
+
+    Relations traversed with select_related are kept. Nothing is deferred if a selected method
+    field does not list its sources in Meta.method_field_sources.
+    """
+    if fieldset is None:
+        return queryset
+
+    serializer_fields = serializer_class().fields
+    method_field_sources = getattr(serializer_class.Meta, "method_field_sources", {})
+    needed = set()
+    for name in fieldset:
+        source = serializer_fields[name].source
+        if source == "*":
+            if name not in method_field_sources:
+                return queryset
+            needed.update(method_field_sources[name])
+        else:
+            needed.add(source.split(".")[0])
+
+    select_related = queryset.query.select_related
+    traversed = set(select_related) if isinstance(select_related, dict) else set()
+    unneeded = [
+        field.name
+        for field in queryset.model._meta.concrete_fields
+        if not field.primary_key
+        and field.name not in needed
+        and field.name not in traversed
+        and not (field.is_relation and select_related is True)
+    ]
+    return queryset.defer(*unneeded) if unneeded else queryset
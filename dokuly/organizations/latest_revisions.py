@@ -0,0 +1,84 @@
+"""
+Set based recomputation of is_latest_revision.
+
+All revisions of an item share its part number, or for documents its project and document
+number. Among the revisions that are not archived, the ones with the highest
+(revision_count_major, revision_count_minor) are the latest. Archived revisions are left as
+they are.
+
+Each model is recomputed with one UPDATE ranking the revisions of every item with a window
+function, which only writes the rows whose flag changes.
+"""
+
+from django.db import connection
+
+from assemblies.models import Assembly
+from documents.models import Document
+from parts.models import Part
+from pcbas.models import Pcba
+
+# App: (model, fields identifying an item across its revisions)
+REVISIONED_MODELS = {
+    "parts": (Part, ["part_number"]),
+    "pcbas": (Pcba, ["part_number"]),
+    "assemblies": (Assembly, ["part_number"]),
+    "documents": (Document, ["project", "document_number"]),
+}
+
+
+def update_latest_revisions(app, **item):
+    """Recompute is_latest_revision of an app, or of one item of it.
+
+    Args:
+        app: Key of REVISIONED_MODELS
+        item: Values of the item fields to only recompute one item, e.g. part_number=42
+
+    Returns:
+        Number of revisions whose is_latest_revision changed.
+    """
+    model, key_fields = REVISIONED_MODELS[app]
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    keys = [quote(model._meta.get_field(name).column) for name in key_fields]
+    major = quote(model._meta.get_field("revision_count_major").column)
+    minor = quote(model._meta.get_field("revision_count_minor").column)
+
+    if set(item) - set(key_fields):
+        raise ValueError(f"{app} items are identified by {', '.join(key_fields)}")
+    conditions = ['"is_archived" IS NOT TRUE']
+    params = []
+    for name, value in item.items():
+        column = quote(model._meta.get_field(name).column)
+        if value is None:
+            conditions.append(f"{column} IS NULL")
+        else:
+            conditions.append(f"{column} = %s")
+            params.append(value)
+
+    # RANK gives tied revisions the same rank, so all of them stay latest
+    sql = f"""
+        UPDATE {table} AS item
+        SET "is_latest_revision" = ranked.is_latest, "last_updated" = NOW()
+        FROM (
+            SELECT "id", RANK() OVER (
+                PARTITION BY {", ".join(keys)}
+                ORDER BY {major} DESC NULLS LAST, {minor} DESC NULLS LAST
+            ) = 1 AS is_latest
+            FROM {table}
+            WHERE {" AND ".join(conditions)}
+        ) AS ranked
+        WHERE item."id" = ranked."id"
+            AND item."is_latest_revision" IS DISTINCT FROM ranked.is_latest
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def update_all_latest_revisions(apps=None):
+    """Recompute is_latest_revision of several apps, all by default.
+
+    Returns:
+        Dict of app to the number of revisions whose is_latest_revision changed.
+    """
+    return {app: update_latest_revisions(app) for app in (apps or REVISIONED_MODELS)}
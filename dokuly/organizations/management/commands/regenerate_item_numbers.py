@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from organizations.models import Organization
+from organizations.renumbering import CHUNK_SIZE, RENUMBERED_APPS, regenerate_numbers
+
+
+class Command(BaseCommand):
+    help = (
+        "Regenerate the full part numbers, full document numbers and formatted revisions of all "
+        "items from the numbering templates and revision settings of an organization."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--organization",
+            type=int,
+            help="Organization whose settings are applied, required if there are several.",
+        )
+        parser.add_argument(
+            "--app",
+            action="append",
+            choices=RENUMBERED_APPS,
+            help="Only regenerate this app, can be given several times.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        organization_id = options["organization"]
+        if organization_id is None:
+            organization_ids = list(Organization.objects.values_list("id", flat=True)[:2])
+            if len(organization_ids) != 1:
+                raise CommandError("Give the organization with --organization")
+            organization_id = organization_ids[0]
+
+        def progress(app, done, total):
+            self.stdout.write(f"{app}: {done}/{total}")
+
+        changed = regenerate_numbers(
+            organization_id, options["app"], options["chunk_size"], progress=progress
+        )
+        for app, count in changed.items():
+            self.stdout.write(f"{app}: {count} items renumbered")
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from organizations.latest_revisions import REVISIONED_MODELS, update_all_latest_revisions
+
+
+class Command(BaseCommand):
+    help = "Recompute is_latest_revision of all parts, PCBAs, assemblies and documents."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--app",
+            action="append",
+            choices=list(REVISIONED_MODELS),
+            help="Only repair this app, can be given several times.",
+        )
+
+    def handle(self, *args, **options):
+        changed = update_all_latest_revisions(options["app"])
+        for app, count in changed.items():
+            self.stdout.write(f"{app}: {count} revisions changed")
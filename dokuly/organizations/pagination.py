@@ -0,0 +1,131 @@
+"""
+Opt-in keyset pagination for the list endpoints.
+
+List endpoints return the whole table unless the request has a cursor or limit query parameter.
+Pages are then ordered by primary key and addressed with an opaque cursor holding the last id
+of the previous page, so every page is an index range scan, however deep into the table it is.
+
+Query parameters:
+- cursor: next_cursor of the previous page, empty for the first page
+- limit: Items per page, default 100, at most 1000
+- updated_since: Only items changed at or after this ISO 8601 date or datetime
+- project: Only items of this project id
+"""
+
+import base64
+import datetime
+import json
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from drf_yasg import openapi
+from rest_framework import status
+from rest_framework.response import Response
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+# Swagger parameters of paginated endpoints
+CURSOR_PAGINATION_PARAMETERS = [
+    openapi.Parameter(
+        "cursor", openapi.IN_QUERY, type=openapi.TYPE_STRING, required=False,
+        description="Returns pages when given. Empty for the first page, then next_cursor of the previous page.",
+    ),
+    openapi.Parameter(
+        "limit", openapi.IN_QUERY, type=openapi.TYPE_INTEGER, required=False,
+        description=f"Items per page, returns pages when given. Default {DEFAULT_LIMIT}, at most {MAX_LIMIT}.",
+    ),
+    openapi.Parameter(
+        "updated_since", openapi.IN_QUERY, type=openapi.TYPE_STRING, required=False,
+        description="With pages only: items changed at or after this ISO 8601 date or datetime.",
+    ),
+    openapi.Parameter(
+        "project", openapi.IN_QUERY, type=openapi.TYPE_INTEGER, required=False,
+        description="With pages only: items of this project.",
+    ),
+]
+
+
+class InvalidPageParameters(ValueError):
+    pass
+
+
+def wants_pages(request):
+    """True if the request opted in to pagination."""
+    return "cursor" in request.query_params or "limit" in request.query_params
+
+
+def encode_cursor(last_id):
+    return base64.urlsafe_b64encode(json.dumps({"id": last_id}).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))["id"])
+    except (ValueError, TypeError, KeyError, UnicodeError):
+        raise InvalidPageParameters("Invalid cursor")
+
+
+def _parse_updated_since(value):
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise InvalidPageParameters("Invalid updated_since, use an ISO 8601 date or datetime")
+        moment = datetime.datetime.combine(day, datetime.time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment, datetime.timezone.utc)
+    return moment
+
+
+def get_page(request, queryset):
+    """One page of a queryset, filtered and ordered by the query parameters of the request.
+
+    Returns:
+        (items, next_cursor), next_cursor is None on the last page.
+    """
+    params = request.query_params
+    try:
+        limit = int(params.get("limit") or DEFAULT_LIMIT)
+    except ValueError:
+        raise InvalidPageParameters("Invalid limit")
+    limit = min(max(limit, 1), MAX_LIMIT)
+
+    if params.get("cursor"):
+        queryset = queryset.filter(id__gt=decode_cursor(params["cursor"]))
+    if params.get("updated_since"):
+        queryset = queryset.filter(last_updated__gte=_parse_updated_since(params["updated_since"]))
+    if params.get("project"):
+        try:
+            queryset = queryset.filter(project_id=int(params["project"]))
+        except ValueError:
+            raise InvalidPageParameters("Invalid project")
+
+    # One extra row tells whether there is a next page
+    items = list(queryset.order_by("id")[:limit + 1])
+    next_cursor = None
+    if len(items) > limit:
+        last = items[limit - 1]
+        # Model instances, or rows of .values() querysets
+        next_cursor = encode_cursor(last["id"] if isinstance(last, dict) else last.id)
+    return items[:limit], next_cursor
+
+
+def paginated_response(request, queryset, serialize):
+    """Page response of a list endpoint, None if the request did not ask for pages.
+
+    Args:
+        request: DRF request
+        queryset: Every item the endpoint would return without pages
+        serialize: Callable serializing a list of items to response data
+
+    Returns:
+        Response with {"results": [...], "next_cursor": str or None}, or None.
+    """
+    if not wants_pages(request):
+        return None
+    try:
+        items, next_cursor = get_page(request, queryset)
+    except InvalidPageParameters as e:
+        return Response(str(e), status=status.HTTP_400_BAD_REQUEST)
+    return Response({"results": serialize(items), "next_cursor": next_cursor}, status=status.HTTP_200_OK)
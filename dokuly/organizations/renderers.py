@@ -0,0 +1,34 @@
+"""
+JSON renderer for large responses, encoding with orjson when it is installed.
+
+orjson encodes long lists of plain dicts several times faster than the json module, which
+matters for the table endpoints returning thousands of rows. The output is the same compact
+JSON as JSONRenderer.
+"""
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_encoder = JSONEncoder()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer using orjson, falling back to JSONRenderer without orjson, for indented
+    output, and for data orjson cannot encode."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            return orjson.dumps(
+                data,
+                default=_encoder.default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z,
+            )
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(data, accepted_media_type, renderer_context)
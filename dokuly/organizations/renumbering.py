@@ -0,0 +1,176 @@
+"""
+Bulk regeneration of full part numbers, full document numbers and formatted revisions.
+
+After an organization changes its numbering templates or revision settings, existing items keep
+their old numbers until they are regenerated here. The settings are read once, the numbers are
+formatted in memory with the same template functions used when items are created, and the items
+whose numbers change are written with bulk_update, a chunk at a time.
+"""
+
+from django.utils import timezone
+
+from assemblies.models import Assembly
+from documents.models import Document, Document_Prefix
+from organizations.revision_utils import (
+    build_full_document_number_from_template,
+    build_full_part_number_from_template,
+)
+from organizations.settings_cache import get_organization_settings
+from parts.models import Part
+from pcbas.models import Pcba
+
+RENUMBERED_APPS = ["parts", "pcbas", "assemblies", "documents"]
+CHUNK_SIZE = 1000
+
+# Settings used when the organization does not exist, like the build_* functions of revision_utils
+_DEFAULT_SETTINGS = {
+    "full_part_number_template": "<prefix><part_number><major_revision>",
+    "formatted_revision_template": "<major_revision>",
+    "use_number_revisions": False,
+    "revision_format": "major-only",
+    "start_major_revision_at_one": False,
+    "full_document_number_template": "<prefix><project_number>-<document_number><revision>",
+    "document_use_number_revisions": False,
+    "document_revision_format": "major-only",
+    "document_start_major_revision_at_one": False,
+}
+
+
+def _project_number(item):
+    return item.project.full_project_number if item.project else None
+
+
+def _part_number_values(item, settings, prefix, revision_format=None):
+    """full_part_number and formatted_revision of a part, PCBA or assembly."""
+    common = {
+        "prefix": prefix,
+        "part_number": item.part_number,
+        "revision_count_major": item.revision_count_major or 0,
+        "revision_count_minor": item.revision_count_minor or 0,
+        "use_number_revisions": settings["use_number_revisions"],
+        "start_at_one": settings["start_major_revision_at_one"],
+        "project_number": _project_number(item),
+        "created_at": item.created_at,
+    }
+    return {
+        "full_part_number": build_full_part_number_from_template(
+            template=settings["full_part_number_template"],
+            revision_format=settings["revision_format"],
+            **common,
+        ),
+        "formatted_revision": build_full_part_number_from_template(
+            template=settings["formatted_revision_template"],
+            revision_format=revision_format or settings["revision_format"],
+            **common,
+        ),
+    }
+
+
+def _part_values(part, settings):
+    prefix = part.part_type.prefix if part.part_type and part.part_type.prefix else "PRT"
+    return _part_number_values(part, settings, prefix)
+
+
+def _pcba_values(pcba, settings):
+    return _part_number_values(pcba, settings, "PCBA")
+
+
+def _assembly_values(assembly, settings):
+    return _part_number_values(assembly, settings, "ASM")
+
+
+def _document_values(document, settings):
+    """full_doc_number and formatted_revision of a document, formatted like new revisions are."""
+    prefix = settings["document_prefixes"].get(document.prefix_id, "")
+    values = _part_number_values(
+        document, settings, prefix, revision_format=settings["document_revision_format"]
+    )
+    return {
+        "full_doc_number": build_full_document_number_from_template(
+            template=settings["full_document_number_template"],
+            prefix=prefix,
+            document_number=document.document_number,
+            revision_count_major=document.revision_count_major or 0,
+            revision_count_minor=document.revision_count_minor or 0,
+            use_number_revisions=settings["document_use_number_revisions"],
+            start_at_one=settings["document_start_major_revision_at_one"],
+            project_number=_project_number(document),
+            part_number=document.part_number,
+            created_at=document.created_at,
+            revision_format=settings["document_revision_format"],
+        ),
+        "formatted_revision": values["formatted_revision"],
+    }
+
+
+# App: (model, related models read, number fields written, function formatting them)
+_SOURCES = {
+    "parts": (Part, ["project", "part_type"], ["full_part_number", "formatted_revision"], _part_values),
+    "pcbas": (Pcba, ["project"], ["full_part_number", "formatted_revision"], _pcba_values),
+    "assemblies": (Assembly, ["project"], ["full_part_number", "formatted_revision"], _assembly_values),
+    "documents": (Document, ["project"], ["full_doc_number", "formatted_revision"], _document_values),
+}
+
+_READ_FIELDS = [
+    "id",
+    "part_number",
+    "revision_count_major",
+    "revision_count_minor",
+    "created_at",
+    "project__full_project_number",
+]
+
+_EXTRA_READ_FIELDS = {
+    "parts": ["part_type__prefix"],
+    "documents": ["prefix_id", "document_number"],
+}
+
+
+def regenerate_numbers(organization_id, apps=None, chunk_size=CHUNK_SIZE, progress=None):
+    """Regenerate the numbers of all items from the settings of an organization.
+
+    Args:
+        organization_id: Organization whose templates and revision settings are applied
+        apps: Apps of RENUMBERED_APPS to regenerate, all by default
+        chunk_size: Number of items read and written at a time
+        progress: Optional callable, called with (app, items done, items in total) after each chunk
+
+    Returns:
+        Dict of app to the number of items whose numbers changed.
+    """
+    settings = dict(get_organization_settings(organization_id) or _DEFAULT_SETTINGS)
+    settings["document_prefixes"] = dict(Document_Prefix.objects.values_list("id", "prefix"))
+
+    changed = {}
+    for app in apps or RENUMBERED_APPS:
+        model, related, number_fields, number = _SOURCES[app]
+        fields = _READ_FIELDS + _EXTRA_READ_FIELDS.get(app, []) + number_fields
+        queryset = model.objects.select_related(*related).only(*fields).order_by("pk")
+        total = queryset.count()
+        changed[app] = 0
+        done = 0
+        last_pk = 0
+        while True:
+            chunk = list(queryset.filter(pk__gt=last_pk)[:chunk_size])
+            if not chunk:
+                break
+            last_pk = chunk[-1].pk
+
+            now = timezone.now()
+            updated = []
+            for item in chunk:
+                values = number(item, settings)
+                if all(getattr(item, field) == value for field, value in values.items()):
+                    continue
+                for field, value in values.items():
+                    setattr(item, field, value)
+                item.last_updated = now
+                updated.append(item)
+            if updated:
+                model.objects.bulk_update(updated, number_fields + ["last_updated"])
+
+            changed[app] += len(updated)
+            done += len(chunk)
+            if progress is not None:
+                progress(app, done, total)
+    return changed
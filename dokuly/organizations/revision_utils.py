@@ -4,7 +4,7 @@ Revision system utilities for handling both letter-based and number-based revisi
 import re
 from typing import Optional, Tuple
 from django.db import models
-from organizations.models import Organization
+from organizations.settings_cache import get_organization_settings
 
 
 def format_revision_count(revision_count: int, use_number_revisions: bool, start_at_one: bool=False) -> str:
@@ -80,11 +80,10 @@ def get_organization_revision_settings(organization_id: int) -> Tuple[bool, str,
     Returns:
         Tuple of (use_number_revisions, revision_format)
     """
-    try:
-        org = Organization.objects.get(id=organization_id)
-        return org.use_number_revisions, org.revision_format
-    except Organization.DoesNotExist:
+    settings = get_organization_settings(organization_id)
+    if settings is None:
         return False, "major-minor", "-"
+    return settings["use_number_revisions"], settings["revision_format"]
 
 
 def build_full_part_number(
@@ -125,13 +124,13 @@ def build_full_part_number(
         build_full_part_number(org_id, "PCBA", "5678", 1, 2)
         # -> "PCBA56781-2"
     """
-    try:
-        org = Organization.objects.get(id=organization_id)
-        template = org.full_part_number_template
-        use_number_revisions = org.use_number_revisions
-        start_at_one = org.start_major_revision_at_one
-        revision_format = org.revision_format
-    except Organization.DoesNotExist:
+    settings = get_organization_settings(organization_id)
+    if settings is not None:
+        template = settings["full_part_number_template"]
+        use_number_revisions = settings["use_number_revisions"]
+        start_at_one = settings["start_major_revision_at_one"]
+        revision_format = settings["revision_format"]
+    else:
         # Fallback to defaults
         template = "<prefix><part_number><major_revision>"
         use_number_revisions = False
@@ -191,14 +190,14 @@ def build_formatted_revision(
         build_full_part_number(org_id, "PCBA", "5678", 1, 2)
         # -> "PCBA56781-2"
     """
-    try:
-        org = Organization.objects.get(id=organization_id)
-        template = org.formatted_revision_template
-        use_number_revisions = org.use_number_revisions
-        start_at_one = org.start_major_revision_at_one
+    settings = get_organization_settings(organization_id)
+    if settings is not None:
+        template = settings["formatted_revision_template"]
+        use_number_revisions = settings["use_number_revisions"]
+        start_at_one = settings["start_major_revision_at_one"]
         # Caller may override revision_format (e.g. documents pass document_revision_format)
-        effective_revision_format = revision_format if revision_format is not None else org.revision_format
-    except Organization.DoesNotExist:
+        effective_revision_format = revision_format if revision_format is not None else settings["revision_format"]
+    else:
         # Fallback to defaults
         template = "<major_revision>"
         use_number_revisions = False
@@ -669,14 +668,14 @@ def build_full_document_number(
         build_full_document_number(org_id, "DOC", "5", 1, 2, project_number="2000")
         # -> "DOC2000-5-1"
     """
-    try:
-        org = Organization.objects.get(id=organization_id)
-        template = org.full_document_number_template
+    settings = get_organization_settings(organization_id)
+    if settings is not None:
+        template = settings["full_document_number_template"]
         # Use document-specific revision settings
-        use_number_revisions = org.document_use_number_revisions
-        start_at_one = org.document_start_major_revision_at_one
-        revision_format = org.document_revision_format
-    except Organization.DoesNotExist:
+        use_number_revisions = settings["document_use_number_revisions"]
+        start_at_one = settings["document_start_major_revision_at_one"]
+        revision_format = settings["document_revision_format"]
+    else:
         # Fallback to defaults
         template = "<prefix><project_number>-<document_number><revision>"
         use_number_revisions = False
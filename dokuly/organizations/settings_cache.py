@@ -0,0 +1,78 @@
+"""
+Process-local cache of the numbering and revision settings of organizations.
+
+Every part, PCBA, assembly and document number is formatted from these settings, so create,
+new revision and import flows read them many times per request. They are read once per process
+and kept here.
+
+Saving or deleting an organization invalidates its settings through the signals in
+organizations.signals. The cache of the saving process is cleared right away, and a version
+number in the shared Django cache is bumped. Other workers compare their copy with that version at
+most every VERSION_CHECK_INTERVAL seconds and reload it when it changed.
+"""
+
+import time
+
+from django.core.cache import cache
+from django.db import connection
+
+from organizations.models import Organization
+
+SETTINGS_FIELDS = [
+    "full_part_number_template",
+    "formatted_revision_template",
+    "use_number_revisions",
+    "revision_format",
+    "start_major_revision_at_one",
+    "full_document_number_template",
+    "document_use_number_revisions",
+    "document_revision_format",
+    "document_start_major_revision_at_one",
+]
+
+VERSION_CHECK_INTERVAL = 1.0
+
+# (tenant schema, organization id): (version, time of the last version check, settings)
+_settings = {}
+
+
+def _key(organization_id):
+    return getattr(connection, "schema_name", None), organization_id
+
+
+def _version_key(key):
+    return "organization_settings_version:%s:%s" % key
+
+
+def get_organization_settings(organization_id):
+    """Numbering and revision settings of an organization.
+
+    Returns:
+        Dict of the SETTINGS_FIELDS values, None if the organization does not exist.
+        The dict is shared, callers must copy it before changing it.
+    """
+    key = _key(organization_id)
+    now = time.monotonic()
+    entry = _settings.get(key)
+    if entry is not None and now - entry[1] < VERSION_CHECK_INTERVAL:
+        return entry[2]
+
+    version = cache.get(_version_key(key), 0)
+    if entry is not None and entry[0] == version:
+        _settings[key] = (version, now, entry[2])
+        return entry[2]
+
+    settings = Organization.objects.filter(id=organization_id).values(*SETTINGS_FIELDS).first()
+    _settings[key] = (version, now, settings)
+    return settings
+
+
+def invalidate_organization_settings(organization_id):
+    """Drop the cached settings of an organization in this process and in the other workers."""
+    key = _key(organization_id)
+    _settings.pop(key, None)
+    version_key = _version_key(key)
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        cache.set(version_key, 1, None)
@@ -1,9 +1,10 @@
 from django.dispatch import receiver
 from django.conf import settings
 import requests
-from .models import Subscription
-from django.db.models.signals import post_save
+from .models import Organization, Subscription
+from django.db.models.signals import post_delete, post_save
 from django.contrib.auth.models import User
+from organizations.settings_cache import invalidate_organization_settings
 from organizations.utils import update_subscriptions_from_paddle
 
 
@@ -15,3 +16,12 @@ def update_subscriptions(sender, instance, created, **kwargs):
     print("Updating subscriptions...")
     if not created:
         update_subscriptions_from_paddle(instance)
+
+
+@receiver(post_save, sender=Organization)
+@receiver(post_delete, sender=Organization)
+def invalidate_settings_cache(sender, instance, **kwargs):
+    """
+    Drop the cached numbering and revision settings of a saved or deleted Organization.
+    """
+    invalidate_organization_settings(instance.id)
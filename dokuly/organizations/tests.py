@@ -1,6 +1,11 @@
+from io import StringIO
 from types import SimpleNamespace
+from unittest.mock import patch
 
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.utils import timezone
 
 from organizations.odoo_service import (
@@ -8,8 +13,21 @@ from organizations.odoo_service import (
     create_or_update_odoo_product,
     get_open_issue_lines_for_odoo_item,
 )
-from parts.models import Part
+from assemblies.models import Assembly
+from assembly_bom.models import Assembly_bom, Bom_item
+from documents.models import Document, Document_Prefix
+from organizations.bom_rules import evaluate_bom_rules, offending_items_by_reason
+from organizations.latest_revisions import update_latest_revisions
+from organizations.models import Organization
+from organizations import settings_cache
+from organizations.renumbering import regenerate_numbers
+from organizations.revision_utils import build_full_part_number
+from parts.models import Part, PartType
+from pcbas.models import Pcba
+from profiles.models import Profile
 from projects.issuesModel import Issues
+from projects.models import Project
+from rest_framework.test import APIClient
 
 
 class _MockOdooModels:
@@ -183,3 +201,237 @@ class GetOpenIssueLinesForOdooItemTests(TestCase):
 
         lines = get_open_issue_lines_for_odoo_item(part, "parts")
         self.assertEqual(lines, ["- [High] (no title)", "- (no title)"])
+
+
+class EvaluateBomRulesTests(TestCase):
+    def setUp(self):
+        self.top = Assembly.objects.create(
+            part_number=1, full_part_number="ASM1", price=0, release_state="Draft"
+        )
+        self.sub = Assembly.objects.create(
+            part_number=2, full_part_number="ASM2", price=0, release_state="Released"
+        )
+        self.pcba = Pcba.objects.create(part_number=1, full_part_number="PCBA1", release_state="Released")
+        self.released = Part.objects.create(part_number=1, full_part_number="PRT1", release_state="Released")
+        self.draft = Part.objects.create(part_number=2, full_part_number="PRT2", release_state="Draft")
+
+        top_bom = Assembly_bom.objects.create(assembly_id=self.top.id)
+        sub_bom = Assembly_bom.objects.create(assembly_id=self.sub.id)
+        pcba_bom = Assembly_bom.objects.create(pcba=self.pcba)
+        Bom_item.objects.create(bom=top_bom, assembly=self.sub, quantity=1)
+        Bom_item.objects.create(bom=top_bom, part=self.released, quantity=1)
+        Bom_item.objects.create(bom=sub_bom, pcba=self.pcba, quantity=1)
+        Bom_item.objects.create(bom=pcba_bom, part=self.draft, designator="R1", quantity=1)
+        Bom_item.objects.create(bom=pcba_bom, designator="C1", temporary_mpn="GRM155", quantity=1)
+
+    def test_evaluates_whole_tree_in_one_query(self):
+        with self.assertNumQueries(1):
+            result = evaluate_bom_rules("assemblies", self.top.id)
+
+        self.assertEqual(result["total_count"], 5)
+        self.assertEqual(result["matched_count"], 4)
+        self.assertEqual(result["released_count"], 4)
+
+        unreleased = offending_items_by_reason(result, "unreleased")
+        self.assertEqual(
+            [(item["part_number"], item["type"], item["parent"]) for item in unreleased],
+            [("PRT2", "Part", "PCBA1")],
+        )
+        unmatched = offending_items_by_reason(result, "unmatched")
+        self.assertEqual(
+            [(item["designator"], item["temporary_mpn"], item["parent"]) for item in unmatched],
+            [("C1", "GRM155", "PCBA1")],
+        )
+
+    def test_sub_tree_and_missing_bom(self):
+        result = evaluate_bom_rules("pcbas", self.pcba.id)
+        self.assertEqual(result["total_count"], 2)
+        self.assertEqual(len(result["offending_items"]), 2)
+
+        bare = Assembly.objects.create(part_number=3, full_part_number="ASM3", price=0)
+        self.assertIsNone(evaluate_bom_rules("assemblies", bare.id))
+
+    def test_empty_bom_passes(self):
+        bare = Assembly.objects.create(part_number=3, full_part_number="ASM3", price=0)
+        Assembly_bom.objects.create(assembly_id=bare.id)
+        result = evaluate_bom_rules("assemblies", bare.id)
+        self.assertEqual(result["total_count"], 0)
+        self.assertEqual(result["offending_items"], [])
+
+    def test_cyclic_bom_terminates(self):
+        Bom_item.objects.create(
+            bom=Assembly_bom.objects.get(pcba=self.pcba), assembly=self.top, quantity=1
+        )
+        result = evaluate_bom_rules("assemblies", self.top.id)
+        # The draft top assembly is now a line of the PCBA BOM, every BOM is counted once
+        self.assertEqual(result["total_count"], 6)
+        self.assertEqual(result["released_count"], 4)
+
+    def test_reused_sub_assemblies_are_visited_once(self):
+        # 30 levels, each using the next level twice: 2^30 paths, 30 BOMs
+        parent_bom = Assembly_bom.objects.get(assembly_id=self.sub.id)
+        for level in range(30):
+            child = Assembly.objects.create(
+                part_number=10 + level, full_part_number=f"ASM{10 + level}", price=0,
+                release_state="Released",
+            )
+            Bom_item.objects.create(bom=parent_bom, assembly=child, quantity=1)
+            Bom_item.objects.create(bom=parent_bom, assembly=child, quantity=1)
+            parent_bom = Assembly_bom.objects.create(assembly_id=child.id)
+
+        result = evaluate_bom_rules("assemblies", self.top.id)
+        self.assertEqual(result["total_count"], 5 + 60)
+        self.assertEqual(result["released_count"], 4 + 60)
+
+
+class LatestRevisionsTests(TestCase):
+    def setUp(self):
+        def part(number, major, minor, **kwargs):
+            kwargs.setdefault("is_latest_revision", True)
+            return Part.objects.create(
+                part_number=number, revision_count_major=major, revision_count_minor=minor, **kwargs
+            )
+
+        self.a_first = part(1, 0, 0)
+        self.a_minor = part(1, 0, 1)
+        self.a_major = part(1, 1, 0)
+        self.a_archived = part(1, 2, 0, is_archived=True)
+        self.b_tie = [part(2, 0, 0), part(2, 0, 0)]
+        self.c_only = part(3, 0, 0, is_latest_revision=False)
+
+    def latest(self):
+        return set(Part.objects.filter(is_latest_revision=True).values_list("id", flat=True))
+
+    def test_ranks_revisions_of_every_part_number(self):
+        self.assertEqual(update_latest_revisions("parts"), 3)
+        # Archived revisions are left as they are, tied revisions are all latest
+        self.assertEqual(
+            self.latest(),
+            {self.a_major.id, self.a_archived.id, self.c_only.id} | {p.id for p in self.b_tie},
+        )
+        self.assertEqual(update_latest_revisions("parts"), 0)
+
+    def test_one_item(self):
+        self.assertEqual(update_latest_revisions("parts", part_number=3), 1)
+        self.assertIn(self.c_only.id, self.latest())
+        self.assertIn(self.a_first.id, self.latest())
+        with self.assertRaises(ValueError):
+            update_latest_revisions("parts", full_part_number="PRT1")
+
+    def test_documents_without_project(self):
+        first = Document.objects.create(document_number="1", revision_count_major=0, is_latest_revision=True)
+        second = Document.objects.create(document_number="1", revision_count_major=1, is_latest_revision=True)
+        self.assertEqual(update_latest_revisions("documents", project=None, document_number="1"), 1)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertFalse(first.is_latest_revision)
+        self.assertTrue(second.is_latest_revision)
+
+    def test_endpoint_requires_admin(self):
+        user = User.objects.create_user(username="user", password="password")
+        profile = Profile.objects.create(user=user)
+        client = APIClient()
+        client.force_authenticate(user=user)
+        url = "/api/organizations/maintenance/repairLatestRevisions/"
+
+        self.assertEqual(client.post(url, secure=True).status_code, 403)
+        profile.role = "Admin"
+        profile.save()
+        response = client.post(url, {"apps": ["bogus"]}, format="json", secure=True)
+        self.assertEqual(response.status_code, 400)
+        response = client.post(url, {"apps": ["parts"]}, format="json", secure=True)
+        self.assertEqual(response.json(), {"changed": {"parts": 3}})
+
+    def test_management_command(self):
+        out = StringIO()
+        call_command("repair_latest_revisions", "--app", "parts", "--app", "pcbas", stdout=out)
+        self.assertEqual(out.getvalue(), "parts: 3 revisions changed\npcbas: 0 revisions changed\n")
+
+
+class RegenerateNumbersTests(TestCase):
+    def setUp(self):
+        self.organization = Organization.objects.create(
+            full_part_number_template="<prefix><part_number>-<revision>",
+            formatted_revision_template="<revision>",
+            use_number_revisions=True,
+            revision_format="major-minor",
+            full_document_number_template="<prefix><project_number>-<document_number><revision>",
+            document_revision_format="major-only",
+        )
+        project = Project.objects.create(title="Project", full_project_number=1001)
+        resistor = PartType.objects.create(name="Resistor", prefix="RES")
+        self.part = Part.objects.create(
+            part_number=7, revision_count_major=1, revision_count_minor=2, part_type=resistor,
+            full_part_number="RES7B",
+        )
+        self.plain_parts = [Part.objects.create(part_number=number) for number in range(10, 15)]
+        self.pcba = Pcba.objects.create(part_number=8, project=project)
+        self.assembly = Assembly.objects.create(part_number=9, price=0, revision_count_major=2)
+        prefix = Document_Prefix.objects.create(prefix="TN")
+        self.document = Document.objects.create(
+            document_number="3", prefix_id=prefix.id, project=project, revision_count_major=1
+        )
+
+    def test_regenerates_numbers_from_settings(self):
+        progress = []
+        changed = regenerate_numbers(
+            self.organization.id, chunk_size=4, progress=lambda *args: progress.append(args)
+        )
+        self.assertEqual(changed, {"parts": 6, "pcbas": 1, "assemblies": 1, "documents": 1})
+        self.assertEqual(progress[:2], [("parts", 4, 6), ("parts", 6, 6)])
+
+        self.part.refresh_from_db()
+        self.assertEqual((self.part.full_part_number, self.part.formatted_revision), ("RES7-1-2", "1-2"))
+        self.assertEqual(Part.objects.get(part_number=10).full_part_number, "PRT10-0-0")
+        self.pcba.refresh_from_db()
+        self.assertEqual(self.pcba.full_part_number, "PCBA8-0-0")
+        self.assembly.refresh_from_db()
+        self.assertEqual(self.assembly.full_part_number, "ASM9-2-0")
+        # Documents use the document revision settings, letter revisions here
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.full_doc_number, "TN1001-3B")
+
+        self.assertEqual(regenerate_numbers(self.organization.id, ["parts"]), {"parts": 0})
+
+    def test_reads_and_writes_in_chunks(self):
+        # Settings, prefixes, count, then one read and one write per chunk and an empty read
+        with self.assertNumQueries(3 + 2 * 2 + 1):
+            regenerate_numbers(self.organization.id, ["parts"], chunk_size=4)
+
+    def test_management_command(self):
+        out = StringIO()
+        call_command("regenerate_item_numbers", "--app", "pcbas", stdout=out)
+        self.assertEqual(out.getvalue(), "pcbas: 1/1\npcbas: 1 items renumbered\n")
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class OrganizationSettingsCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.organization = Organization.objects.create(
+            full_part_number_template="<prefix><part_number>", use_number_revisions=True
+        )
+
+    def build(self):
+        return build_full_part_number(self.organization.id, "PRT", 1, 0, 0)
+
+    def test_reads_settings_once(self):
+        with self.assertNumQueries(1):
+            for _ in range(1000):
+                self.build()
+
+    def test_saving_invalidates(self):
+        self.assertEqual(self.build(), "PRT1")
+        self.organization.full_part_number_template = "<prefix><part_number>-<major_revision>"
+        self.organization.save()
+        self.assertEqual(self.build(), "PRT1-0")
+
+    def test_other_workers_reload_when_the_version_changes(self):
+        self.assertEqual(self.build(), "PRT1")
+        # Another worker saved the organization, which only bumps the shared version here
+        Organization.objects.filter(id=self.organization.id).update(full_part_number_template="<part_number>")
+        self.assertEqual(self.build(), "PRT1")
+        key = settings_cache._key(self.organization.id)
+        cache.incr(settings_cache._version_key(key))
+        with patch.object(settings_cache, "VERSION_CHECK_INTERVAL", 0):
+            self.assertEqual(self.build(), "1")
@@ -5,6 +5,7 @@ from . import viewsApiKey
 from . import viewsRules
 from . import viewsIntegrations
 from . import viewsAI
+from . import viewsMaintenance
 
 # URL Configuration
 urlpatterns = [
@@ -35,6 +36,12 @@ urlpatterns = [
     path("api/organizations/deleteAPIKey/<str:key_id>/",
          viewsApiKey.delete_api_key),
 
+    # Maintenance
+    path("api/organizations/maintenance/repairLatestRevisions/",
+         viewsMaintenance.repair_latest_revisions),
+    path("api/organizations/maintenance/regenerateItemNumbers/",
+         viewsMaintenance.regenerate_item_numbers),
+
     # Rules management
     path("api/rules/get/", viewsRules.fetch_organization_rules),
     path("api/rules/update/", viewsRules.update_organization_rules),
@@ -0,0 +1,54 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from organizations.latest_revisions import REVISIONED_MODELS, update_all_latest_revisions
+from organizations.renumbering import RENUMBERED_APPS, regenerate_numbers
+from profiles.permissions import IsAdminOrOwner
+
+
+def _requested_apps(request, available):
+    """Apps in the optional "apps" list of a request, and an error response if it is invalid."""
+    apps = request.data.get("apps") or None
+    if apps is None:
+        return None, None
+    if not isinstance(apps, list):
+        return None, Response("apps must be a list", status=status.HTTP_400_BAD_REQUEST)
+    unknown = sorted(set(apps) - set(available))
+    if unknown:
+        return None, Response(f"Unknown apps: {', '.join(unknown)}", status=status.HTTP_400_BAD_REQUEST)
+    return apps, None
+
+
+@api_view(["POST"])
+@permission_classes([IsAdminOrOwner])
+@renderer_classes([JSONRenderer])
+def repair_latest_revisions(request):
+    """
+    Recompute is_latest_revision of all parts, PCBAs, assemblies and documents.
+    An optional "apps" list limits the repair to some of them, e.g. {"apps": ["parts"]}.
+    """
+    apps, error = _requested_apps(request, REVISIONED_MODELS)
+    if error:
+        return error
+
+    changed = update_all_latest_revisions(apps)
+    return Response({"changed": changed}, status=status.HTTP_200_OK)
+
+
+@api_view(["POST"])
+@permission_classes([IsAdminOrOwner])
+@renderer_classes([JSONRenderer])
+def regenerate_item_numbers(request):
+    """
+    Regenerate the full part numbers, full document numbers and formatted revisions of all items
+    from the current numbering templates and revision settings of the organization.
+    An optional "apps" list limits it to some of the apps, e.g. {"apps": ["parts", "pcbas"]}.
+    """
+    apps, error = _requested_apps(request, RENUMBERED_APPS)
+    if error:
+        return error
+
+    changed = regenerate_numbers(request.user.profile.organization_id, apps)
+    return Response({"changed": changed}, status=status.HTTP_200_OK)
@@ -4,7 +4,6 @@ from rest_framework.renderers import JSONRenderer
 from rest_framework import status
 from django.shortcuts import get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
 
 from profiles.models import Profile
 from .models import Organization, Rules
@@ -16,6 +15,7 @@ from parts.models import Part
 from pcbas.models import Pcba
 from projects.models import Project
 from assembly_bom.models import Assembly_bom, Bom_item
+from .bom_rules import evaluate_bom_rules, offending_items_by_reason
 from eco.models import AffectedItem, Eco
 
 
@@ -54,90 +54,6 @@ def check_item_affected_by_unreleased_eco(item_type, item_id):
     return False, None
 
 
-def check_bom_items_released(bom_items):
-    """
-    Check if all BOM items have released parts, assemblies, or PCBAs.
-    Uses database queries for efficiency.
-    
-    Args:
-        bom_items: QuerySet of Bom_item objects
-        
-    Returns:
-        tuple: (all_passed: bool, unreleased_items: list, total_count: int, released_count: int)
-    """
-    total_count = bom_items.count()
-    
-    # Query for unreleased items - items where the related part/assembly/pcba exists and is NOT released
-    unreleased_bom_items = bom_items.filter(
-        Q(part__isnull=False) & ~Q(part__release_state='Released') |
-        Q(assembly__isnull=False) & ~Q(assembly__release_state='Released') |
-        Q(pcba__isnull=False) & ~Q(pcba__release_state='Released')
-    ).select_related('part', 'assembly', 'pcba')
-    
-    # Build the unreleased items list
-    unreleased_items = []
-    for bom_item in unreleased_bom_items:
-        if bom_item.part and bom_item.part.release_state != 'Released':
-            unreleased_items.append({
-                'type': 'Part',
-                'part_number': bom_item.part.full_part_number,
-                'display_name': bom_item.part.display_name,
-            })
-        elif bom_item.assembly and bom_item.assembly.release_state != 'Released':
-            unreleased_items.append({
-                'type': 'Assembly',
-                'part_number': bom_item.assembly.full_part_number,
-                'display_name': bom_item.assembly.display_name,
-            })
-        elif bom_item.pcba and bom_item.pcba.release_state != 'Released':
-            unreleased_items.append({
-                'type': 'PCBA',
-                'part_number': bom_item.pcba.full_part_number,
-                'display_name': bom_item.pcba.display_name,
-            })
-    
-    released_count = total_count - len(unreleased_items)
-    all_passed = len(unreleased_items) == 0
-    
-    return all_passed, unreleased_items, total_count, released_count
-
-
-def check_bom_items_matched(bom_items):
-    """
-    Check if all BOM items are matched to a Part, Assembly, or PCBA.
-    An unmatched BOM item has part=None, assembly=None, and pcba=None.
-    
-    Args:
-        bom_items: QuerySet of Bom_item objects
-        
-    Returns:
-        tuple: (all_passed: bool, unmatched_items: list, total_count: int, matched_count: int)
-    """
-    total_count = bom_items.count()
-    
-    # Query for unmatched items - items where part, assembly, and pcba are all None
-    unmatched_bom_items = bom_items.filter(
-        part__isnull=True,
-        assembly__isnull=True,
-        pcba__isnull=True
-    )
-    
-    # Build the unmatched items list
-    unmatched_items = []
-    for bom_item in unmatched_bom_items:
-        unmatched_items.append({
-            'designator': bom_item.designator or '-',
-            'temporary_mpn': bom_item.temporary_mpn or '-',
-            'temporary_manufacturer': bom_item.temporary_manufacturer or '-',
-            'comment': bom_item.comment or '-',
-        })
-    
-    matched_count = total_count - len(unmatched_items)
-    all_passed = len(unmatched_items) == 0
-    
-    return all_passed, unmatched_items, total_count, matched_count
-
-
 def check_eco_bom_items_released_or_in_eco(eco):
     """
     Check if all BOM items of affected assemblies/PCBAs are either:
@@ -642,21 +558,25 @@ def check_assembly_rules(request, assembly_id):
                 'passed': has_image,
             })
         
+        # Both BOM rules are evaluated for the whole BOM tree with a single query
+        bom_rules = None
+        if rules and (rules.require_released_bom_items_assembly or rules.require_matched_bom_items_assembly):
+            bom_rules = evaluate_bom_rules("assemblies", assembly_id)
+
         # Check BOM items if required
         if rules and rules.require_released_bom_items_assembly:
-            try:
-                assembly_bom = Assembly_bom.objects.get(assembly_id=assembly_id)
-                bom_items = Bom_item.objects.filter(bom=assembly_bom)
-                bom_passed, unreleased_items, total_count, released_count = check_bom_items_released(bom_items)
+            if bom_rules is not None:
+                unreleased_items = offending_items_by_reason(bom_rules, "unreleased")
+                bom_passed = len(unreleased_items) == 0
                 if not bom_passed:
                     all_passed = False
                 rules_checks.append({
                     'rule': 'require_released_bom_items_assembly',
-                    'description': f'All BOM items must be released ({released_count}/{total_count} released)',
+                    'description': f'All BOM items must be released ({bom_rules["released_count"]}/{bom_rules["total_count"]} released)',
                     'passed': bom_passed,
                     'unreleased_items': unreleased_items,
                 })
-            except Assembly_bom.DoesNotExist:
+            else:
                 # No BOM - this passes the BOM check
                 rules_checks.append({
                     'rule': 'require_released_bom_items_assembly',
@@ -667,19 +587,18 @@ def check_assembly_rules(request, assembly_id):
         
         # Check if all BOM items are matched
         if rules and rules.require_matched_bom_items_assembly:
-            try:
-                assembly_bom = Assembly_bom.objects.get(assembly_id=assembly_id)
-                bom_items = Bom_item.objects.filter(bom=assembly_bom)
-                matched_passed, unmatched_items, total_count, matched_count = check_bom_items_matched(bom_items)
+            if bom_rules is not None:
+                unmatched_items = offending_items_by_reason(bom_rules, "unmatched")
+                matched_passed = len(unmatched_items) == 0
                 if not matched_passed:
                     all_passed = False
                 rules_checks.append({
                     'rule': 'require_matched_bom_items_assembly',
-                    'description': f'All BOM items must be matched to a Part, PCBA, or Assembly ({matched_count}/{total_count} matched)',
+                    'description': f'All BOM items must be matched to a Part, PCBA, or Assembly ({bom_rules["matched_count"]}/{bom_rules["total_count"]} matched)',
                     'passed': matched_passed,
                     'unmatched_items': unmatched_items[:20],  # Limit to first 20 for display
                 })
-            except Assembly_bom.DoesNotExist:
+            else:
                 # No BOM - this passes the check
                 rules_checks.append({
                     'rule': 'require_matched_bom_items_assembly',
@@ -766,21 +685,25 @@ def check_pcba_rules(request, pcba_id):
                 'passed': has_image,
             })
         
+        # Both BOM rules are evaluated for the whole BOM tree with a single query
+        bom_rules = None
+        if rules and (rules.require_released_bom_items_pcba or rules.require_matched_bom_items_pcba):
+            bom_rules = evaluate_bom_rules("pcbas", pcba_id)
+
         # Check BOM items if required
         if rules and rules.require_released_bom_items_pcba:
-            try:
-                pcba_bom = Assembly_bom.objects.get(pcba=pcba)
-                bom_items = Bom_item.objects.filter(bom=pcba_bom)
-                bom_passed, unreleased_items, total_count, released_count = check_bom_items_released(bom_items)
+            if bom_rules is not None:
+                unreleased_items = offending_items_by_reason(bom_rules, "unreleased")
+                bom_passed = len(unreleased_items) == 0
                 if not bom_passed:
                     all_passed = False
                 rules_checks.append({
                     'rule': 'require_released_bom_items_pcba',
-                    'description': f'All BOM items must be released ({released_count}/{total_count} released)',
+                    'description': f'All BOM items must be released ({bom_rules["released_count"]}/{bom_rules["total_count"]} released)',
                     'passed': bom_passed,
                     'unreleased_items': unreleased_items,
                 })
-            except Assembly_bom.DoesNotExist:
+            else:
                 # No BOM - this passes the BOM check
                 rules_checks.append({
                     'rule': 'require_released_bom_items_pcba',
@@ -791,19 +714,18 @@ def check_pcba_rules(request, pcba_id):
         
         # Check if all BOM items are matched
         if rules and rules.require_matched_bom_items_pcba:
-            try:
-                pcba_bom = Assembly_bom.objects.get(pcba=pcba)
-                bom_items = Bom_item.objects.filter(bom=pcba_bom)
-                matched_passed, unmatched_items, total_count, matched_count = check_bom_items_matched(bom_items)
+            if bom_rules is not None:
+                unmatched_items = offending_items_by_reason(bom_rules, "unmatched")
+                matched_passed = len(unmatched_items) == 0
                 if not matched_passed:
                     all_passed = False
                 rules_checks.append({
                     'rule': 'require_matched_bom_items_pcba',
-                    'description': f'All BOM items must be matched to a Part, PCBA, or Assembly ({matched_count}/{total_count} matched)',
+                    'description': f'All BOM items must be matched to a Part, PCBA, or Assembly ({bom_rules["matched_count"]}/{bom_rules["total_count"]} matched)',
                     'passed': matched_passed,
                     'unmatched_items': unmatched_items[:20],  # Limit to first 20 for display
                 })
-            except Assembly_bom.DoesNotExist:
+            else:
                 # No BOM - this passes the check
                 rules_checks.append({
                     'rule': 'require_matched_bom_items_pcba',
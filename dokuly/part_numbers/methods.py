@@ -1,6 +1,6 @@
-from django.db import connection, transaction
+from django.db import IntegrityError, connection, transaction
 from django.db.models import Max
-from .models import PartNumber
+from .models import NumberCounter, PartNumber
 
 
 def get_next_part_number():
@@ -63,3 +63,127 @@ def create_part_number_with_specific_primary_key(value):
         # Set the next value of the primary key sequence
         with connection.cursor() as cursor:
             cursor.execute(f"SELECT setval(pg_get_serial_sequence('{PartNumber._meta.db_table}', 'id'), {value}, false);")
+
+
+def _lock_part_numbers(cursor):
+    """Lock the PartNumber table against inserts until the transaction ends, so the id sequence is
+    not advanced between reading and setting it. Reads are not blocked."""
+    cursor.execute(f"LOCK TABLE {connection.ops.quote_name(PartNumber._meta.db_table)} IN EXCLUSIVE MODE")
+
+
+# Highest part number in use: the highest PartNumber id, or the last value of the id sequence
+_LAST_PART_NUMBER = """
+    GREATEST(
+        COALESCE((SELECT MAX("id") FROM {table}), 0),
+        COALESCE(pg_sequence_last_value(pg_get_serial_sequence(%(table)s, 'id')::regclass), 0)
+    )
+"""
+
+
+def reserve_part_numbers(count):
+    """Reserve a block of consecutive part numbers for bulk creation.
+
+    The PartNumber rows are inserted and the id sequence moved past the block in one statement.
+    Single part numbers from get_next_part_number wait until the transaction reserving the block
+    ends.
+
+    Returns:
+        range of the reserved part numbers.
+    """
+    if count < 1:
+        return range(0)
+    table = PartNumber._meta.db_table
+    quoted_table = connection.ops.quote_name(table)
+    last_part_number = _LAST_PART_NUMBER.format(table=quoted_table)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            _lock_part_numbers(cursor)
+            cursor.execute(
+                f"""
+                WITH block AS (
+                    SELECT {last_part_number} + 1 AS first
+                ), inserted AS (
+                    INSERT INTO {quoted_table} ("id")
+                    SELECT generate_series(first, first + %(count)s - 1) FROM block
+                )
+                SELECT setval(pg_get_serial_sequence(%(table)s, 'id'), first + %(count)s - 1)
+                    - %(count)s + 1
+                FROM block
+                """,
+                {"table": table, "count": count},
+            )
+            first = cursor.fetchone()[0]
+    return range(first, first + count)
+
+
+def register_part_numbers(part_numbers):
+    """Record part numbers given by an import, e.g. the DokulyAPI migration scripts.
+
+    The PartNumber rows are inserted, skipping numbers already recorded, and the id sequence is
+    moved past the highest number in the same statement, so later part numbers do not collide.
+
+    Returns:
+        Sorted list of the given part numbers that were already recorded.
+    """
+    part_numbers = [int(part_number) for part_number in part_numbers]
+    if not part_numbers:
+        return []
+    table = PartNumber._meta.db_table
+    quoted_table = connection.ops.quote_name(table)
+    last_part_number = _LAST_PART_NUMBER.format(table=quoted_table)
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            _lock_part_numbers(cursor)
+            cursor.execute(
+                f"""
+                WITH inserted AS (
+                    INSERT INTO {quoted_table} ("id")
+                    SELECT unnest(%(part_numbers)s::bigint[])
+                    ON CONFLICT DO NOTHING
+                    RETURNING "id"
+                )
+                SELECT
+                    setval(
+                        pg_get_serial_sequence(%(table)s, 'id'),
+                        GREATEST({last_part_number}, %(highest)s) + 1,
+                        false
+                    ),
+                    ARRAY(SELECT "id" FROM inserted)
+                """,
+                {"table": table, "part_numbers": part_numbers, "highest": max(part_numbers)},
+            )
+            inserted = set(cursor.fetchone()[1])
+    return sorted(set(part_numbers) - inserted)
+
+
+def allocate_numbers(name, count=1, last_used=None):
+    """Reserve consecutive numbers from a named counter.
+
+    The counter row is locked until the surrounding transaction ends, so concurrent requests get
+    different numbers. Bulk flows reserve a whole block in one call.
+
+    Args:
+        name: Name of the counter, e.g. "purchase_order" or "document:12"
+        count: Number of consecutive numbers to reserve
+        last_used: Callable returning the highest number in use. It is called under the lock on
+            every allocation, so numbers set by hand or by imports are never handed out again.
+
+    Returns:
+        The first reserved number, the block is first to first + count - 1.
+    """
+    with transaction.atomic():
+        counter = NumberCounter.objects.select_for_update().filter(name=name).first()
+        if counter is None:
+            try:
+                with transaction.atomic():
+                    counter = NumberCounter.objects.create(name=name, last_number=0)
+            except IntegrityError:
+                # Created by a concurrent request, wait for its lock
+                counter = NumberCounter.objects.select_for_update().get(name=name)
+
+        if last_used is not None:
+            counter.last_number = max(counter.last_number, last_used())
+        first = counter.last_number + 1
+        counter.last_number += count
+        counter.save(update_fields=["last_number"])
+        return first
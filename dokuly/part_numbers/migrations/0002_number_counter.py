@@ -0,0 +1,21 @@
+# Generated by Django 4.2.11 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('part_numbers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NumberCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('last_number', models.BigIntegerField()),
+            ],
+        ),
+    ]
@@ -3,3 +3,12 @@ from django.db import models
 class PartNumber(models.Model):
     pass    # This model only has a primary key.
     #part_number = models.IntegerField(default=-1, blank=True, null=True)
+
+
+class NumberCounter(models.Model):
+    """Last number handed out by a named counter, e.g. purchase order or document numbers.
+    The row is locked while numbers are allocated, see methods.allocate_numbers.
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    last_number = models.BigIntegerField()
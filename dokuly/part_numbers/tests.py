@@ -1,3 +1,92 @@
-from django.test import TestCase
+from concurrent.futures import ThreadPoolExecutor
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from customers.models import Customer
+from customers.views import next_customer_supplier_number
+from documents.models import Document
+from documents.views import increment_document_number
+from part_numbers.methods import (
+    allocate_numbers,
+    get_next_part_number,
+    register_part_numbers,
+    reserve_part_numbers,
+)
+from part_numbers.models import NumberCounter, PartNumber
+from purchasing.models import PurchaseOrder
+from purchasing.suppliermodel import Supplier
+from purchasing.views import next_purchase_order_number
+
+
+class AllocateNumbersTests(TestCase):
+    def test_reserves_blocks_past_the_numbers_in_use(self):
+        in_use = [41]
+
+        self.assertEqual(allocate_numbers("counter", last_used=lambda: in_use[0]), 42)
+        self.assertEqual(allocate_numbers("counter", 10, last_used=lambda: in_use[0]), 43)
+        # Set by hand above the counter
+        in_use[0] = 60
+        self.assertEqual(allocate_numbers("counter", last_used=lambda: in_use[0]), 61)
+        self.assertEqual(allocate_numbers("counter", last_used=lambda: in_use[0]), 62)
+        self.assertEqual(allocate_numbers("other"), 1)
+
+    def test_counters_continue_existing_numbers(self):
+        self.assertEqual(next_purchase_order_number(), 10001)
+        NumberCounter.objects.all().delete()
+        PurchaseOrder.objects.create(purchase_order_number=10050, order_items=[])
+        self.assertEqual(next_purchase_order_number(3), 10051)
+        self.assertEqual(next_purchase_order_number(), 10054)
+        # A purchase order number written by hand is not handed out again
+        PurchaseOrder.objects.create(purchase_order_number=10060, order_items=[])
+        self.assertEqual(next_purchase_order_number(), 10061)
+
+        Customer.objects.create(customer_id=120)
+        Supplier.objects.create(supplier_id=130)
+        self.assertEqual(next_customer_supplier_number(), 131)
+
+        Document.objects.create(project=None, document_number="7", is_archived=True)
+        self.assertEqual(increment_document_number(None), 8)
+
+
+class ReservePartNumbersTests(TestCase):
+    def test_reserves_consecutive_blocks(self):
+        first = get_next_part_number()
+        block = reserve_part_numbers(1000)
+        self.assertEqual(block, range(first + 1, first + 1001))
+        self.assertEqual(PartNumber.objects.filter(id__in=block).count(), 1000)
+        self.assertEqual(get_next_part_number(), first + 1001)
+        self.assertEqual(reserve_part_numbers(0), range(0))
+
+    def test_imported_part_numbers_move_the_sequence(self):
+        first = get_next_part_number()
+        self.assertEqual(register_part_numbers([first + 5, first + 50, first]), [first])
+        self.assertEqual(PartNumber.objects.count(), 3)
+        self.assertEqual(get_next_part_number(), first + 51)
+        self.assertEqual(reserve_part_numbers(2), range(first + 52, first + 54))
+
+
+class ConcurrentAllocateNumbersTests(TransactionTestCase):
+    def test_concurrent_requests_get_different_numbers(self):
+        def allocate(_):
+            try:
+                return [allocate_numbers("counter") for _ in range(20)]
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            numbers = [number for block in executor.map(allocate, range(8)) for number in block]
+        self.assertEqual(sorted(numbers), list(range(1, 161)))
+
+    def test_concurrent_part_number_blocks_do_not_overlap(self):
+        def reserve(index):
+            try:
+                if index % 2:
+                    return [get_next_part_number() for _ in range(10)]
+                return list(reserve_part_numbers(10))
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            numbers = [number for block in executor.map(reserve, range(8)) for number in block]
+        self.assertEqual(len(set(numbers)), 80)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class PartsConfig(AppConfig):
     name = 'parts'
+
+    def ready(self):
+        import parts.signals
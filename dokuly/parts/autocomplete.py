@@ -0,0 +1,87 @@
+"""
+Prefix autocomplete of part numbers and MPNs for the "add item" dialogs.
+
+Every autocompleted column has an expression index on UPPER(column) COLLATE "C", the
+expression of prefix_key, declared in the Meta of its model. In the "C" collation the index is
+sorted by code point, so a case-insensitive prefix match is one range scan of the index, read in
+order and stopped at the limit, however many rows the table has.
+"""
+
+from django.db.models.functions import Collate, Upper
+
+from assemblies.models import Assembly
+from parts.models import Part
+from pcbas.models import Pcba
+
+AUTOCOMPLETE_LIMIT = 10
+MAX_AUTOCOMPLETE_LIMIT = 50
+
+# (app, model, autocompleted columns)
+_SOURCES = [
+    ("parts", Part, ["full_part_number", "mpn", "external_part_number"]),
+    ("pcbas", Pcba, ["full_part_number", "external_part_number"]),
+    ("assemblies", Assembly, ["full_part_number", "external_part_number"]),
+]
+
+APPS = [app for app, _, _ in _SOURCES]
+
+
+def prefix_key(field):
+    """Expression matched and sorted by autocomplete, the expression of its indexes."""
+    return Collate(Upper(field), "C")
+
+
+def autocomplete(querysets, prefix, limit=AUTOCOMPLETE_LIMIT):
+    """Items with a part number or MPN starting with a prefix, case-insensitive.
+
+    Args:
+        querysets: Dict of app to the queryset of items to complete from, for apps in APPS
+        prefix: Start of the part number or MPN typed so far
+        limit: Maximum number of items
+
+    Returns:
+        List of items sorted by the matched value, each item once:
+        {"id", "app", "full_part_number", "display_name", "mpn", "thumbnail", "matched_field", "match"}
+    """
+    key = prefix.strip().upper()
+    if not key:
+        return []
+
+    candidates = []
+    for app, _, fields in _SOURCES:
+        if app not in querysets:
+            continue
+        for field in fields:
+            columns = dict.fromkeys(["id", "full_part_number", "display_name", "thumbnail", field])
+            if app == "parts":
+                columns["mpn"] = None
+            rows = (
+                querysets[app]
+                .annotate(prefix_key=prefix_key(field))
+                .filter(prefix_key__startswith=key)
+                .order_by("prefix_key", "id")
+                .values("prefix_key", *columns)
+                [:limit]
+            )
+            for row in rows:
+                candidates.append((row["prefix_key"], app, row["id"], field, row))
+
+    items = []
+    seen = set()
+    for _, app, item_id, field, row in sorted(candidates, key=lambda candidate: candidate[:3]):
+        if (app, item_id) in seen:
+            continue
+        seen.add((app, item_id))
+        items.append({
+            "id": item_id,
+            "app": app,
+            "full_part_number": row["full_part_number"],
+            "display_name": row["display_name"],
+            "mpn": row.get("mpn"),
+            "thumbnail": row["thumbnail"],
+            "matched_field": field,
+            "match": row[field],
+        })
+        if len(items) == limit:
+            break
+    return items
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parts', '0098_rename_parts_starr_user_idx_parts_starr_user_id_8d328d_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='part',
+            name='normalized_mpn',
+            field=models.CharField(blank=True, db_index=True, max_length=50, null=True),
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated migration to populate Part.normalized_mpn and index it for similarity lookups
+
+import re
+
+from django.db import migrations
+
+BATCH_SIZE = 2000
+
+# Copy of parts.mpn.normalize_mpn as of this migration, the migration must not change with it.
+_PACKAGING_SUFFIX = re.compile(
+    r"[\s\-/#]+(TR|T&R|T/R|REEL\d*|TAPE|CT|CUT|DKR|ND|PBF|BULK)$"
+)
+_NON_ALPHANUMERIC = re.compile(r"[^A-Z0-9]")
+
+
+def normalize_mpn(mpn):
+    if not mpn:
+        return None
+    normalized = mpn.strip().upper()
+    previous = None
+    while previous != normalized:
+        previous = normalized
+        normalized = _PACKAGING_SUFFIX.sub("", normalized)
+    normalized = _NON_ALPHANUMERIC.sub("", normalized)
+    return normalized[:50] or None
+
+
+def populate_normalized_mpn(apps, schema_editor):
+    """Set normalized_mpn on all existing parts with an MPN."""
+    Part = apps.get_model('parts', 'Part')
+    parts = []
+    updated = 0
+    for part in Part.objects.exclude(mpn__isnull=True).exclude(mpn='').only('id', 'mpn').iterator(chunk_size=BATCH_SIZE):
+        part.normalized_mpn = normalize_mpn(part.mpn)
+        parts.append(part)
+        if len(parts) >= BATCH_SIZE:
+            Part.objects.bulk_update(parts, ['normalized_mpn'])
+            updated += len(parts)
+            parts = []
+    Part.objects.bulk_update(parts, ['normalized_mpn'])
+    updated += len(parts)
+
+    print(f"Normalized {updated} part MPNs")
+
+
+def create_trigram_index(apps, schema_editor):
+    """Create the trigram index, if the pg_trgm extension is available on the database server.
+
+    Managed databases and minimal PostgreSQL builds do not always ship the contrib extensions.
+    Without it, candidate matching falls back to exact normalized MPN matches.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            print("pg_trgm is not available, skipping trigram index on parts_part.normalized_mpn")
+            return
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS parts_part_normalized_mpn_trgm "
+            "ON parts_part USING gin (normalized_mpn gin_trgm_ops)"
+        )
+
+
+def drop_trigram_index(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("DROP INDEX IF EXISTS parts_part_normalized_mpn_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parts', '0099_normalized_mpn'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_normalized_mpn, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:57
+
+from django.db import migrations, models
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('parts', '0102_index_last_updated'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='part',
+            index=models.Index(django.db.models.functions.comparison.Collate(django.db.models.functions.text.Upper('full_part_number'), 'C'), name='parts_part_fpn_prefix'),
+        ),
+        migrations.AddIndex(
+            model_name='part',
+            index=models.Index(django.db.models.functions.comparison.Collate(django.db.models.functions.text.Upper('mpn'), 'C'), name='parts_part_mpn_prefix'),
+        ),
+        migrations.AddIndex(
+            model_name='part',
+            index=models.Index(django.db.models.functions.comparison.Collate(django.db.models.functions.text.Upper('external_part_number'), 'C'), name='parts_part_epn_prefix'),
+        ),
+    ]
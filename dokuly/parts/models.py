@@ -1,6 +1,9 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models.functions import Coalesce, Collate, Upper
 
 from projects.models import Project, Tag
 from purchasing.suppliermodel import Supplier
@@ -9,6 +12,16 @@ from files.models import File
 from profiles.models import Profile
 
 
+class SearchVectorDeferredManager(models.Manager):
+    """Manager leaving out the search_vector column, which only the queries of parts.search read.
+
+    The search documents are large, and no serializer sends them.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().defer("search_vector")
+
+
 class Part(models.Model):
     """Instance of a part used in assembly.
     Can be used to create a standalone library of parts.
@@ -49,7 +62,7 @@ class Part(models.Model):
     project = models.ForeignKey(Project, on_delete=models.SET_NULL, null=True)
 
     internal = models.BooleanField(null=True)
-    last_updated = models.DateTimeField(auto_now=True)
+    last_updated = models.DateTimeField(auto_now=True, db_index=True)
     on_order_quantity = models.IntegerField(blank=True, null=True)
 
     # This field is used to keep track of the number of parts that have been produced.
@@ -79,6 +92,8 @@ class Part(models.Model):
 
     # External parts, extra part information
     mpn = models.CharField(max_length=50, blank=True, null=True)
+    # mpn without case, separators and packaging suffixes, see parts.mpn. Maintained by parts.signals.
+    normalized_mpn = models.CharField(max_length=50, blank=True, null=True, db_index=True)
     farnell_number = models.CharField(max_length=50, blank=True, null=True)
     manufacturer = models.CharField(max_length=60, blank=True, null=True)
     datasheet = models.CharField(max_length=400, blank=True, null=True)
@@ -233,6 +248,26 @@ class Part(models.Model):
     pcb_width = models.CharField(max_length=6, blank=True, null=True)
     pcb_length = models.CharField(max_length=6, blank=True, null=True)
 
+    # Full-text search document, maintained by a database trigger on every insert and update.
+    # See parts.search.
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+
+    objects = SearchVectorDeferredManager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="parts_part_search_gin"),
+            # Case-insensitive prefix search of parts.autocomplete
+            models.Index(Collate(Upper("full_part_number"), "C"), name="parts_part_fpn_prefix"),
+            models.Index(Collate(Upper("mpn"), "C"), name="parts_part_mpn_prefix"),
+            models.Index(Collate(Upper("external_part_number"), "C"), name="parts_part_epn_prefix"),
+            # Keyset pages of parts.release_items, sorted on the number in the "C" collation
+            models.Index(
+                Collate(Coalesce("full_part_number", models.Value("")), "C"), "id",
+                name="parts_part_release_key", condition=~models.Q(is_archived=True),
+            ),
+        ]
+
 
 class StarredPart(models.Model):
     """Model for tracking starred parts.
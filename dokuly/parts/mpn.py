@@ -0,0 +1,48 @@
+"""
+Normalized manufacturer part numbers.
+
+CAD exports and distributor listings write the same MPN in many ways, e.g. "LM317T", "lm317t",
+"LM-317T" or "LM317T/TR". Part.normalized_mpn stores the MPN with case, whitespace, separators and
+packaging suffixes removed, so that these all compare equal, and is indexed with pg_trgm for
+similarity lookups where the extension is available.
+"""
+
+import re
+
+from django.db import connection
+
+# Packaging and distributor suffixes, only stripped when separated from the MPN itself,
+# e.g. "-TR", "/TR", " T&R", "-REEL7", "-ND", "CT-ND", "#PBF".
+_PACKAGING_SUFFIX = re.compile(
+    r"[\s\-/#]+(TR|T&R|T/R|REEL\d*|TAPE|CT|CUT|DKR|ND|PBF|BULK)$"
+)
+_NON_ALPHANUMERIC = re.compile(r"[^A-Z0-9]")
+
+_trigram_available = None
+
+
+def normalize_mpn(mpn):
+    """Normalized form of an MPN, None for empty MPNs.
+
+    >>> normalize_mpn(" lm-317t/tr ")
+    'LM317T'
+    """
+    if not mpn:
+        return None
+    normalized = mpn.strip().upper()
+    previous = None
+    while previous != normalized:
+        previous = normalized
+        normalized = _PACKAGING_SUFFIX.sub("", normalized)
+    normalized = _NON_ALPHANUMERIC.sub("", normalized)
+    return normalized[:50] or None
+
+
+def has_trigram_extension():
+    """True if the pg_trgm extension is installed in the database."""
+    global _trigram_available
+    if _trigram_available is None:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _trigram_available = cursor.fetchone() is not None
+    return _trigram_available
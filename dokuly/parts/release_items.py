@@ -0,0 +1,166 @@
+"""
+Paged listing of parts, PCBAs, assemblies, documents and ECOs for the Release Management table.
+
+All five tables are read with one UNION ALL query, sorted by part number and paged in the
+database. Pages are addressed with a keyset cursor, (part number, app, id) of the last row of
+the previous page, which every branch of the union filters on before sorting, so a page costs
+the same wherever it is in the list. Each branch is read in order from the <model>_release_key
+index of its model, partial on unarchived rows, and stops at the page size. The total is estimated from the query plan for large
+results.
+"""
+
+import base64
+import json
+
+from django.db import connection
+from django.db.models import F, IntegerField, Q, Value
+from django.db.models.functions import Coalesce, Collate
+
+from assemblies.models import Assembly
+from documents.models import Document
+from eco.models import Eco
+from parts.models import Part
+from pcbas.models import Pcba
+
+# (app, model, part number field, name field, has revisions and archiving)
+_SOURCES = [
+    ("parts", Part, "full_part_number", "display_name", True),
+    ("pcbas", Pcba, "full_part_number", "display_name", True),
+    ("assemblies", Assembly, "full_part_number", "display_name", True),
+    ("documents", Document, "full_doc_number", "title", True),
+    ("eco", Eco, "display_name", "display_name", False),
+]
+
+ORDERING = ["item_number", "item_app", "item_id"]
+
+# Below this estimate the total is counted exactly, which is cheap for small results
+EXACT_COUNT_LIMIT = 10000
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(row):
+    """Cursor of the page after a row."""
+    key = [row["item_number"], row["item_app"], row["item_id"]]
+    return base64.urlsafe_b64encode(json.dumps(key).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    try:
+        number, app, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return str(number), str(app), int(item_id)
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {e}")
+
+
+def _after(app, cursor):
+    """Rows of one app sorting after the cursor, (number, app, id) > cursor."""
+    number, cursor_app, item_id = cursor
+    after = Q(item_number__gt=number)
+    if app > cursor_app:
+        after |= Q(item_number=number)
+    elif app == cursor_app:
+        after |= Q(item_number=number, item_id__gt=item_id)
+    # Implied by the above, it is the bound of the range scan of the release_key index
+    return Q(item_number__gte=number) & after
+
+
+def _branch(app, model, number_field, name_field, has_revisions, search, only_latest_revisions):
+    queryset = model.objects.all()
+    if has_revisions:
+        if only_latest_revisions:
+            queryset = queryset.filter(is_latest_revision=True)
+        queryset = queryset.exclude(is_archived=True)
+    if search:
+        queryset = queryset.filter(
+            Q(**{f"{number_field}__icontains": search}) | Q(**{f"{name_field}__icontains": search})
+        )
+    # Only annotations are selected, so every branch has the same columns in the same order.
+    # Sorting in the "C" collation orders by code point, regardless of the database locale.
+    return queryset.annotate(
+        item_id=F("id"),
+        item_number=Collate(Coalesce(number_field, Value("")), "C"),
+        item_name=Coalesce(name_field, Value("")),
+        item_state=Coalesce("release_state", Value("")),
+        item_thumbnail=F("thumbnail") if app != "eco" else Value(None, output_field=IntegerField()),
+        item_app=Value(app),
+    )
+
+
+def _values(queryset):
+    return queryset.values("item_id", "item_number", "item_name", "item_state", "item_thumbnail", "item_app")
+
+
+def _union(querysets):
+    first, *rest = querysets
+    return first.union(*rest, all=True)
+
+
+def estimate_count(queryset):
+    """Row estimate of the query planner for a queryset."""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_release_items(search="", only_latest_revisions=False):
+    """Number of matching items, estimated once there are more than EXACT_COUNT_LIMIT.
+
+    Returns:
+        (total, is_estimate)
+    """
+    union = _union([
+        _values(_branch(*source, search, only_latest_revisions)) for source in _SOURCES
+    ])
+    estimate = estimate_count(union)
+    if estimate > EXACT_COUNT_LIMIT:
+        return estimate, True
+    return union.count(), False
+
+
+def get_release_items_page(search="", page_size=50, cursor=None, offset=0, only_latest_revisions=False):
+    """One page of items sorted by part number.
+
+    Args:
+        search: Text matched against part numbers and names
+        page_size: Number of items on the page
+        cursor: next_cursor of the previous page, or None for the first page
+        offset: Number of items to skip, only used without a cursor
+
+    Returns:
+        (items, next_cursor), next_cursor is None on the last page.
+    """
+    if cursor is not None:
+        cursor = decode_cursor(cursor)
+        offset = 0
+    # Every branch only needs to provide enough rows to fill the page on its own
+    branch_limit = offset + page_size + 1
+
+    branches = []
+    for source in _SOURCES:
+        branch = _branch(*source, search, only_latest_revisions)
+        if cursor is not None:
+            branch = branch.filter(_after(source[0], cursor))
+        branches.append(_values(branch.order_by(*ORDERING))[:branch_limit])
+
+    rows = list(_union(branches).order_by(*ORDERING)[offset:offset + page_size + 1])
+    next_cursor = encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+
+    items = [
+        {
+            "id": row["item_id"],
+            "full_part_number": row["item_number"],
+            "display_name": row["item_name"],
+            "release_state": row["item_state"],
+            "thumbnail": row["item_thumbnail"],
+            "app": row["item_app"],
+        }
+        for row in rows[:page_size]
+    ]
+    return items, next_cursor
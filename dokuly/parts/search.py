@@ -0,0 +1,90 @@
+"""
+Ranked search over parts, PCBAs, assemblies, documents and ECOs.
+
+Each of these tables has a search_vector column with a weighted full-text document of its
+searchable fields, kept current on every insert and update by a trigger created in the
+search_vector migration of its app, and indexed with GIN. Weights:
+
+- A: part numbers, e.g. full_part_number, mpn, external_part_number, full_doc_number
+- B: names and titles
+- C: manufacturer
+- D: descriptions
+
+Queries match whole words by prefix through the search vector, and identifier columns by
+substring, which is indexed with pg_trgm where the extension is available. Rows are ranked and
+limited in the database.
+"""
+
+import operator
+import re
+from functools import reduce
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db.models import Case, F, FloatField, Q, Value, When
+
+from parts.mpn import has_trigram_extension
+
+# Lexemes of the "simple" text search configuration, which splits on punctuation and underscores
+_WORD = re.compile(r"[^\W_]+")
+
+# Ranking boosts of exact and prefix matches on the main identifier, e.g. the full part number
+EXACT_MATCH_BOOST = 2.0
+PREFIX_MATCH_BOOST = 1.0
+
+
+def prefix_search_query(query):
+    """tsquery matching every word of the query as a prefix, None if it has no words.
+
+    "LM317 reg" gives to_tsquery('simple', 'lm317:* & reg:*').
+    """
+    words = _WORD.findall(query.lower())
+    if not words:
+        return None
+    return SearchQuery(" & ".join(f"{word}:*" for word in words), config="simple", search_type="raw")
+
+
+def ranked_search(queryset, query, substring_fields, limit):
+    """Best matches of a search query, ranked and limited in the database.
+
+    Args:
+        queryset: Queryset of a model with a search_vector column
+        query: Text typed by the user, an empty query matches everything
+        substring_fields: Identifier columns also matched by substring, the first one is boosted
+            for exact and prefix matches
+        limit: Maximum number of rows
+
+    Returns:
+        Queryset annotated with search_rank, best match first.
+    """
+    query = (query or "").strip()
+    if not query:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField())).order_by("-id")[:limit]
+
+    matches = reduce(operator.or_, (Q(**{f"{field}__icontains": query}) for field in substring_fields))
+    rank = Value(0.0, output_field=FloatField())
+
+    search_query = prefix_search_query(query)
+    if search_query is not None:
+        matches |= Q(search_vector=search_query)
+        rank = SearchRank(F("search_vector"), search_query)
+
+    key = substring_fields[0]
+    rank = rank + Case(
+        When(**{f"{key}__iexact": query}, then=Value(EXACT_MATCH_BOOST)),
+        When(**{f"{key}__istartswith": query}, then=Value(PREFIX_MATCH_BOOST)),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    if has_trigram_extension():
+        rank = rank + TrigramSimilarity(key, query)
+
+    return queryset.filter(matches).annotate(search_rank=rank).order_by("-search_rank", "-id")[:limit]
+
+
+def merge_ranked(results, limit):
+    """Merge (search_rank, item) pairs of several tables into one list, best match first.
+
+    Equal ranks keep the order of the tables.
+    """
+    merged = sorted(results, key=lambda result: -result[0])
+    return [item for _, item in merged[:limit]]
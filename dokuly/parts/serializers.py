@@ -5,6 +5,8 @@ from rest_framework import serializers
 from parts.models import Part, PartType
 from pcbas.models import Pcba
 from assemblies.models import Assembly
+from organizations.fieldsets import SparseFieldsetMixin
+from profiles.models import Profile
 from projects.serializers import ProjectTitleSerializer, TagSerializer
 
 # PartType ------------------------------------------------------------------------
@@ -33,6 +35,72 @@ class PartTypeBomSerializer(serializers.ModelSerializer):
 
 
 # Part ----------------------------------------------------------------------------
+def lowest_moq_price(part):
+    """Latest price of a part with the lowest minimum order quantity (matching BOM table logic
+    in getBomCols.js), None if it has no prices.
+
+    Uses the prices prefetched by the list views, e.g.
+    Prefetch("prices", queryset=Price.objects.filter(is_latest_price=True)), so serializing a
+    list does not query once per part. The result is cached on the part.
+    """
+    if not hasattr(part, "_lowest_moq_price"):
+        if "prices" in getattr(part, "_prefetched_objects_cache", {}):
+            latest_prices = [price for price in part.prices.all() if price.is_latest_price]
+        else:
+            latest_prices = list(part.prices.filter(is_latest_price=True))
+        part._lowest_moq_price = min(
+            latest_prices,
+            key=lambda p: p.minimum_order_quantity or float("inf"),
+            default=None,
+        )
+    return part._lowest_moq_price
+
+
+def organization_revision_settings(user):
+    """Revision settings of the organization of a user, None if there are none."""
+    if user is None or not user.is_authenticated:
+        return None
+    from organizations.models import Organization
+    org = (
+        Organization.objects.filter(id__in=Profile.objects.filter(user=user).values("organization_id"))
+        .only("use_number_revisions", "revision_format")
+        .first()
+    )
+    if org is None:
+        return None
+    return {
+        "use_number_revisions": org.use_number_revisions,
+        "revision_format": org.revision_format,
+    }
+
+
+class PartPriceOrganizationMixin:
+    """price, currency and organization fields of the part serializers.
+
+    The organization settings are looked up once per serialization, and can be given up front in
+    the "organization" context key.
+    """
+
+    def get_price(self, obj):
+        price = lowest_moq_price(obj)
+        if price is not None and price.price is not None:
+            return str(price.price)
+        return None
+
+    def get_currency(self, obj):
+        price = lowest_moq_price(obj)
+        if price is not None and price.currency:
+            return price.currency
+        return None
+
+    def get_organization(self, obj):
+        """Get organization revision settings for the current user."""
+        if "organization" not in self.context:
+            request = self.context.get("request")
+            self.context["organization"] = organization_revision_settings(getattr(request, "user", None))
+        return self.context["organization"]
+
+
 class AlternativePartSerializer(serializers.ModelSerializer):
     """
     Serializer for the alternative_parts ManyToManyField of the Part model.
@@ -50,7 +118,7 @@ class AlternativePartSerializer(serializers.ModelSerializer):
         fields = ("id", "mpn", "image_url", "full_part_number", "display_name")
 
 
-class PartSerializer(serializers.ModelSerializer):
+class PartSerializer(SparseFieldsetMixin, PartPriceOrganizationMixin, serializers.ModelSerializer):
     """
     Serializer for the Part model. Also adds the supplier_name field to the
     serialized data.
@@ -68,59 +136,12 @@ class PartSerializer(serializers.ModelSerializer):
     price = serializers.SerializerMethodField()
     currency = serializers.SerializerMethodField()
 
-    def get_price(self, obj):
-        """Get price from the latest Price model entry with lowest MOQ (matching BOM table logic)."""
-        try:
-            # Get all latest prices and select the one with lowest minimum_order_quantity
-            # This matches the logic used in BOM tables (getBomCols.js)
-            latest_prices = obj.prices.filter(is_latest_price=True)
-            if latest_prices.exists():
-                # Get the price with the lowest MOQ
-                lowest_moq_price = min(latest_prices, key=lambda p: p.minimum_order_quantity or float('inf'))
-                if lowest_moq_price and lowest_moq_price.price is not None:
-                    return str(lowest_moq_price.price)
-        except:
-            pass
-        return None
-
-    def get_currency(self, obj):
-        """Get currency from the latest Price model entry with lowest MOQ (matching BOM table logic)."""
-        try:
-            # Get all latest prices and select the one with lowest minimum_order_quantity
-            latest_prices = obj.prices.filter(is_latest_price=True)
-            if latest_prices.exists():
-                # Get the price with the lowest MOQ
-                lowest_moq_price = min(latest_prices, key=lambda p: p.minimum_order_quantity or float('inf'))
-                if lowest_moq_price and lowest_moq_price.currency:
-                    return lowest_moq_price.currency
-        except:
-            pass
-        return None
-
-    def get_organization(self, obj):
-        """Get organization revision settings for the current user."""
-        request = self.context.get('request')
-        if request and hasattr(request, 'user') and request.user.is_authenticated:
-            try:
-                from profiles.models import Profile
-                profile = Profile.objects.get(user=request.user)
-                if profile.organization_id:
-                    from organizations.models import Organization
-                    org = Organization.objects.get(id=profile.organization_id)
-                    return {
-                        'use_number_revisions': org.use_number_revisions,
-                        'revision_format': org.revision_format,
-                    }
-            except:
-                pass
-        return None
-
     class Meta:
         model = Part
-        fields = "__all__"
+        exclude = ["search_vector"]
 
 
-class PartSerializerNoAlternate(serializers.ModelSerializer):
+class PartSerializerNoAlternate(SparseFieldsetMixin, PartPriceOrganizationMixin, serializers.ModelSerializer):
     """All part info, not loading alternate parts."""
     organization = serializers.SerializerMethodField()
     price = serializers.SerializerMethodField()
@@ -160,54 +181,9 @@ class PartSerializerNoAlternate(serializers.ModelSerializer):
             "is_rohs_compliant",
             "is_reach_compliant",
             "country_of_origin",
+            "last_updated",
         ]
-
-    def get_price(self, obj):
-        """Get price from the latest Price model entry with lowest MOQ (matching BOM table logic)."""
-        try:
-            # Get all latest prices and select the one with lowest minimum_order_quantity
-            # This matches the logic used in BOM tables (getBomCols.js)
-            latest_prices = obj.prices.filter(is_latest_price=True)
-            if latest_prices.exists():
-                # Get the price with the lowest MOQ
-                lowest_moq_price = min(latest_prices, key=lambda p: p.minimum_order_quantity or float('inf'))
-                if lowest_moq_price and lowest_moq_price.price is not None:
-                    return str(lowest_moq_price.price)
-        except:
-            pass
-        return None
-
-    def get_currency(self, obj):
-        """Get currency from the latest Price model entry with lowest MOQ (matching BOM table logic)."""
-        try:
-            # Get all latest prices and select the one with lowest minimum_order_quantity
-            latest_prices = obj.prices.filter(is_latest_price=True)
-            if latest_prices.exists():
-                # Get the price with the lowest MOQ
-                lowest_moq_price = min(latest_prices, key=lambda p: p.minimum_order_quantity or float('inf'))
-                if lowest_moq_price and lowest_moq_price.currency:
-                    return lowest_moq_price.currency
-        except:
-            pass
-        return None
-
-    def get_organization(self, obj):
-        """Get organization revision settings for the current user."""
-        request = self.context.get('request')
-        if request and hasattr(request, 'user') and request.user.is_authenticated:
-            try:
-                from profiles.models import Profile
-                profile = Profile.objects.get(user=request.user)
-                if profile.organization_id:
-                    from organizations.models import Organization
-                    org = Organization.objects.get(id=profile.organization_id)
-                    return {
-                        'use_number_revisions': org.use_number_revisions,
-                        'revision_format': org.revision_format,
-                    }
-            except:
-                pass
-        return None
+        method_field_sources = {"price": [], "currency": [], "organization": []}
 
 
 class PartTableSerializer(serializers.ModelSerializer):
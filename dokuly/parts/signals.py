@@ -0,0 +1,13 @@
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+
+from .models import Part
+from .mpn import normalize_mpn
+
+
+@receiver(pre_save, sender=Part)
+def set_normalized_mpn(sender, instance, **kwargs):
+    """
+    Keep normalized_mpn in sync with mpn.
+    """
+    instance.normalized_mpn = normalize_mpn(instance.mpn)
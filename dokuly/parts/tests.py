@@ -1,7 +1,56 @@
+import importlib
+import json
+
 from django.test import TestCase, TransactionTestCase
-from django.contrib.auth.models import AnonymousUser
+from django.contrib.auth.models import AnonymousUser, User
+from django.db import connection
 from django.test.client import RequestFactory
-from .models import Part
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from profiles.models import Profile
+from assemblies.models import Assembly
+from assemblies.serializers import AssemblyTableSerializer
+from customers.models import Customer
+from documents.models import Document
+from eco.models import Eco
+from part_numbers.methods import get_next_part_number
+from pcbas.models import Pcba
+from pcbas.serializers import PcbaTableSerializer
+from projects.models import Project, Tag
+from organizations.models import Organization
+from purchasing.priceModel import Price
+from .models import Part, PartType, StarredPart
+from .autocomplete import prefix_key
+from .mpn import normalize_mpn
+from .serializers import PartTableSerializer
+from . import release_items
+from .table_rows import (
+    ASSEMBLY_TABLE_VALUES,
+    PART_TABLE_VALUES,
+    PCBA_TABLE_VALUES,
+    assembly_table_rows,
+    part_table_rows,
+    pcba_table_rows,
+)
+
+
+class AuthenticatedClientMixin:
+    """self.client, an APIClient authenticated as self.user, a user with a profile."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="tester", password="pass")
+        Profile.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def get(self, url, **params):
+        response = self.client.get(url, params, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
 
 class PartsTests(TestCase):
     
@@ -11,4 +60,450 @@ class PartsTests(TestCase):
 
     def test_fetch_part(self):
         result = Part.objects.get(part_number=1)
-        self.assertEqual(result.part_number, 1)
\ No newline at end of file
+        self.assertEqual(result.part_number, 1)
+
+
+class NormalizedMpnTests(TestCase):
+
+    def test_normalize_mpn(self):
+        for mpn in ["LM317T", " lm317t ", "LM-317T", "LM317T/TR", "LM317T-REEL7", "LM317T CT-ND"]:
+            self.assertEqual(normalize_mpn(mpn), "LM317T")
+        self.assertIsNone(normalize_mpn(""))
+        self.assertIsNone(normalize_mpn(None))
+
+    def test_populate_migration_normalizes_mpns(self):
+        migration = importlib.import_module("parts.migrations.0100_populate_normalized_mpn")
+        for mpn, normalized in [
+            (" lm-317t/tr ", "LM317T"), ("RC0603FR-0710KL", "RC0603FR0710KL"),
+            ("BAV99#PBF", "BAV99"), ("", None), (None, None),
+        ]:
+            self.assertEqual(migration.normalize_mpn(mpn), normalized)
+
+    def test_normalized_mpn_follows_mpn(self):
+        part = Part.objects.create(part_number=2, mpn="rc0603fr-0710kl")
+        self.assertEqual(part.normalized_mpn, "RC0603FR0710KL")
+        part.mpn = None
+        part.save()
+        self.assertIsNone(Part.objects.get(id=part.id).normalized_mpn)
+
+
+class GlobalPartSearchTests(AuthenticatedClientMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.regulator = Part.objects.create(
+            part_number=1, full_part_number="PRT10001", display_name="Voltage regulator",
+            mpn="LM317T", manufacturer="Texas Instruments", is_archived=False,
+        )
+        self.resistor = Part.objects.create(
+            part_number=2, full_part_number="PRT10002", display_name="Resistor 10k",
+            description="Thick film, for the LM317 feedback divider", is_archived=False,
+        )
+
+    def search(self, query, **data):
+        response = self.client.put(
+            "/api/global_part_search/", {"query": query, **data}, format="json", secure=True
+        )
+        self.assertEqual(response.status_code, 200)
+        return [item["full_part_number"] for item in response.json()]
+
+    def test_search_vector_follows_saves(self):
+        self.regulator.display_name = "Linear regulator"
+        self.regulator.save()
+        self.assertTrue(Part.objects.filter(id=self.regulator.id, search_vector="linear").exists())
+
+    def test_search_vector_is_deferred(self):
+        for model in [Part, Pcba, Assembly, Document, Eco]:
+            self.assertNotIn("search_vector", str(model.objects.all().query), model.__name__)
+
+        part = Part.objects.get(id=self.regulator.id)
+        part.display_name = "Linear regulator"
+        part.save()
+        self.assertTrue(Part.objects.filter(id=part.id, search_vector="linear").exists())
+
+    def test_ranks_identifier_matches_first(self):
+        # The MPN of the regulator outranks the description of the resistor
+        self.assertEqual(self.search("lm317"), ["PRT10001", "PRT10002"])
+        self.assertEqual(self.search("PRT10002"), ["PRT10002"])
+        # Substrings of part numbers and word prefixes of other fields
+        self.assertEqual(self.search("0001"), ["PRT10001"])
+        self.assertEqual(self.search("texas instr"), ["PRT10001"])
+        self.assertEqual(self.search("nothing"), [])
+
+    def test_limits_in_the_database(self):
+        Part.objects.bulk_create(
+            Part(part_number=100 + i, full_part_number=f"PRT2{i:04d}", display_name="Capacitor", is_archived=False)
+            for i in range(80)
+        )
+        with CaptureQueriesContext(connection) as queries:
+            results = self.search("capacitor", include_tables=["parts", "pcbas", "assemblies", "documents", "ecos"])
+        self.assertEqual(len(results), 50)
+        searches = [query["sql"] for query in queries if "search_rank" in query["sql"]]
+        self.assertEqual(len(searches), 5)
+        self.assertTrue(all(sql.endswith("LIMIT 50") for sql in searches))
+
+
+class SearchReleaseItemsTests(AuthenticatedClientMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        Part.objects.bulk_create(
+            Part(part_number=i, full_part_number=f"PRT{i:03d}", display_name="Part", is_archived=False)
+            for i in range(7)
+        )
+        Part.objects.create(part_number=99, full_part_number="PRT999", is_archived=True)
+        self.first_id = Part.objects.order_by("id").values_list("id", flat=True).first()
+
+    def search(self, **params):
+        return self.get("/api/items/search/releaseManagement/", **params)
+
+    def test_cursor_pages_cover_every_item_once(self):
+        Assembly.objects.create(part_number=1, full_part_number="ASM001", price=0, is_archived=False)
+        Eco.objects.create(display_name="ECO change")
+
+        numbers = []
+        body = self.search(page_size=3)
+        self.assertEqual((body["total"], body["total_is_estimate"]), (9, False))
+        while True:
+            numbers += [item["full_part_number"] for item in body["results"]]
+            if not body["next_cursor"]:
+                break
+            # Profile, the page, and the plan estimate and exact count of this small total
+            with self.assertNumQueries(4):
+                body = self.search(page_size=3, cursor=body["next_cursor"])
+
+        self.assertEqual(numbers, sorted(numbers))
+        self.assertEqual(len(numbers), 9)
+        self.assertNotIn("PRT999", numbers)
+
+    def test_page_numbers_and_search(self):
+        body = self.search(page=2, page_size=5)
+        self.assertEqual([item["full_part_number"] for item in body["results"]], ["PRT005", "PRT006"])
+        self.assertIsNone(body["next_cursor"])
+
+        body = self.search(search="prt00")
+        self.assertEqual(body["total"], 7)
+
+        response = self.client.get("/api/items/search/releaseManagement/", {"cursor": "nope"}, secure=True)
+        self.assertEqual(response.status_code, 400)
+
+    def test_pages_are_index_range_scans(self):
+        indexes = {
+            "parts": "parts_part_release_key",
+            "pcbas": "pcbas_pcba_release_key",
+            "assemblies": "assemblies_asm_release_key",
+            "documents": "documents_doc_release_key",
+            "eco": "eco_eco_release_key",
+        }
+        cursor = ("PRT003", "parts", self.first_id)
+        for source in release_items._SOURCES:
+            branch = release_items._branch(*source, "", True).filter(release_items._after(source[0], cursor))
+            queryset = release_items._values(branch.order_by(*release_items.ORDERING))[:51]
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as db_cursor:
+                # The tables are nearly empty, make the planner cost them like large ones
+                db_cursor.execute("SET LOCAL enable_seqscan = off")
+                db_cursor.execute("SET LOCAL enable_bitmapscan = off")
+                db_cursor.execute(f"EXPLAIN {sql}", params)
+                plan = "\n".join(row[0] for row in db_cursor.fetchall())
+            self.assertIn(indexes[source[0]], plan)
+            self.assertIn("Index Cond", plan)
+            self.assertNotIn("Sort", plan)
+
+
+class CursorPaginationTests(AuthenticatedClientMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        Part.objects.bulk_create(
+            Part(part_number=i, full_part_number=f"PRT{i}", is_latest_revision=True, is_archived=False)
+            for i in range(5)
+        )
+
+    def test_unpaginated_by_default(self):
+        body = self.get("/api/v1/parts/")
+        self.assertIsInstance(body, list)
+        self.assertEqual(len(body), 5)
+
+    def test_pages_cover_every_part_once(self):
+        for url in ["/api/v1/parts/", "/api/v1/parts/all/", "/api/parts/get/parts_table/"]:
+            ids = []
+            body = self.get(url, limit=2)
+            while True:
+                ids += [part["id"] for part in body["results"]]
+                if body["next_cursor"] is None:
+                    break
+                body = self.get(url, limit=2, cursor=body["next_cursor"])
+            self.assertEqual(ids, sorted(Part.objects.values_list("id", flat=True)))
+
+    def test_filters(self):
+        self.assertEqual(len(self.get("/api/v1/parts/", cursor="", updated_since="2999-01-01")["results"]), 0)
+        self.assertEqual(len(self.get("/api/v1/parts/", cursor="", updated_since="2000-01-01")["results"]), 5)
+        response = self.client.get("/api/v1/parts/", {"cursor": "bad"}, secure=True)
+        self.assertEqual(response.status_code, 400)
+
+    def test_other_list_endpoints(self):
+        for url in ["/api/v1/pcbas/", "/api/v1/assemblies/", "/api/v1/documents/"]:
+            self.assertEqual(self.get(url, limit=10), {"results": [], "next_cursor": None})
+
+
+class PartListQueryCountTests(AuthenticatedClientMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.org = Organization.objects.create(name="Org", use_number_revisions=True)
+        Profile.objects.filter(user=self.user).update(organization_id=self.org.id)
+        self.add_parts(3)
+
+    def add_parts(self, count):
+        start = Part.objects.count()
+        for i in range(start, start + count):
+            part = Part.objects.create(
+                part_number=i, full_part_number=f"PRT{i}", is_latest_revision=True, is_archived=False
+            )
+            Price.objects.create(part=part, price="2.5", minimum_order_quantity=100, currency="EUR")
+            Price.objects.create(part=part, price="3.0", minimum_order_quantity=1, currency="USD")
+            Price.objects.create(part=part, price="1.0", minimum_order_quantity=1, is_latest_price=False)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.json()
+
+    def test_query_count_does_not_grow_with_parts(self):
+        for url in ["/api/v1/parts/", "/api/v1/parts/all/"]:
+            few, _ = self.count_queries(url)
+            self.add_parts(5)
+            many, body = self.count_queries(url)
+            self.assertEqual(few, many, url)
+            self.assertEqual(len(body), Part.objects.count())
+
+    def test_lowest_moq_price_and_organization(self):
+        _, body = self.count_queries("/api/v1/parts/")
+        for part in body:
+            self.assertEqual(part["price"], "3.0000")
+            self.assertEqual(part["currency"], "USD")
+            self.assertTrue(part["organization"]["use_number_revisions"])
+
+
+class SparseFieldsetTests(AuthenticatedClientMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.part = Part.objects.create(
+            part_number=1, full_part_number="PRT1", mpn="LM317T", is_latest_revision=True, is_archived=False,
+            part_information={"voltage": "1.25 V"},
+        )
+
+    def get_with_sql(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), " ".join(query["sql"] for query in queries.captured_queries)
+
+    def test_fields(self):
+        for url in ["/api/v1/parts/", "/api/v1/parts/all/"]:
+            body, sql = self.get_with_sql(url, fields="id,full_part_number,mpn,release_state,last_updated")
+            self.assertEqual(list(body[0]), ["id", "full_part_number", "release_state", "mpn", "last_updated"])
+            self.assertEqual(body[0]["mpn"], "LM317T")
+            # Left out fields are not read, and prices are not prefetched
+            self.assertNotIn("part_information", sql)
+            self.assertNotIn("purchasing_price", sql)
+
+    def test_exclude(self):
+        body, sql = self.get_with_sql("/api/v1/parts/", exclude="part_information,price_history,stock")
+        self.assertNotIn("part_information", body[0])
+        self.assertIn("price", body[0])
+        self.assertNotIn('"parts_part"."part_information"', sql)
+
+    def test_fields_with_pages(self):
+        body, _ = self.get_with_sql("/api/v1/parts/", limit=10, fields="id,mpn")
+        self.assertEqual(body["results"], [{"id": self.part.id, "mpn": "LM317T"}])
+
+    def test_detail_and_other_endpoints(self):
+        body, _ = self.get_with_sql(f"/api/v1/parts/{self.part.id}/", fields="id,mpn,part_information")
+        self.assertEqual(body, {"id": self.part.id, "mpn": "LM317T", "part_information": {"voltage": "1.25 V"}})
+        for url in ["/api/v1/pcbas/", "/api/v1/assemblies/", "/api/v1/documents/"]:
+            self.assertEqual(self.get_with_sql(url, fields="id,release_state")[0], [])
+
+    def test_unknown_field(self):
+        response = self.client.get("/api/v1/parts/", {"fields": "id,nope"}, secure=True)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("nope", response.json())
+
+
+class TableRowsTests(AuthenticatedClientMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        customer = Customer.objects.create(name="ACME")
+        self.project = Project.objects.create(title="Rover", customer=customer)
+        self.project.project_members.add(self.user)
+        part_type = PartType.objects.create(name="Resistor", icon_url="/static/icons/resistor.svg")
+        tags = [Tag.objects.create(name=name, color="#fff", project=self.project) for name in ["smd", "rohs"]]
+
+        self.part = Part.objects.create(
+            part_number=1, full_part_number="PRT1", mpn="RC0603", part_type=part_type, project=self.project,
+            is_latest_revision=True, is_archived=False, released_date=timezone.now(),
+        )
+        Part.objects.create(part_number=2, full_part_number="PRT2", is_latest_revision=True, is_archived=False)
+        pcba = Pcba.objects.create(
+            part_number=3, full_part_number="PCBA3", part_type=part_type, project=self.project,
+            is_latest_revision=True, is_archived=False, pcb_renders=[1, 2],
+        )
+        assembly = Assembly.objects.create(
+            part_number=4, full_part_number="ASM4", project=self.project, is_latest_revision=True, is_archived=False,
+            price=0,
+        )
+        for item in [self.part, pcba, assembly]:
+            item.tags.set(tags)
+        StarredPart.objects.create(user=self.user, part=self.part)
+
+    def rendered(self, data):
+        return sorted(json.loads(JSONRenderer().render(data)), key=lambda row: row["id"])
+
+    def test_rows_match_serializers(self):
+        starred = {self.part.id}
+        for model, serializer_class, rows, values, context_key in [
+            (Part, PartTableSerializer, part_table_rows, PART_TABLE_VALUES, "starred_part_ids"),
+            (Pcba, PcbaTableSerializer, pcba_table_rows, PCBA_TABLE_VALUES, "starred_pcba_ids"),
+            (Assembly, AssemblyTableSerializer, assembly_table_rows, ASSEMBLY_TABLE_VALUES, "starred_assembly_ids"),
+        ]:
+            queryset = model.objects.all()
+            expected = serializer_class(queryset, many=True, context={context_key: starred}).data
+            self.assertEqual(
+                self.rendered(rows(queryset.values(*values), starred)), self.rendered(expected), model.__name__
+            )
+
+    def test_endpoints(self):
+        response = self.client.get("/api/parts/get/parts_table/", secure=True)
+        self.assertEqual(response.status_code, 200)
+        rows = {row["id"]: row for row in response.json()}
+        self.assertEqual(len(rows), 2)
+        self.assertTrue(rows[self.part.id]["is_starred"])
+        self.assertEqual([tag["name"] for tag in rows[self.part.id]["tags"]], ["smd", "rohs"])
+
+        response = self.client.get("/api/homepage/for-you/", secure=True)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["starred_parts"][0]["id"], self.part.id)
+        self.assertEqual(body["pcbas"], [])
+
+
+class AutocompleteTests(AuthenticatedClientMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        latest = {"is_latest_revision": True, "is_archived": False}
+        self.regulator = Part.objects.create(part_number=1, full_part_number="PRT0001", mpn="LM317T", **latest)
+        Part.objects.create(part_number=2, full_part_number="PRT0002", mpn="lm7805", **latest)
+        Part.objects.create(part_number=3, full_part_number="PRT0003", mpn="LM317LZ", is_archived=True)
+        hidden = Project.objects.create(title="Hidden")
+        Part.objects.create(part_number=4, full_part_number="PRT0004", mpn="LM317HV", project=hidden, **latest)
+        Pcba.objects.create(part_number=5, full_part_number="PCBA0005", external_part_number="LM-BOARD", **latest)
+        Assembly.objects.create(part_number=6, full_part_number="ASM0006", price=0, **latest)
+
+    def complete(self, **params):
+        return self.get("/api/parts/autocomplete/", **params)
+
+    def test_prefix_matches(self):
+        items = self.complete(q="lm3")
+        self.assertEqual([(item["id"], item["matched_field"]) for item in items], [(self.regulator.id, "mpn")])
+        self.assertEqual(items[0]["full_part_number"], "PRT0001")
+
+        items = self.complete(q="LM")
+        self.assertEqual([item["match"] for item in items], ["LM-BOARD", "LM317T", "lm7805"])
+        self.assertEqual(items[0]["app"], "pcbas")
+
+        self.assertEqual([item["full_part_number"] for item in self.complete(q="prt", limit=1)], ["PRT0001"])
+        self.assertEqual(len(self.complete(q="", tables="parts")), 0)
+        self.assertEqual(len(self.complete(q="%")), 0)
+        self.assertEqual([item["app"] for item in self.complete(q="asm")], ["assemblies"])
+        self.assertEqual(self.complete(q="asm", tables="parts,pcbas"), [])
+
+    def test_parts_without_archived_flag_are_completed(self):
+        legacy = Part.objects.create(part_number=7, full_part_number="PRT0007", mpn="NE555", is_archived=None)
+
+        self.assertEqual([item["id"] for item in self.complete(q="ne5")], [legacy.id])
+
+    def test_invalid_parameters(self):
+        for params in [{"q": "lm", "tables": "documents"}, {"q": "lm", "limit": "ten"}]:
+            response = self.client.get("/api/parts/autocomplete/", params, secure=True)
+            self.assertEqual(response.status_code, 400)
+
+    def test_uses_prefix_index(self):
+        queryset = (
+            Part.objects.annotate(prefix_key=prefix_key("mpn"))
+            .filter(prefix_key__startswith="LM3")
+            .order_by("prefix_key")[:10]
+        )
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute(f"EXPLAIN {sql}", params)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        self.assertIn("parts_part_mpn_prefix", plan)
+        self.assertNotIn("Sort", plan)
+
+
+class MigrationUploadTests(AuthenticatedClientMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.project = Project.objects.create(title="Migration")
+
+    def test_upload_reserves_and_registers_part_numbers(self):
+        first = get_next_part_number()
+        imported = first + 100
+        parts = [
+            {"partPrefix": "PRT", "partNumber": imported, "displayName": "Imported"},
+            {"partPrefix": "PRT", "displayName": "New 1"},
+            {"partPrefix": "PRT", "displayName": "New 2"},
+        ]
+        response = self.client.post(
+            "/api/v1/migrate/parts/",
+            {"projectId": self.project.id, "parts": {"parts": parts}},
+            format="json",
+            secure=True,
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            response.json()["created_parts"],
+            [f"PRT{imported}", f"PRT{imported + 1}", f"PRT{imported + 2}"],
+        )
+        self.assertEqual(get_next_part_number(), imported + 3)
+
+    def test_reserved_block_skips_imported_part_numbers(self):
+        first = get_next_part_number()
+        parts = [
+            {"partPrefix": "PRT", "partNumber": first + 1, "displayName": "Imported"},
+            {"partPrefix": "PRT", "displayName": "New 1"},
+            {"partPrefix": "PRT", "displayName": "New 2"},
+        ]
+        response = self.client.post(
+            "/api/v1/migrate/parts/",
+            {"projectId": self.project.id, "parts": {"parts": parts}},
+            format="json",
+            secure=True,
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            response.json()["created_parts"],
+            [f"PRT{first + 1}", f"PRT{first + 2}", f"PRT{first + 3}"],
+        )
+        self.assertEqual(response.json()["errors"], [])
+
+    def test_part_numbers_in_use_are_reported(self):
+        first = get_next_part_number()
+        parts = [{"partPrefix": "PRT", "partNumber": first, "displayName": "Imported"}]
+        response = self.client.post(
+            "/api/v1/migrate/parts/",
+            {"projectId": self.project.id, "parts": {"parts": parts}},
+            format="json",
+            secure=True,
+        )
+        self.assertEqual(response.json()["errors"], [f"Part number {first} was already in use"])
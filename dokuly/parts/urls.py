@@ -96,6 +96,7 @@ urlpatterns = [
     path("api/global_part_search/", views.global_part_search),
     # Search parts by MPN
     path("api/parts/search_by_mpn/", views.search_parts_by_mpn),
+    path("api/parts/autocomplete/", views.autocomplete_part_numbers),
     # Nexar integration
     path("api/parts/nexar/search/", viewsNexar.search_nexar_parts),
     path("api/parts/nexar/clear_cache/", viewsNexar.clear_nexar_cache),
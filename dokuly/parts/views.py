@@ -20,11 +20,11 @@ from .serializers import (
     GlobalSearchPcbaSerializer,
     PartSerializer,
     PartSerializerNoAlternate,
-    PartTableSerializer,
     PartTypeSerializer,
     SimplePcbaSerializer,
     SimplePartSerializer,
     SimpleAsmSerializer,
+    organization_revision_settings,
 )
 from assemblies.models import Assembly
 from documents.models import MarkdownText, Reference_List, Document
@@ -49,6 +49,17 @@ from profiles.views import check_user_auth_and_app_permission
 from projects.models import Project
 from organizations.odoo_service import auto_push_on_release_async
 from organizations.permissions import APIAndProjectAccess
+from organizations.fieldsets import (
+    FIELDSET_PARAMETERS,
+    InvalidFieldset,
+    defer_unselected,
+    get_fieldset,
+    wants_field,
+)
+from organizations.latest_revisions import update_latest_revisions
+from organizations.pagination import CURSOR_PAGINATION_PARAMETERS, paginated_response
+from organizations.renumbering import regenerate_numbers
+from organizations.renderers import FastJSONRenderer
 from rest_framework.permissions import IsAuthenticated
 from django.contrib.auth.models import User
 from projects.viewsIssues import link_issues_on_new_object_revision
@@ -68,6 +79,13 @@ from parts.viewUtilities import (
     resolve_part_type_for_module,
 )
 from organizations.revision_utils import build_full_part_number, build_formatted_revision, increment_revision_counters
+from parts.autocomplete import APPS as AUTOCOMPLETE_APPS, AUTOCOMPLETE_LIMIT, MAX_AUTOCOMPLETE_LIMIT, autocomplete
+from parts.search import merge_ranked, ranked_search
+from parts.table_rows import PART_TABLE_VALUES, part_table_rows
+from parts.release_items import InvalidCursor, count_release_items, get_release_items_page
+
+# Maximum number of results of global_part_search
+SEARCH_LIMIT = 50
 
 
 @api_view(("PUT",))
@@ -137,136 +155,46 @@ def search_release_items(request):
     
     Query parameters:
     - search: Search term (string)
-    - page: Page number (default 1)
-    - page_size: Items per page (default 50)
+    - cursor: next_cursor of the previous page, pages forward without skipping rows
+    - page: Page number (default 1), used when no cursor is given
+    - page_size: Items per page (default 50, at most 500)
     - only_latest_revisions: If true, only search latest revisions (default false)
+
+    The total is estimated from the query plan when there are more than 10 000 matches,
+    which is flagged by total_is_estimate.
     """
     permission, response = check_user_auth_and_app_permission(request, "parts")
     if not permission:
         return response
 
     search = request.GET.get("search", "").strip()
-    page = int(request.GET.get("page", 1))
-    page_size = int(request.GET.get("page_size", 50))
+    try:
+        page = max(int(request.GET.get("page", 1)), 1)
+        page_size = min(max(int(request.GET.get("page_size", 50)), 1), 500)
+    except ValueError:
+        return Response("Invalid page or page_size", status=status.HTTP_400_BAD_REQUEST)
+    cursor = request.GET.get("cursor") or None
     only_latest_revisions = request.GET.get("only_latest_revisions", "false").lower() == "true"
 
-    results = []
-
-    # Parts
-    parts_qs = Part.objects.all()
-    if only_latest_revisions:
-        parts_qs = parts_qs.filter(is_latest_revision=True)
-    parts_qs = parts_qs.exclude(is_archived=True)
-    if search:
-        parts_qs = parts_qs.filter(
-            Q(full_part_number__icontains=search) | Q(display_name__icontains=search)
-        )
-    for p in parts_qs.values(
-        'id', 'full_part_number', 'display_name', 'release_state', 'thumbnail'
-    ):
-        results.append({
-            'id': p['id'],
-            'full_part_number': p['full_part_number'] or '',
-            'display_name': p['display_name'] or '',
-            'release_state': p['release_state'] or '',
-            'thumbnail': p['thumbnail'],
-            'app': 'parts',
-        })
-
-    # PCBAs
-    pcbas_qs = Pcba.objects.all()
-    if only_latest_revisions:
-        pcbas_qs = pcbas_qs.filter(is_latest_revision=True)
-    pcbas_qs = pcbas_qs.exclude(is_archived=True)
-    if search:
-        pcbas_qs = pcbas_qs.filter(
-            Q(full_part_number__icontains=search) | Q(display_name__icontains=search)
-        )
-    for p in pcbas_qs.values(
-        'id', 'full_part_number', 'display_name', 'release_state', 'thumbnail'
-    ):
-        results.append({
-            'id': p['id'],
-            'full_part_number': p['full_part_number'] or '',
-            'display_name': p['display_name'] or '',
-            'release_state': p['release_state'] or '',
-            'thumbnail': p['thumbnail'],
-            'app': 'pcbas',
-        })
-
-    # Assemblies
-    asms_qs = Assembly.objects.all()
-    if only_latest_revisions:
-        asms_qs = asms_qs.filter(is_latest_revision=True)
-    asms_qs = asms_qs.exclude(is_archived=True)
-    if search:
-        asms_qs = asms_qs.filter(
-            Q(full_part_number__icontains=search) | Q(display_name__icontains=search)
-        )
-    for a in asms_qs.values(
-        'id', 'full_part_number', 'display_name', 'release_state', 'thumbnail'
-    ):
-        results.append({
-            'id': a['id'],
-            'full_part_number': a['full_part_number'] or '',
-            'display_name': a['display_name'] or '',
-            'release_state': a['release_state'] or '',
-            'thumbnail': a['thumbnail'],
-            'app': 'assemblies',
-        })
-
-    # Documents
-    docs_qs = Document.objects.all()
-    if only_latest_revisions:
-        docs_qs = docs_qs.filter(is_latest_revision=True)
-    docs_qs = docs_qs.exclude(is_archived=True)
-    if search:
-        docs_qs = docs_qs.filter(
-            Q(full_doc_number__icontains=search) | Q(title__icontains=search)
-        )
-    for d in docs_qs.values(
-        'id', 'full_doc_number', 'title', 'release_state', 'thumbnail'
-    ):
-        results.append({
-            'id': d['id'],
-            'full_part_number': d['full_doc_number'] or '',
-            'display_name': d['title'] or '',
-            'release_state': d['release_state'] or '',
-            'thumbnail': d['thumbnail'],
-            'app': 'documents',
-        })
-
-    # ECOs
-    ecos_qs = Eco.objects.all()
-    if search:
-        ecos_qs = ecos_qs.filter(
-            Q(display_name__icontains=search)
+    try:
+        page_results, next_cursor = get_release_items_page(
+            search=search,
+            page_size=page_size,
+            cursor=cursor,
+            offset=(page - 1) * page_size,
+            only_latest_revisions=only_latest_revisions,
         )
-    for e in ecos_qs.values(
-        'id', 'display_name', 'release_state'
-    ):
-        results.append({
-            'id': e['id'],
-            'full_part_number': e['display_name'] or '',
-            'display_name': e['display_name'] or '',
-            'release_state': e['release_state'] or '',
-            'thumbnail': None,
-            'app': 'eco',
-        })
-
-    # Sort by part number
-    results.sort(key=lambda x: x['full_part_number'])
-
-    total = len(results)
-    start = (page - 1) * page_size
-    end = start + page_size
-    page_results = results[start:end]
+    except InvalidCursor as e:
+        return Response(str(e), status=status.HTTP_400_BAD_REQUEST)
+    total, total_is_estimate = count_release_items(search, only_latest_revisions)
 
     return Response({
         'results': page_results,
         'total': total,
+        'total_is_estimate': total_is_estimate,
         'page': page,
         'page_size': page_size,
+        'next_cursor': next_cursor,
     }, status=status.HTTP_200_OK)
 
 
@@ -275,6 +203,11 @@ def search_release_items(request):
 @permission_classes([IsAuthenticated | APIAndProjectAccess])
 def get_single_part(request, pk, **kwargs):
     user = request.user
+    try:
+        fieldset = get_fieldset(request, PartSerializer)
+    except InvalidFieldset as e:
+        return Response(str(e), status=status.HTTP_400_BAD_REQUEST)
+    context = {'request': request, 'fieldset': fieldset}
     try:
         alternative_parts_prefetch = Prefetch('alternative_parts_v2')
         markdown_notes_prefetch = Prefetch('markdown_notes')
@@ -287,11 +220,11 @@ def get_single_part(request, pk, **kwargs):
         if APIAndProjectAccess.has_validated_key(request):
             part = get_object_or_404(query, id=pk)
             if not part.internal:
-                serializer = PartSerializer(part, context={'request': request})
+                serializer = PartSerializer(part, context=context)
                 return Response(serializer.data, status=status.HTTP_200_OK)
             if not APIAndProjectAccess.check_project_access(request, part.project.pk):
                 return Response("Not authorized", status=status.HTTP_401_UNAUTHORIZED)
-            serializer = PartSerializer(part, context={'request': request})
+            serializer = PartSerializer(part, context=context)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         part = query.get(
@@ -310,7 +243,7 @@ def get_single_part(request, pk, **kwargs):
             part.markdown_notes = markdown_notes
             part.save()
 
-        serializer = PartSerializer(part, context={'request': request})
+        serializer = PartSerializer(part, context=context)
         return Response(serializer.data, status=status.HTTP_200_OK)
     except Part.DoesNotExist:
         return Response("Part not found", status=status.HTTP_404_NOT_FOUND)
@@ -353,6 +286,18 @@ def get_unarchived_parts(request):
         "price_history",
         "stock",
         "price",
+        "formatted_revision",
+        "revision_count_major",
+        "revision_count_minor",
+        "revision_notes",
+        "thumbnail",
+        "external_part_number",
+        "is_rohs_compliant",
+        "is_reach_compliant",
+        "country_of_origin",
+        "last_updated",
+    ).prefetch_related(
+        Prefetch('prices', queryset=Price.objects.filter(is_latest_price=True).select_related('supplier'))
     )
     serializer = PartSerializerNoAlternate(data, many=True)
     return Response(serializer.data, status=status.HTTP_200_OK)
@@ -394,6 +339,10 @@ def get_part_types(request, **kwargs):
 def get_latest_revisions(request, **kwargs):
     """Fetch the latest revision of all parts."""
     user = request.user
+    try:
+        fieldset = get_fieldset(request, PartSerializerNoAlternate)
+    except InvalidFieldset as e:
+        return Response(str(e), status=status.HTTP_400_BAD_REQUEST)
     part_query = Part.objects.all().exclude(is_archived=True).exclude(is_latest_revision=False).only(
         "id",
         "part_number",
@@ -421,9 +370,16 @@ def get_latest_revisions(request, **kwargs):
         "part_information",
         "price_history",
         "stock",
-    ).prefetch_related(
-        Prefetch('prices', queryset=Price.objects.filter(is_latest_price=True).select_related('supplier'))
+        "is_rohs_compliant",
+        "is_reach_compliant",
+        "country_of_origin",
+        "last_updated",
     )
+    if wants_field(fieldset, "price", "currency"):
+        part_query = part_query.prefetch_related(
+            Prefetch('prices', queryset=Price.objects.filter(is_latest_price=True).select_related('supplier'))
+        )
+    part_query = defer_unselected(part_query, PartSerializerNoAlternate, fieldset)
     if APIAndProjectAccess.has_validated_key(request):
         if not APIAndProjectAccess.check_wildcard_access(request):
             part_query = part_query.filter(
@@ -434,7 +390,19 @@ def get_latest_revisions(request, **kwargs):
         part_query = part_query.filter(
             Q(project__project_members=user) | Q(project__isnull=True))
 
-    serializer = PartSerializerNoAlternate(part_query, many=True)
+    # Organization settings are the same for every part, look them up once
+    context = {
+        "request": request,
+        "fieldset": fieldset,
+        "organization": organization_revision_settings(user) if wants_field(fieldset, "organization") else None,
+    }
+    page = paginated_response(
+        request, part_query, lambda parts: PartSerializerNoAlternate(parts, many=True, context=context).data
+    )
+    if page is not None:
+        return page
+
+    serializer = PartSerializerNoAlternate(part_query, many=True, context=context)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -447,8 +415,16 @@ def get_latest_revisions(request, **kwargs):
     Returns all parts including historical revisions, not just the latest revision.
     Archived parts are excluded from the results.
     Includes external_part_number field.
+
+    Returns every part at once by default. Pass `cursor` and/or `limit` to get pages of
+    `{"results": [...], "next_cursor": ...}` ordered by id instead, and request the next page
+    with `cursor=<next_cursor>` until it is null.
+
+    Pass `fields` and/or `exclude` with comma separated field names to return only some of the
+    fields, e.g. `fields=id,full_part_number,mpn,release_state`.
     """,
     tags=['parts'],
+    manual_parameters=CURSOR_PAGINATION_PARAMETERS + FIELDSET_PARAMETERS,
     responses={
         200: openapi.Response(description='List of all parts (all revisions) retrieved successfully', schema=PartSerializerNoAlternate(many=True)),
         401: openapi.Response(description='Unauthorized'),
@@ -461,6 +437,10 @@ def get_latest_revisions(request, **kwargs):
 def get_all_revisions(request, **kwargs):
     """Fetch all revisions of all parts (excluding archived)."""
     user = request.user
+    try:
+        fieldset = get_fieldset(request, PartSerializerNoAlternate)
+    except InvalidFieldset as e:
+        return Response(str(e), status=status.HTTP_400_BAD_REQUEST)
     # Get all parts excluding archived, but include all revisions (not just latest)
     part_query = Part.objects.all().exclude(is_archived=True).only(
         "id",
@@ -482,9 +462,23 @@ def get_all_revisions(request, **kwargs):
         "external_part_number",
         "formatted_revision",
         "revision_notes",
-    ).prefetch_related(
-        Prefetch('prices', queryset=Price.objects.filter(is_latest_price=True).select_related('supplier'))
+        "revision_count_major",
+        "revision_count_minor",
+        "image_url",
+        "thumbnail",
+        "part_information",
+        "price_history",
+        "stock",
+        "is_rohs_compliant",
+        "is_reach_compliant",
+        "country_of_origin",
+        "last_updated",
     )
+    if wants_field(fieldset, "price", "currency"):
+        part_query = part_query.prefetch_related(
+            Prefetch('prices', queryset=Price.objects.filter(is_latest_price=True).select_related('supplier'))
+        )
+    part_query = defer_unselected(part_query, PartSerializerNoAlternate, fieldset)
     if APIAndProjectAccess.has_validated_key(request):
         if not APIAndProjectAccess.check_wildcard_access(request):
             part_query = part_query.filter(
@@ -495,7 +489,19 @@ def get_all_revisions(request, **kwargs):
         part_query = part_query.filter(
             Q(project__project_members=user) | Q(project__isnull=True))
 
-    serializer = PartSerializerNoAlternate(part_query, many=True)
+    # Organization settings are the same for every part, look them up once
+    context = {
+        "request": request,
+        "fieldset": fieldset,
+        "organization": organization_revision_settings(user) if wants_field(fieldset, "organization") else None,
+    }
+    page = paginated_response(
+        request, part_query, lambda parts: PartSerializerNoAlternate(parts, many=True, context=context).data
+    )
+    if page is not None:
+        return page
+
+    serializer = PartSerializerNoAlternate(part_query, many=True, context=context)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -524,40 +530,20 @@ def get_on_order_for_part(request, part_id):
 
 
 @api_view(("GET",))
-@renderer_classes((JSONRenderer,))
+@renderer_classes((FastJSONRenderer,))
 @login_required(login_url="/login")
 def get_parts_table(request):
     user = request.user
     if request.user is None:
         return Response("Unauthorized", status=status.HTTP_401_UNAUTHORIZED)
 
+    # Rows are built from .values(), the table has too many rows for PartTableSerializer
     parts = (
         Part.objects.filter(Q(project__project_members=user)
                             | Q(project__isnull=True))
         .exclude(is_archived=True)
         .exclude(is_latest_revision=False)
-        .only(
-            "id",
-            "part_number",
-            "full_part_number",
-            "mpn",
-            "image_url",
-            "thumbnail",
-            "display_name",
-            "part_type",
-            "release_state",
-            "released_date",
-            "project",
-            "last_updated",
-            "revision",
-            "is_latest_revision",
-            "is_archived",
-            "manufacturer",
-            "current_total_stock",
-            "external_part_number",
-            "tags"
-        )
-        .prefetch_related("tags")
+        .values(*PART_TABLE_VALUES)
     )
 
     # Get starred parts for the current user
@@ -565,11 +551,13 @@ def get_parts_table(request):
         StarredPart.objects.filter(user=user).values_list('part_id', flat=True)
     )
 
-    serializer = PartTableSerializer(parts, many=True, context={
-        'request': request,
-        'starred_part_ids': starred_part_ids
-    })
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    page = paginated_response(
+        request, parts, lambda rows: part_table_rows(rows, starred_part_ids)
+    )
+    if page is not None:
+        return page
+
+    return Response(part_table_rows(parts, starred_part_ids), status=status.HTTP_200_OK)
 
 
 @api_view(("POST", "PUT"))
@@ -646,6 +634,8 @@ def alt_parts_for_part(request, partIds):
             ids.append(partId)
     data = Part.objects.filter(
         Q(project__project_members=user) | Q(project__isnull=True), id__in=ids
+    ).prefetch_related(
+        Prefetch('prices', queryset=Price.objects.filter(is_latest_price=True).select_related('supplier'))
     )
     serializer = PartSerializerNoAlternate(data, many=True)
     return Response(serializer.data, status=status.HTTP_200_OK)
@@ -1821,7 +1811,9 @@ def get_revision_list(request, id):
     try:
         part = Part.objects.get(pk=id)
         pn = part.part_number
-        parts = Part.objects.filter(part_number=pn).exclude(is_archived=True)
+        parts = Part.objects.filter(part_number=pn).exclude(is_archived=True).prefetch_related(
+            Prefetch('prices', queryset=Price.objects.filter(is_latest_price=True).select_related('supplier'))
+        )
         serializer = PartSerializerNoAlternate(parts, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
     except Part.DoesNotExist:
@@ -1926,29 +1918,13 @@ def get_revisions(request, part_number):
         return response
 
     items = Part.objects.filter(
-        Q(part_number=part_number) & ~Q(is_archived=True))
+        Q(part_number=part_number) & ~Q(is_archived=True)).prefetch_related(
+        Prefetch('prices', queryset=Price.objects.filter(is_latest_price=True).select_related('supplier'))
+    )
     serializer = PartSerializerNoAlternate(items, many=True)
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-def is_latest_revision(part_number, revision_count_major, revision_count_minor):
-    """Check if the current item is the latest revision."""
-    items = Part.objects.filter(
-        part_number=part_number).exclude(is_archived=True)
-
-    if len(items) == 1:
-        return True
-
-    for item in items:
-        # If any item has a higher major revision, this is not the latest
-        if item.revision_count_major > revision_count_major:
-            return False
-        # If any item has the same major but higher minor, this is not the latest
-        if item.revision_count_major == revision_count_major and item.revision_count_minor > revision_count_minor:
-            return False
-    return True
-
-
 @api_view(["PUT"])
 @renderer_classes([JSONRenderer])
 def global_part_search(request):
@@ -1985,86 +1961,52 @@ def global_part_search(request):
         # Optional filter for latest revision only
         latest_filter = Q(is_latest_revision=True) if latest_only else Q()
 
-        combined_results = []
+        # Every table is ranked and limited in the database, the best of them are merged here
+        ranked_results = []
+
+        def search(queryset, serializer_class, substring_fields):
+            items = list(ranked_search(queryset, query, substring_fields, SEARCH_LIMIT))
+            data = serializer_class(items, many=True).data
+            ranked_results.extend((item.search_rank, item_data) for item, item_data in zip(items, data))
 
         # Query Parts
         if "parts" in include_tables:
-            part_results = Part.objects.filter(
-                project_filter
-                & latest_filter
-                & Q(is_archived=False)
-                & (
-                    Q(full_part_number__icontains=query)
-                    | Q(display_name__icontains=query)
-                    | Q(description__icontains=query)
-                    | Q(manufacturer__icontains=query)
-                    | Q(mpn__icontains=query)
-                    | Q(external_part_number__icontains=query)
-                )
+            search(
+                Part.objects.filter(project_filter & latest_filter & Q(is_archived=False)),
+                GlobalSearchPartSerializer,
+                ["full_part_number", "display_name", "mpn"],
             )
-            part_serializer = GlobalSearchPartSerializer(part_results, many=True)
-            combined_results += part_serializer.data
 
         # Query PCBAs
         if "pcbas" in include_tables:
-            pcba_results = Pcba.objects.filter(
-                project_filter
-                & latest_filter
-                & Q(is_archived=False)
-                & (
-                    Q(full_part_number__icontains=query)
-                    | Q(display_name__icontains=query)
-                    | Q(description__icontains=query)
-                    | Q(external_part_number__icontains=query)
-                )
+            search(
+                Pcba.objects.filter(project_filter & latest_filter & Q(is_archived=False)),
+                GlobalSearchPcbaSerializer,
+                ["full_part_number", "display_name"],
             )
-            pcba_serializer = GlobalSearchPcbaSerializer(pcba_results, many=True)
-            combined_results += pcba_serializer.data
 
         # Query Assemblies
         if "assemblies" in include_tables:
-            assembly_results = Assembly.objects.filter(
-                project_filter
-                & latest_filter
-                & Q(is_archived=False)
-                & (
-                    Q(full_part_number__icontains=query)
-                    | Q(display_name__icontains=query)
-                    | Q(description__icontains=query)
-                    | Q(external_part_number__icontains=query)
-                )
+            search(
+                Assembly.objects.filter(project_filter & latest_filter & Q(is_archived=False)),
+                GlobalSearchAssemblySerializer,
+                ["full_part_number", "display_name"],
             )
-            assembly_serializer = GlobalSearchAssemblySerializer(assembly_results, many=True)
-            combined_results += assembly_serializer.data
 
         # Query Documents (only if explicitly requested)
         if "documents" in include_tables:
-            document_results = Document.objects.filter(
-                project_filter
-                & latest_filter
-                & Q(is_archived=False)
-                & (
-                    Q(full_doc_number__icontains=query)
-                    | Q(title__icontains=query)
-                    | Q(description__icontains=query)
-                )
+            search(
+                Document.objects.filter(project_filter & latest_filter & Q(is_archived=False)),
+                GlobalSearchDocumentSerializer,
+                ["full_doc_number", "title"],
             )
-            document_serializer = GlobalSearchDocumentSerializer(document_results, many=True)
-            combined_results += document_serializer.data
 
         # Query ECOs
         if "ecos" in include_tables:
-            eco_results = Eco.objects.filter(
-                project_filter
-                & (
-                    Q(display_name__icontains=query)
-                )
-            )
-            eco_serializer = GlobalSearchEcoSerializer(eco_results, many=True)
-            combined_results += eco_serializer.data
+            search(Eco.objects.filter(project_filter), GlobalSearchEcoSerializer, ["display_name"])
 
         # Limit the results to at most 50 items
-        limited_results = combined_results[:50]
+        limited_results = merge_ranked(ranked_results, SEARCH_LIMIT)
 
         # Return the limited results
         return Response(limited_results, status=status.HTTP_200_OK)
@@ -2074,13 +2016,8 @@ def global_part_search(request):
 
 
 def batch_process_is_latest_revision_by_part_number(part_number):
-    """This view runs through Parts and corrects the is_latest_revision field"""
-    items = Part.objects.filter(
-        part_number=part_number).exclude(is_archived=True)
-    for item in items:
-        item.is_latest_revision = is_latest_revision(
-            item.part_number, item.revision_count_major, item.revision_count_minor)
-        item.save()
+    """Correct the is_latest_revision field of all Parts with a part number."""
+    update_latest_revisions("parts", part_number=part_number)
 
 
 @api_view(("GET",))
@@ -2091,13 +2028,8 @@ def batch_process_is_latest_revision_of_all_parts(request):
     if not permission:
         return response
 
-    items = Part.objects.exclude(is_archived=True)
-    for item in items:
-        item.is_latest_revision = is_latest_revision(
-            item.part_number, item.revision)
-        item.save()
-
-    return Response(status=status.HTTP_200_OK)
+    changed = update_latest_revisions("parts")
+    return Response({"changed": changed}, status=status.HTTP_200_OK)
 
 
 @api_view(("GET",))
@@ -2108,12 +2040,8 @@ def batch_process_full_part_number_on_all_parts(request):
     if not permission:
         return response
 
-    items = Part.objects.exclude(is_archived=True)
-    for item in items:
-        item.full_part_number = f"PRT{item.part_number}"
-        item.save()
-
-    return Response(status=status.HTTP_200_OK)
+    changed = regenerate_numbers(request.user.profile.organization_id, ["parts"])
+    return Response({"changed": changed["parts"]}, status=status.HTTP_200_OK)
 
 
 @api_view(("PUT",))
@@ -2136,6 +2064,41 @@ def update_thumbnail(request, partId, imageId):
         return Response("Object not found", status=status.HTTP_404_NOT_FOUND)
 
 
+@api_view(("GET",))
+@renderer_classes((JSONRenderer,))
+@permission_classes([IsAuthenticated])
+def autocomplete_part_numbers(request):
+    """Autocomplete of part numbers and MPNs for the "add item" dialogs, called on every keystroke.
+
+    Query parameters:
+    - q: Start of a part number, MPN or external part number, case-insensitive
+    - tables: Comma separated apps to complete from, default parts,pcbas,assemblies
+    - limit: Number of items (default 10, at most 50)
+    - latest_only: If true, only complete latest revisions (default false)
+    """
+    permission, response = check_user_auth_and_app_permission(request, "parts")
+    if not permission:
+        return response
+
+    prefix = request.GET.get("q", "")
+    tables = [table for table in request.GET.get("tables", ",".join(AUTOCOMPLETE_APPS)).split(",") if table]
+    if not set(tables).issubset(AUTOCOMPLETE_APPS):
+        return Response(f"tables must be in {', '.join(AUTOCOMPLETE_APPS)}", status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = min(max(int(request.GET.get("limit", AUTOCOMPLETE_LIMIT)), 1), MAX_AUTOCOMPLETE_LIMIT)
+    except ValueError:
+        return Response("Invalid limit", status=status.HTTP_400_BAD_REQUEST)
+
+    filters = Q(project__project_members=request.user) | Q(project__isnull=True)
+    filters &= ~Q(is_archived=True)
+    if request.GET.get("latest_only", "false").lower() == "true":
+        filters &= Q(is_latest_revision=True)
+    item_models = {"parts": Part, "pcbas": Pcba, "assemblies": Assembly}
+    querysets = {table: item_models[table].objects.filter(filters) for table in tables}
+
+    return Response(autocomplete(querysets, prefix, limit), status=status.HTTP_200_OK)
+
+
 @api_view(["PUT"])
 @renderer_classes([JSONRenderer])
 def search_parts_by_mpn(request):
@@ -32,9 +32,8 @@ from projects.models import Project
 from organizations.views import get_subscription_type
 from files.models import Image
 from parts.models import Part, PartType
-from part_numbers.models import PartNumber
 from pcbas.models import Pcba
-from part_numbers.methods import get_next_part_number
+from part_numbers.methods import register_part_numbers, reserve_part_numbers
 
 from purchasing.models import PurchaseOrder
 from purchasing.suppliermodel import Supplier
@@ -139,15 +138,33 @@ def bulk_upload_parts_auto_create_part_files(request, **kwargs):
                     print(f"Error creating part type: {str(e)}")
                     errors.append(f"Error creating part type for prefix {prefix}: {str(e)}")
 
+            # Record the part numbers given by the upload and move the sequence past them, before
+            # reserving the block for the other parts, so the block cannot overlap them
+            given_part_numbers = []
+            for part_data in parts_data.get("parts", []):
+                if not part_data.get('partNumber'):
+                    continue
+                try:
+                    given_part_numbers.append(int(part_data['partNumber']))
+                except (TypeError, ValueError):
+                    errors.append(f"Invalid part number {part_data['partNumber']}")
+            for part_number in register_part_numbers(given_part_numbers):
+                errors.append(f"Part number {part_number} was already in use")
+
+            # Parts without a part number get one from a block reserved for the whole upload
+            missing_part_numbers = sum(1 for part_data in parts_data.get("parts", []) if not part_data.get('partNumber'))
+            reserved_part_numbers = iter(reserve_part_numbers(missing_part_numbers))
+
             # Prepare parts for bulk creation
             parts_to_create = []
             for part_data in parts_data.get("parts", []):
                 try:
                     part_type = part_types[part_data.get('partPrefix', '')]
-                    full_part_number = f"{part_type.prefix}{part_data.get('partNumber', 1)}"
+                    part_number = part_data.get('partNumber') or next(reserved_part_numbers)
+                    full_part_number = f"{part_type.prefix}{part_number}"
                     parts_to_create.append(
                         Part(
-                            part_number=part_data.get('partNumber', ''),
+                            part_number=part_number,
                             full_part_number=full_part_number,
                             display_name=part_data.get('displayName', ''),
                             description=part_data.get('name', ''),
@@ -170,18 +187,6 @@ def bulk_upload_parts_auto_create_part_files(request, **kwargs):
             # Bulk create parts
             created_parts = Part.objects.bulk_create(parts_to_create)
 
-            # Create PartNumber objects with IDs matching the part numbers
-            part_numbers_to_create = []
-            for part in created_parts:
-                try:
-                    part_numbers_to_create.append(PartNumber(id=int(part.part_number)))
-                except Exception as e:
-                    errors.append(f"Invalid part number for part {part.part_number}")
-                    pass
-
-            # Bulk create PartNumbers, ignoring conflicts in case some already exist
-            PartNumber.objects.bulk_create(part_numbers_to_create, ignore_conflicts=True)
-
             # Prepare files for bulk creation
             files_to_create = []
             part_file_relations = []
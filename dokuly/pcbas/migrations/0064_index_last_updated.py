@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 09:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pcbas', '0063_search_vector'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pcba',
+            name='last_updated',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
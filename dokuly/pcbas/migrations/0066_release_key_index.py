@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-18 11:19
+
+from django.db import migrations, models
+import django.db.models.functions.comparison
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pcbas', '0065_autocomplete_prefix_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pcba',
+            index=models.Index(django.db.models.functions.comparison.Collate(django.db.models.functions.comparison.Coalesce('full_part_number', models.Value('')), 'C'), models.F('id'), condition=models.Q(('is_archived', True), _negated=True), name='pcbas_pcba_release_key'),
+        ),
+    ]
@@ -1,8 +1,11 @@
 from django.db import models
 from django.contrib.auth.models import User
 from profiles.models import Profile
-from parts.models import Part, PartType
+from parts.models import Part, PartType, SearchVectorDeferredManager
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db.models.functions import Coalesce, Collate, Upper
 
 from projects.models import Project, Tag
 from files.models import File
@@ -89,7 +92,7 @@ class Pcba(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
-    last_updated = models.DateTimeField(auto_now=True)
+    last_updated = models.DateTimeField(auto_now=True, db_index=True)
 
     # Price fields.
     price = models.CharField(max_length=10, blank=True, null=True)
@@ -170,6 +173,25 @@ class Pcba(models.Model):
         models.CharField(null=True, max_length=20), blank=True, null=True
     )
 
+    # Full-text search document, maintained by a database trigger on every insert and update.
+    # See parts.search.
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+
+    objects = SearchVectorDeferredManager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="pcbas_pcba_search_gin"),
+            # Case-insensitive prefix search of parts.autocomplete
+            models.Index(Collate(Upper("full_part_number"), "C"), name="pcbas_pcba_fpn_prefix"),
+            models.Index(Collate(Upper("external_part_number"), "C"), name="pcbas_pcba_epn_prefix"),
+            # Keyset pages of parts.release_items, sorted on the number in the "C" collation
+            models.Index(
+                Collate(Coalesce("full_part_number", models.Value("")), "C"), "id",
+                name="pcbas_pcba_release_key", condition=~models.Q(is_archived=True),
+            ),
+        ]
+
 
 class StarredPcba(models.Model):
     """Model for tracking starred PCBAs.
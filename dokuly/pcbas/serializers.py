@@ -5,6 +5,7 @@ from projects.serializers import ProjectTitleSerializer, TagSerializer
 from documents.serializers import MarkdownTextSerializer
 from customers.models import Customer
 from parts.serializers import PartTypeIconSerializer
+from organizations.fieldsets import SparseFieldsetMixin
 
 # Default serializer for fetching the main pcba info.
 
@@ -25,6 +26,7 @@ class PcbaSerializer(serializers.ModelSerializer):
             "schematic_pdf_monochrome",
             "document_file",
             "generic_files",
+            "search_vector",
         ]
 
 
@@ -42,7 +44,7 @@ class ProjectTitleSerializer(serializers.ModelSerializer):
         fields = ("id", "title", "customer")
 
 
-class PcbaTableSerializer(serializers.ModelSerializer):
+class PcbaTableSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     project = ProjectTitleSerializer()
     tags = TagSerializer(many=True)
     part_type = PartTypeIconSerializer()
@@ -69,6 +71,7 @@ class PcbaTableSerializer(serializers.ModelSerializer):
             "external_part_number",
             "is_starred",
         )
+        method_field_sources = {"is_starred": []}
 
     def get_is_starred(self, obj):
         """Check if the PCBA is starred for the current user."""
@@ -76,7 +79,7 @@ class PcbaTableSerializer(serializers.ModelSerializer):
         return obj.id in starred_pcba_ids
 
 
-class PcbaSerializerFull(serializers.ModelSerializer):
+class PcbaSerializerFull(SparseFieldsetMixin, serializers.ModelSerializer):
     """Serializer with every field in the model."""
 
     markdown_notes = MarkdownTextSerializer()
@@ -104,7 +107,7 @@ class PcbaSerializerFull(serializers.ModelSerializer):
 
     class Meta:
         model = Pcba
-        fields = "__all__"
+        exclude = ["search_vector"]
 
 
 class PcbaSerializerWithProject(serializers.ModelSerializer):
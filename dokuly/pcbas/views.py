@@ -29,6 +29,9 @@ from profiles.views import check_user_auth_and_app_permission
 from rest_framework.permissions import IsAuthenticated
 from organizations.odoo_service import auto_push_on_release_async
 from organizations.permissions import APIAndProjectAccess
+from organizations.fieldsets import InvalidFieldset, defer_unselected, get_fieldset
+from organizations.latest_revisions import update_latest_revisions
+from organizations.pagination import paginated_response
 from django.contrib.auth.models import User
 from projects.viewsIssues import link_issues_on_new_object_revision
 from profiles.utilityFunctions import (
@@ -42,42 +45,16 @@ from projects.viewsTags import check_for_and_create_new_tags
 from parts.viewUtilities import copy_markdown_tabs_to_new_revision, resolve_part_type_for_module
 
 
-def is_latest_revision(part_number, revision_count_major, revision_count_minor):
-    """
-    Check if the current item is the latest revision.
-
-    Args:
-        part_number: The part number to check
-        revision_count_major: Major revision count of the current item
-        revision_count_minor: Minor revision count of the current item
-
-    Returns:
-        True if this is the latest revision, False otherwise
-    """
-    items = Pcba.objects.filter(
-        part_number=part_number).exclude(is_archived=True)
-
-    if len(items) == 1:
-        return True
-
-    # Check if any other item has a higher revision
-    for item in items:
-        # If another item has a higher major revision, current is not latest
-        if item.revision_count_major > revision_count_major:
-            return False
-        # If same major but higher minor, current is not latest
-        if item.revision_count_major == revision_count_major and item.revision_count_minor > revision_count_minor:
-            return False
-
-    return True
-
-
 @api_view(("GET",))
 @renderer_classes((JSONRenderer,))
 @permission_classes([IsAuthenticated | APIAndProjectAccess])
 def fetch_single_pcba(request, pk, **kwargs):
     """Fetch a single PCBA. Archived PCBAs are excluded."""
     user = request.user
+    try:
+        fieldset = get_fieldset(request, PcbaSerializerFull)
+    except InvalidFieldset as e:
+        return Response(str(e), status=status.HTTP_400_BAD_REQUEST)
     # Not an API request, project filter is done by APIAndProjectAccess in decorator.
     if not APIAndProjectAccess.has_validated_key(request):
         pcba_queryset = (
@@ -107,10 +84,14 @@ def fetch_single_pcba(request, pk, **kwargs):
         pcba.markdown_notes = markdown_notes
         pcba.save()
 
-    serializer = PcbaSerializerFull(pcba, many=False, context={'request': request})
+    serializer = PcbaSerializerFull(pcba, many=False, context={'request': request, 'fieldset': fieldset})
 
     data = serializer.data
 
+    # Extra fields are only added to full responses
+    if fieldset is not None:
+        return Response(data)
+
     data["latest_revision"] = pcba.is_latest_revision
 
     if data["project"] != None:
@@ -225,6 +206,10 @@ def archive_pcba(request, pk, **kwargs):
 def get_latest_revisions(request, **kwargs):
     """Get the latest revision of all unarchived PCBAs."""
     user = request.user
+    try:
+        fieldset = get_fieldset(request, PcbaTableSerializer)
+    except InvalidFieldset as e:
+        return Response(str(e), status=status.HTTP_400_BAD_REQUEST)
     pcba = (
         Pcba.objects.filter(is_archived=False)
         .exclude(is_latest_revision=False)
@@ -249,6 +234,7 @@ def get_latest_revisions(request, **kwargs):
         )
         .prefetch_related("tags")
     )
+    pcba = defer_unselected(pcba, PcbaTableSerializer, fieldset)
 
     if APIAndProjectAccess.has_validated_key(request):
         if not APIAndProjectAccess.check_wildcard_access(request):
@@ -265,10 +251,18 @@ def get_latest_revisions(request, **kwargs):
             .values_list("pcba_id", flat=True)
         )
 
-    serializer = PcbaTableSerializer(pcba, many=True, context={
+    context = {
         'request': request,
-        'starred_pcba_ids': starred_pcba_ids
-    })
+        'starred_pcba_ids': starred_pcba_ids,
+        'fieldset': fieldset,
+    }
+    page = paginated_response(
+        request, pcba, lambda items: PcbaTableSerializer(items, many=True, context=context).data
+    )
+    if page is not None:
+        return page
+
+    serializer = PcbaTableSerializer(pcba, many=True, context=context)
     data = serializer.data
     return Response(data)
 
@@ -999,10 +993,5 @@ def get_revisions(request, id):
 
 
 def batch_process_is_latest_revision_by_part_number(part_number):
-    """This view runs through Pcbas and corrects the is_latest_revision field"""
-    items = Pcba.objects.filter(
-        part_number=part_number).exclude(is_archived=True)
-    for item in items:
-        item.is_latest_revision = is_latest_revision(
-            item.part_number, item.revision_count_major, item.revision_count_minor)
-        item.save()
+    """Correct the is_latest_revision field of all PCBAs with a part number."""
+    update_latest_revisions("pcbas", part_number=part_number)
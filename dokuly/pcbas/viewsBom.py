@@ -9,14 +9,14 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from organizations.permissions import APIAndProjectAccess
 from .serializers import PcbaSerializer
-from parts.models import Part
 from pcbas.models import Pcba
-from assembly_bom.models import Assembly_bom, Bom_item
+from assembly_bom.models import Assembly_bom
+from assembly_bom.bom_import import import_bom_rows, iter_csv_rows
+from assembly_bom.bom_explosion import item_key, schedule_bom_explosion_refresh
 from profiles.views import check_user_auth_and_app_permission
-import csv
+import itertools
 from django.db import transaction
 from assembly_bom.serializers import BomItemSerializer
-from assemblies.models import Assembly
 
 
 #TODO is this deprecated?
@@ -31,16 +31,10 @@ def upload_pcba_bom(request, pcba_id, **kwargs):
 
         file = request.FILES['file']
 
-        # Decode the file to read as text
-        decoded_file = file.read().decode('utf-8').splitlines()
-        reader = csv.DictReader(decoded_file)
-
-        # Collect all rows from the CSV
-        csv_rows = []
-        for row in reader:
-            csv_rows.append(row)
-
-        if not csv_rows:
+        # Rows are read from the file as they are imported, encoding and delimiter are detected
+        rows = iter_csv_rows(file)
+        first_row = next(rows, None)
+        if first_row is None:
             return Response("CSV file is empty.", status=status.HTTP_400_BAD_REQUEST)
 
         # Start a database transaction
@@ -55,87 +49,10 @@ def upload_pcba_bom(request, pcba_id, **kwargs):
 
             bom, created = Assembly_bom.objects.get_or_create(pcba=pcba)
 
-            # Prepare data for bulk operations
-            bom_items_to_create = []
-            full_part_numbers = set()
-            temporary_mpns = set()
-
-            for row in csv_rows:
-                # Extract necessary fields (adjust field names as per your CSV columns)
-                designator = row.get('Reference', '').strip()
-                temporary_mpn = row.get('MPN', '').strip() or None
-                quantity_str = row.get('QUANTITY', '1').strip()
-                try:
-                    quantity = float(quantity_str) if quantity_str else 1.0
-                except (ValueError, TypeError):
-                    quantity = 1.0
-                dnp = row.get('DNP', '').strip()
-                is_mounted = not bool(dnp)  # If DNP field is empty, is_mounted is True
-
-                # Collect full_part_numbers for matching
-                if temporary_mpn:
-                    full_part_numbers.add(temporary_mpn.strip())
-                    temporary_mpns.add(temporary_mpn)
-
-                # Prepare Bom_item instance (not saved yet)
-                bom_item = Bom_item(
-                    bom=bom,
-                    designator=designator,
-                    quantity=quantity,
-                    temporary_mpn=temporary_mpn,
-                    is_mounted=is_mounted,
-                )
-                bom_items_to_create.append(bom_item)
-
-            if len(bom_items_to_create) == 0:
-                return Response("No valid rows found in the CSV.", status=status.HTTP_400_BAD_REQUEST)
-
-            # Now that data is prepared and validated, delete existing Bom_items
-            Bom_item.objects.filter(bom=bom).delete()
-
-            # Bulk fetch by full_part_number (which includes revision)
-            parts_qs = Part.objects.filter(full_part_number__in=full_part_numbers)
-            part_map = {p.full_part_number: p for p in parts_qs}
-
-            assemblies_qs = Assembly.objects.filter(full_part_number__in=full_part_numbers)
-            assembly_map = {a.full_part_number: a for a in assemblies_qs}
-
-            pcbas_qs = Pcba.objects.filter(full_part_number__in=full_part_numbers)
-            pcba_map = {p.full_part_number: p for p in pcbas_qs}
-
-            # Fetch latest revision Parts by mpn
-            latest_parts_qs = Part.objects.filter(
-                mpn__in=temporary_mpns, is_latest_revision=True
-            )
-
-            latest_part_map = {}
-            for part in latest_parts_qs:
-                latest_part_map[part.mpn] = part
-
-            # Now assign matched objects to bom_items
-            for bom_item in bom_items_to_create:
-                temporary_mpn = bom_item.temporary_mpn
-                if temporary_mpn:
-                    key = temporary_mpn.strip()
-
-                    part_match = part_map.get(key)
-                    assembly_match = assembly_map.get(key) if not part_match else None
-                    pcba_match = pcba_map.get(key) if not part_match and not assembly_match else None
-
-                    if not part_match and not assembly_match and not pcba_match:
-                        part_match_latest = latest_part_map.get(temporary_mpn)
-                        if part_match_latest:
-                            bom_item.part = part_match_latest
-                    else:
-                        if part_match:
-                            bom_item.part = part_match
-                        elif assembly_match:
-                            bom_item.assembly = assembly_match
-                        elif pcba_match:
-                            bom_item.pcba = pcba_match
-
-            # Bulk create Bom_item instances
-            Bom_item.objects.bulk_create(bom_items_to_create)
+            # Replace the BOM items, matched and inserted in batches
+            import_bom_rows(bom, itertools.chain([first_row], rows))
+            # bulk_create sends no signals, refresh the exploded BOMs explicitly
+            schedule_bom_explosion_refresh([item_key("pcbas", pcba.id)])
 
             # After processing all rows, commit the transaction
             # If any exception occurs, the transaction will be rolled back
@@ -12,7 +12,8 @@ from django.db.models import Q
 from typing import Type, Union, Optional, Tuple
 from django.db import models
 from .serializers import IssuesSerializer
-from assembly_bom.models import Assembly_bom, Bom_item
+from assembly_bom.models import Assembly_bom
+from assembly_bom.bom_explosion import bom_owner_key, get_bom_explosion, parse_item_key
 from pcbas.models import Pcba
 from .viewsIssues import APP_TO_MODEL, MODEL_TO_MODEL_STRING
 
@@ -43,8 +44,8 @@ def get_bom_issues(request, object_id, app):
 def collect_bom_issues(bom_id, app: str):
     # Start processing with the root BOM
     root_bom = Assembly_bom.objects.get(id=bom_id)
-    bom_items = Bom_item.objects.filter(bom=root_bom).prefetch_related('part', 'pcba', 'assembly')
-    flat_bom = flatten_bom(bom_items)
+    root_app, root_id = parse_item_key(bom_owner_key(root_bom))
+    flat_bom = flatten_bom(get_bom_explosion(root_app, root_id))
 
     # Collect IDs for issue queries
     part_ids = {details['id'] for details in flat_bom.values() if details['app'] == 'parts'}
@@ -98,65 +99,33 @@ def collect_bom_issues(bom_id, app: str):
     return enriched_issues
 
 
-def flatten_bom(bom_items, flat_bom=None, visited=None):
-    if visited is None:
-        visited = set()
+def flatten_bom(exploded_rows, flat_bom=None):
+    """Collect the items of an exploded BOM, see assembly_bom.bom_explosion.get_bom_explosion."""
     if flat_bom is None:
         flat_bom = {}
 
-    for item in bom_items:
-        # Skip items already processed to avoid infinite loops
-        if item.id in visited:
-            continue
-        visited.add(item.id)
-
-        app_type = None
-        item_id = None
-        revision = ''
-        full_part_number = ''
-
+    for row in exploded_rows:
         # Determine the type of item and its details
-        if item.part:
+        if row.part:
             app_type = 'parts'
-            item_id = item.part.id
-            revision = item.part.revision
-            full_part_number = item.part.full_part_number
-            thumbnail = item.part.thumbnail.id if item.part.thumbnail else None
-            display_name = item.part.display_name if hasattr(item.part, 'display_name') else None
-        elif item.pcba:
+            item = row.part
+        elif row.pcba:
             app_type = 'pcbas'
-            item_id = item.pcba.id
-            revision = item.pcba.revision
-            full_part_number = item.pcba.full_part_number
-            thumbnail = item.pcba.thumbnail.id if item.pcba.thumbnail else None
-            display_name = item.pcba.display_name if hasattr(item.pcba, 'display_name') else None
-            # Recurse to include items from this pcba's bom, if any
-            child_bom = Assembly_bom.objects.filter(pcba=item.pcba).first()
-            if child_bom:
-                child_items = Bom_item.objects.filter(bom=child_bom).select_related('part', 'pcba', 'assembly')
-                flatten_bom(child_items, flat_bom, visited)
-        elif item.assembly:
+            item = row.pcba
+        elif row.assembly:
             app_type = 'assemblies'
-            item_id = item.assembly.id
-            revision = item.assembly.revision
-            full_part_number = item.assembly.full_part_number
-            thumbnail = item.assembly.thumbnail.id if item.assembly.thumbnail else None
-            display_name = item.assembly.display_name if hasattr(item.assembly, 'display_name') else None
-            # Recurse to include items from this assembly's bom, if any
-            child_bom = Assembly_bom.objects.filter(assembly_id=item.assembly.id).first()
-            if child_bom:
-                child_items = Bom_item.objects.filter(bom=child_bom).select_related('part', 'pcba', 'assembly')
-                flatten_bom(child_items, flat_bom, visited)
+            item = row.assembly
+        else:
+            continue
 
         # Add details to the flat bom dictionary
-        if app_type:
-            flat_bom[item_id] = {
-                'app': app_type,
-                'id': item_id,
-                'revision': revision,
-                'full_part_number': full_part_number,
-                'thumbnail': thumbnail,
-                'display_name': display_name
-            }
-
-    return flat_bom
\ No newline at end of file
+        flat_bom[item.id] = {
+            'app': app_type,
+            'id': item.id,
+            'revision': item.revision,
+            'full_part_number': item.full_part_number,
+            'thumbnail': item.thumbnail_id,
+            'display_name': item.display_name if hasattr(item, 'display_name') else None
+        }
+
+    return flat_bom
@@ -7,7 +7,7 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view, renderer_classes, permission_classes
 from rest_framework.renderers import JSONRenderer
 from rest_framework import status
-from django.db.models import Q
+from django.db.models import Max, Q
 from django.contrib.postgres.search import SearchVector
 from django.contrib.auth.models import User
 from accounts.serializers import UserSerializer
@@ -30,6 +30,7 @@ from assembly_bom.serializers import BomItemSerializer
 from .priceModel import Price
 from production.models import Lot
 from assemblies.models import Assembly
+from part_numbers.methods import allocate_numbers
 from .poItemViews import calculate_po_cost
 from django.utils import timezone
 from datetime import datetime, timedelta
@@ -69,19 +70,19 @@ def get_purchase_order(request, purchase_order_id):
     return Response(serializerPurchaseOrder.data, status=status.HTTP_200_OK)
 
 
-def next_purchase_order_number():
-    """Returns the next purchase order number.
+def last_purchase_order_number():
+    """Returns the highest purchase order number in use, numbering starts at 10001.
     """
-    purchase_orders = PurchaseOrder.objects.all()
-    if len(purchase_orders) == 0:
-        return 10001
-    highest_id = 10001
-    for item in purchase_orders:
-        if item.purchase_order_number == None:
-            continue
-        if highest_id < item.purchase_order_number:
-            highest_id = item.purchase_order_number
-    return highest_id+1
+    highest = PurchaseOrder.objects.aggregate(highest=Max("purchase_order_number"))["highest"]
+    if highest is None:
+        return 10000
+    return max(highest, 10001)
+
+
+def next_purchase_order_number(count=1):
+    """Reserves the next purchase order number, or the first of count consecutive numbers.
+    """
+    return allocate_numbers("purchase_order", count, last_used=last_purchase_order_number)
 
 
 @api_view(('POST', ))
@@ -470,10 +471,13 @@ def create_po_from_bom(request):
             if not supplier_map:
                 return Response({"message": "No items found for suppliers"}, status=status.HTTP_204_NO_CONTENT)
 
-            for supplier_id, items in supplier_map.items():
+            # Reserve the numbers of all the purchase orders at once
+            first_po_number = next_purchase_order_number(len(supplier_map))
+
+            for po_index, (supplier_id, items) in enumerate(supplier_map.items()):
                 supplier = Supplier.objects.get(id=supplier_id)
                 po = PurchaseOrder()
-                po.purchase_order_number = next_purchase_order_number()
+                po.purchase_order_number = first_po_number + po_index
                 po.created_by = user
                 po.supplier = supplier
                 po.status = 'Draft'
@@ -29,6 +29,16 @@ def _get_user_display_name(user):
     return user.username or "Unknown"
 
 
+def _get_profile(user):
+    """Return the Profile of a user, or None."""
+    if not user:
+        return None
+    try:
+        return Profile.objects.get(user=user)
+    except Profile.DoesNotExist:
+        return None
+
+
 def _build_field_change_details(user, field_name, old_value, new_value):
     """Build human-readable details string for a field change."""
     user_name = _get_user_display_name(user)
@@ -73,20 +83,12 @@ def log_traceability_event(
     if details is None and field_name is not None:
         details = _build_field_change_details(user, field_name, old_value, new_value)
 
-    # Get or create profile for the user
-    profile = None
-    if user:
-        try:
-            profile = Profile.objects.get(user=user)
-        except Profile.DoesNotExist:
-            pass
-
     event = TraceabilityEvent.objects.create(
         event_type=event_type,
         app_type=app_type,
         item_id=item_id,
         user=user,
-        profile=profile,
+        profile=_get_profile(user),
         revision=revision,
         details=details,
         bom_id=bom_id,
@@ -187,6 +189,22 @@ def log_bom_edited_event(app_type, item_id, user, bom_id, revision=None, details
     )
 
 
+def _build_bom_change_details(user_name, field_name, old_value, new_value, refdes_for_quantity=None):
+    """Build human-readable details string for a BOM change."""
+    if refdes_for_quantity is not None:
+        return (
+            f"{user_name} changed quantity from {old_value} to {new_value} "
+            f"on Ref.des: {refdes_for_quantity}"
+        )
+    if old_value and new_value:
+        return f"{user_name} changed {field_name} from {old_value} to {new_value}"
+    if new_value:
+        return f"{user_name} {field_name}: {new_value}"
+    if old_value:
+        return f"{user_name} {field_name}: removed {old_value}"
+    return f"{user_name} {field_name}"
+
+
 def log_bom_change(
     app_type,
     item_id,
@@ -213,20 +231,9 @@ def log_bom_change(
     if refdes_for_quantity is not None:
         field_name = f"quantity (Ref.des: {refdes_for_quantity})"
     if details is None:
-        user_name = _get_user_display_name(user)
-        if refdes_for_quantity is not None:
-            details = (
-                f"{user_name} changed quantity from {old_value} to {new_value} "
-                f"on Ref.des: {refdes_for_quantity}"
-            )
-        elif old_value and new_value:
-            details = f"{user_name} changed {field_name} from {old_value} to {new_value}"
-        elif new_value:
-            details = f"{user_name} {field_name}: {new_value}"
-        elif old_value:
-            details = f"{user_name} {field_name}: removed {old_value}"
-        else:
-            details = f"{user_name} {field_name}"
+        details = _build_bom_change_details(
+            _get_user_display_name(user), field_name, old_value, new_value, refdes_for_quantity
+        )
     return log_traceability_event(
         event_type=event_type,
         app_type=app_type,
@@ -241,6 +248,45 @@ def log_bom_change(
     )
 
 
+def log_bom_changes(
+    app_type,
+    item_id,
+    user,
+    bom_id,
+    revision,
+    changes,
+    event_type=None,
+):
+    """
+    Log several changes to the same BOM with a single insert, e.g. when a BOM import matches many items.
+    changes: list of dicts {"field": str, "old": str|None, "new": str|None}, like log_field_changes.
+    Details are built the same way as in log_bom_change.
+    """
+    if not changes:
+        return []
+    if event_type is None:
+        event_type = "bom_edited"
+    user_name = _get_user_display_name(user)
+    profile = _get_profile(user)
+    events = [
+        TraceabilityEvent(
+            event_type=event_type,
+            app_type=app_type,
+            item_id=item_id,
+            user=user,
+            profile=profile,
+            revision=revision,
+            details=_build_bom_change_details(user_name, c["field"], c.get("old"), c.get("new")),
+            bom_id=bom_id,
+            field_name=c["field"],
+            old_value=c.get("old"),
+            new_value=c.get("new"),
+        )
+        for c in changes
+    ]
+    return TraceabilityEvent.objects.bulk_create(events, batch_size=1000)
+
+
 def log_approved_event(app_type, item_id, user, revision=None, details=None):
     """Log an 'approved' event."""
     return log_traceability_event(